@@ -42,11 +42,10 @@ for (idx, row_id, flag, score) in anomaly.add(dataset_neg):
 
 # Calculate LOF scores for the full dataset.
 # It is expected that `Iris-virginica` records get higher scores than others.
-y_true = []
-y_score = []
-for (idx, row_id, flag, score) in anomaly.calc_score(dataset):
-  y_true.append(is_positive(flag))
-  y_score.append(score)
+# Scores are calculated in chunks with multiple requests in flight.
+(flags, y_score) = anomaly.calc_score_array(dataset, chunk_size=10, pipeline=4)
+y_true = [is_positive(flag) for flag in flags]
+for (flag, score) in zip(flags, y_score):
   print('Score ({0}): {1}'.format(flag, score))
 
 # Stop the Anomaly serivce.
@@ -10,7 +10,7 @@ This is a simple example that illustrates:
 
 * How to load CSV files and convert it into Jubakit dataset.
 * Register keywords to the burst client using the keyword dataset.
-* Add documents to the burst client using the document dataset.
+* Add documents to the burst client in batches using the document dataset.
 * Getting burst result.
 """
 
@@ -37,7 +37,9 @@ document_dataset = DocumentDataset(document_loader, document_schema)
 burst = Burst.run(Config())
 
 for _ in burst.add_keyword(keyword_dataset): pass
-for _ in burst.add_documents(document_dataset): pass
+# Documents are sent in batches for each window of `batch_interval`.
+window = Config()['parameter']['batch_interval']
+for _ in burst.add_documents_stream(document_dataset, window=window): pass
 
 for result in burst.get_result('burst').batches:
     print(result)
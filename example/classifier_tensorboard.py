@@ -58,8 +58,7 @@ config = Config(method='AROW',
 classifier = Classifier.run(config)
 
 model_name = 'classifier_digits'
-model_path = '/tmp/{}_{}_classifier_{}.jubatus'.format(
-    classifier._host, classifier._port, model_name)
+model_path = '/tmp/{}.jubatus'.format(model_name)
 
 # show the feature weights of the target label.
 target_label = 4
@@ -80,7 +79,7 @@ for epoch in range(epochs):
         y_pred.append(result[0][0])
 
     # save model to check the feature weights
-    classifier.save(model_name)
+    classifier.save(model_name, model_path)
 
     model = JubaDump.dump_file(model_path)
     weights = model['storage']['storage']['weight']
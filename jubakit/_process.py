@@ -11,6 +11,7 @@ import os
 import platform
 import distutils.spawn
 import tempfile
+import socket
 
 import msgpackrpc
 import psutil
@@ -55,12 +56,18 @@ class _ServiceBackend(object):
   # Disable verbose tornado WARN logs on connect failure.
   logging.getLogger('tornado').setLevel(logging.ERROR)
 
+  # Set of service names whose server process is confirmed to be available.
+  _installed = set()
+
   def __init__(self, name, config, port=None):
     self.name = name
     self.config = config
     self.port = port
     self.log = None
 
+    # Port requested by the caller (None if auto-selected), used on restart.
+    self._requested_port = port
+
     self._logbuf = None
     self._proc = None
 
@@ -95,6 +102,7 @@ class _ServiceBackend(object):
     # Number of retries; if user does not specify port, we can retry.
     retry = 10 if self.port is None else 1
 
+    self.config_key = self.get_config_key(self.config)
     with tempfile.NamedTemporaryFile(prefix='jubakit-config-') as config_file:
       config_file.write(json.dumps(self.config).encode('utf-8'))
       config_file.flush()
@@ -119,29 +127,18 @@ class _ServiceBackend(object):
         self._proc = JubaProcess.get_process(args, stdout=self._logbuf, stderr=subprocess.STDOUT)
         pid = self._proc.pid
 
-        # Wait until the RPC server start.
-        started = self._wait_until_rpc_ready(self.port)
+        # Wait until the process we just started listens on the port.
+        started = self._wait_until_listening(self._proc, self.port)
 
         if started:  # i.e. RPC server is working on the port
-          # Get status from the remote server.
-          status = None
-          try:
-            status = self.get_status()
-          except Exception as e:
-            # Other MessagePack-RPC server that does not respond to get_status RPC (e.g., Jubatus proxy) is running on the port.
-            _logger.debug('failed to get status from server on port %d: %s', self.port, str(e))
-          if status:
-            # Get PID from the server status and compare it with the PID of the process we just started.
-            remote_pid = int(status['pid'])
-            if remote_pid == pid:
-              # Service started successfully.
-              _logger.debug('service started on port %d with PID %d', self.port, pid)
-              return (True, None)
-            # The free port we found was taken by others.
-            _logger.debug('service PID mismatch (expected %d, got %d); other Jubatus server is already running on port %d', pid, remote_pid, self.port)
-          # Stop the process.
-          self._stop()
-        else:  # i.e. RPC server is NOT working on the port
+          # Service started successfully.
+          _logger.debug('service started on port %d with PID %d', self.port, pid)
+          return (True, None)
+        elif started is None:  # i.e. process is running but not listening on the port
+          # The free port we found was taken by others, or the server hangs.
+          _logger.debug('service did not start listening on port %d', self.port)
+          (_, stdout) = self._stop()
+        else:  # i.e. process exited
           # Stop the process.
           (retval, stdout) = self._stop()
 
@@ -194,6 +191,44 @@ class _ServiceBackend(object):
       raise RuntimeError('server exit with status {0}; confirm that the config is valid: {1}'.format(retval, stdout))
     return stdout
 
+  def restart(self, config):
+    """
+    Restarts the server instance with the new config.  The server listens on
+    the same port if it was specified on start; otherwise a new free port is
+    selected.
+    """
+    self._stop()
+    self.config = config
+    self.port = self._requested_port
+    (started, log) = self._start()
+    if not started:
+      raise RuntimeError('failed to restart server: {0}'.format(log))
+
+  def is_running(self):
+    """
+    Returns True if the server process is still running.
+    """
+    return self._proc is not None and self._proc.poll() is None
+
+  def clear(self):
+    """
+    Clears the model of the server instance.
+    """
+    cli = msgpackrpc.Client(msgpackrpc.Address('127.0.0.1', self.port))
+    try:
+      return cli.call('clear', '')
+    finally:
+      cli.close()
+      cli._loop._ioloop.close()
+
+  @classmethod
+  def get_config_key(cls, config):
+    """
+    Returns the string that identifies the config; two configs are
+    considered identical if their keys are equal.
+    """
+    return json.dumps(config, sort_keys=True)
+
   def get_status(self):
     cli = msgpackrpc.Client(msgpackrpc.Address('127.0.0.1', self.port), unpack_encoding='utf-8')
     try:
@@ -203,42 +238,73 @@ class _ServiceBackend(object):
       cli._loop._ioloop.close()
 
   @classmethod
-  def _get_free_port(cls, start=10000, end=30000):
+  def _get_free_port(cls, start=10000, end=30000, tries=100):
     """
-    Finds the free port available to listen.
+    Finds the free port available to listen by actually binding to randomly
+    chosen ports.
 
     The default range of [10000,30000] is chosen to avoid the default
     ephemeral port range on most platforms.
     """
-    used_ports = cls._get_ports_in_use()
-    candidates = [x for x in range(start, end + 1) if x not in used_ports]
-    if len(candidates) == 0:
-      raise RuntimeError('no free port available in range [{0},{1}]'.format(start, end))
-    return random.choice(candidates)
+    for _ in range(tries):
+      port = random.randint(start, end)
+      if cls._is_port_free(port):
+        return port
+    raise RuntimeError('no free port available in range [{0},{1}]'.format(start, end))
 
   @classmethod
-  def _get_ports_in_use(cls):
+  def _is_port_free(cls, port):
     """
-    Returns a set of ports currently used on localhost.
+    Returns True if the port can be bound on localhost.
     """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
-      return set([x.laddr[1] for x in psutil.net_connections(kind='inet4')])
-    except psutil.AccessDenied:
-      # On some platforms (such as OS X), root privilege is required to get used ports.
-      # In that case we avoid port confliction to the best of our knowledge.
-      _logger.info('ports in use cannot be obtained on this platform; ports will be assigned sequentially')
-      return set()
+      sock.bind(('127.0.0.1', port))
+      return True
+    except socket.error:
+      return False
+    finally:
+      sock.close()
 
   @classmethod
-  def _wait_until_rpc_ready(cls, port):
-    sleep_time = 1000
-    for i in range(10):
-      time.sleep(sleep_time/1000000.0) # from usec to sec
-      if cls._ping_rpc(port):
-        _logger.debug('service RPC ready after %d tries', i)
+  def _wait_until_listening(cls, proc, port, timeout=10.0):
+    """
+    Waits until the process ``proc`` starts listening on ``port``.
+    Returns True if the process is listening, False if the process exited,
+    or None if timed out.
+    """
+    sleep_time = 0.0005
+    deadline = time.time() + timeout
+    tries = 0
+    while True:
+      if proc.poll() is not None:
+        return False
+      if cls._is_listening(proc.pid, port):
+        _logger.debug('service RPC ready after %d tries', tries)
         return True
-      sleep_time *= 2
-    return False
+      if deadline < time.time():
+        return None
+      time.sleep(sleep_time)
+      sleep_time = min(sleep_time * 2, 0.05)
+      tries += 1
+
+  @classmethod
+  def _is_listening(cls, pid, port):
+    """
+    Returns True if the process ``pid`` is listening on ``port``.
+    """
+    try:
+      proc = psutil.Process(pid)
+      if hasattr(proc, 'net_connections'):  # psutil 6.0+
+        conns = proc.net_connections(kind='inet4')
+      else:
+        conns = proc.connections(kind='inet4')
+    except psutil.AccessDenied:
+      # On some platforms, connections cannot be obtained; fall back to RPC.
+      return cls._ping_rpc(port)
+    except psutil.NoSuchProcess:
+      return False
+    return any([c.laddr[1] == port and c.status == psutil.CONN_LISTEN for c in conns])
 
   @classmethod
   def _ping_rpc(cls, port):
@@ -259,6 +325,12 @@ class _ServiceBackend(object):
 
   @classmethod
   def _check_installed(cls, name):
+    """
+    Confirms that the server process for the service ``name`` can be run.
+    The result is cached per process.
+    """
+    if name in cls._installed:
+      return
     procname = 'juba{0}'.format(name)
 
     _logger.debug('checking if service process %s is available', procname)
@@ -269,6 +341,7 @@ class _ServiceBackend(object):
       )
       (stdout, _) = proc.communicate()
       if proc.returncode == 0:
+        cls._installed.add(name)
         return
       raise RuntimeError('{0} exit with status {1}; confirm that LD_LIBRARY_PATH is properly set: {2}'.format(procname, proc.returncode, stdout))
     except OSError as e:
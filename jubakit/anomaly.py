@@ -5,7 +5,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import jubatus
 import jubatus.embedded
 
-from .base import GenericSchema, BaseDataset, BaseService, GenericConfig
+from .base import GenericSchema, BaseDataset, BaseService, GenericConfig, Utils
 from .compat import *
 
 class Schema(GenericSchema):
@@ -72,14 +72,37 @@ class Anomaly(BaseService):
       result = cli.add(d)
       yield (idx, result.id, row_flag, result.score)
 
-  def add_bulk(self, dataset):
+  def add_bulk(self, dataset, chunk_size=1000, pipeline=1):
     """
     Adds data points to the anomaly model using the given dataset and returns
-    a list of data point IDs.
+    a list of data point IDs.  Records are sent in chunks of ``chunk_size``
+    records per RPC call; see ``add_bulk_stream`` for ``pipeline``.
     """
-    cli = self._client()
-    data = [d[1][2] for d in dataset]
-    return cli.add_bulk(data)
+    return [row_id for (_, row_id) in self.add_bulk_stream(dataset, chunk_size, False, pipeline)]
+
+  def add_bulk_stream(self, dataset, chunk_size=1000, per_chunk=False, pipeline=1):
+    """
+    Adds data points to the anomaly model using the given dataset in chunks
+    of ``chunk_size`` records per RPC call, and yields the data point ID for
+    each record as ``(idx, id)``.  When ``per_chunk`` is True, yields
+    ``(list_of_idx, list_of_id)`` for each chunk instead.  When ``pipeline``
+    is greater than 1, up to ``pipeline`` chunks are sent concurrently.
+
+    Note that chunks are sent as the result is iterated; use ``add_bulk``
+    to add all records at once.
+    """
+    def _add_bulk(cli, chunk):
+      return cli.add_bulk([d for (_, (_, _, d)) in chunk])
+
+    for (chunk, ids) in self._map_chunks(_add_bulk, Utils.chunk(dataset, chunk_size), pipeline):
+      if len(ids) != len(chunk):
+        raise RuntimeError('{0} records were sent but {1} data points were added'.format(len(chunk), len(ids)))
+      indices = [idx for (idx, _) in chunk]
+      if per_chunk:
+        yield (indices, ids)
+      else:
+        for (idx, row_id) in zip(indices, ids):
+          yield (idx, row_id)
 
   def update(self, dataset):
     """
@@ -105,14 +128,36 @@ class Anomaly(BaseService):
       result = cli.overwrite(row_id, d)
       yield (idx, row_id, row_flag, result)
 
-  def calc_score(self, dataset):
+  def calc_score(self, dataset, chunk_size=1, pipeline=1):
     """
     Calculates LOF scores for the given dataset.
+
+    Records are scored in chunks of ``chunk_size`` records.  When
+    ``pipeline`` is greater than 1, up to ``pipeline`` chunks are scored
+    concurrently using separate connections.  Results are yielded in the
+    order of the dataset.
     """
-    cli = self._client()
-    for (idx, (row_id, row_flag, d)) in dataset:
-      result = cli.calc_score(d)
-      yield (idx, row_id, row_flag, result)
+    def _calc_score(cli, chunk):
+      return [cli.calc_score(d) for (_, (_, _, d)) in chunk]
+
+    for (chunk, scores) in self._map_chunks(_calc_score, Utils.chunk(dataset, chunk_size), pipeline):
+      for ((idx, (row_id, row_flag, _)), score) in zip(chunk, scores):
+        yield (idx, row_id, row_flag, score)
+
+  def calc_score_array(self, dataset, chunk_size=100, pipeline=4):
+    """
+    Calculates LOF scores for the given dataset and returns a tuple of
+    NumPy arrays ``(flags, scores)``, which can be directly passed to
+    metrics like ``sklearn.metrics.roc_auc_score``.  See ``calc_score``
+    for ``chunk_size`` and ``pipeline``.
+    """
+    import numpy as np
+    flags = []
+    scores = []
+    for (idx, row_id, row_flag, score) in self.calc_score(dataset, chunk_size, pipeline):
+      flags.append(row_flag)
+      scores.append(score)
+    return (np.array(flags), np.array(scores, dtype=np.float64))
 
 class Config(GenericConfig):
   """
@@ -2,10 +2,21 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import threading
+
+try:
+  import queue
+except ImportError:
+  # Python 2
+  import Queue as queue
+
 import jubatus
 import jubatus.embedded
 
-from .base import BaseService, GenericConfig
+from .base import BaseService, GenericConfig, Utils
+from .logger import get_logger
+
+_logger = get_logger()
 
 
 class Bandit(BaseService):
@@ -13,6 +24,10 @@ class Bandit(BaseService):
   Bandit service.
   """
 
+  def __init__(self, host='127.0.0.1', port=9199, cluster='', timeout=0):
+    super(Bandit, self).__init__(host, port, cluster, timeout)
+    self._reward_queue = None
+
   @classmethod
   def name(cls):
     return 'bandit'
@@ -43,6 +58,82 @@ class Bandit(BaseService):
     reward = float(reward)
     return self._client().register_reward(player_id, arm_id, reward)
 
+  def select_arms(self, player_ids, chunk_size=100, pipeline=4):
+    """
+    Selects arms for each of `player_ids` and returns the list of arm IDs.
+    Requests are sent in chunks of `chunk_size` players, keeping up to
+    `pipeline` chunks in flight over separate connections.
+    """
+    def _select(cli, chunk):
+      return [cli.select_arm(p) for p in chunk]
+
+    chunks = Utils.chunk([str(p) for p in player_ids], chunk_size)
+    arms = []
+    for (_, result) in self._map_chunks(_select, chunks, pipeline):
+      arms.extend(result)
+    return arms
+
+  def register_rewards(self, rewards, chunk_size=100, pipeline=4):
+    """
+    Registers rewards given as the list of `(player_id, arm_id, reward)`
+    tuples and returns the list of results.  See `select_arms` for
+    `chunk_size` and `pipeline`.
+    """
+    def _register(cli, chunk):
+      return [cli.register_reward(p, a, r) for (p, a, r) in chunk]
+
+    chunks = Utils.chunk([(str(p), str(a), float(r)) for (p, a, r) in rewards], chunk_size)
+    results = []
+    for (_, result) in self._map_chunks(_register, chunks, pipeline):
+      results.extend(result)
+    return results
+
+  def start_reward_queue(self, max_size=100000, batch_size=1000, interval=1.0):
+    """
+    Starts the background thread that registers rewards queued by
+    `queue_reward`.  Queued rewards are registered in batches of up to
+    `batch_size` rewards, at least every `interval` seconds.  Up to
+    `max_size` rewards can be queued; rewards exceeding the limit are
+    dropped and counted in `reward_queue_stats`.
+    """
+    if self._reward_queue is not None:
+      raise RuntimeError('reward queue already started')
+    self._reward_queue = _RewardQueue(self, max_size, batch_size, interval)
+    self._reward_queue.start()
+
+  def stop_reward_queue(self, flush=True):
+    """
+    Stops the reward queue thread.  If `flush` is True, rewards remaining
+    in the queue are registered before stopping.
+    """
+    if self._reward_queue is None:
+      return
+    self._reward_queue.stop(flush)
+    self._reward_queue = None
+
+  def queue_reward(self, player_id, arm_id, reward):
+    """
+    Queues the reward to be registered by the reward queue thread.  This
+    method never blocks; returns False if the queue is full and the reward
+    is dropped.
+    """
+    if self._reward_queue is None:
+      raise RuntimeError('reward queue is not started')
+    return self._reward_queue.put((player_id, arm_id, reward))
+
+  def reward_queue_stats(self):
+    """
+    Returns the dict of reward queue statistics with keys `queued`,
+    `registered`, `dropped` and `failed`, or None if the queue is not started.
+    """
+    if self._reward_queue is None:
+      return None
+    return self._reward_queue.stats()
+
+  def stop(self):
+    self.stop_reward_queue()
+    return super(Bandit, self).stop()
+
   def get_arm_info(self, player_id):
     player_id = str(player_id)
     arm_info = self._client().get_arm_info(player_id)
@@ -54,6 +145,75 @@ class Bandit(BaseService):
     return self._client().reset(str(player_id))
 
 
+class _RewardQueue(threading.Thread):
+  """
+  Background thread that registers queued rewards in batches.
+  """
+
+  def __init__(self, service, max_size, batch_size, interval):
+    super(_RewardQueue, self).__init__()
+    self.daemon = True
+    self.batch_size = batch_size
+    self.interval = interval
+    self.registered = 0
+    self.dropped = 0
+    self.failed = 0
+    self._service = service
+    self._queue = queue.Queue(max_size)
+    self._stopped = threading.Event()
+
+  def put(self, reward):
+    try:
+      self._queue.put_nowait(reward)
+      return True
+    except queue.Full:
+      self.dropped += 1
+      return False
+
+  def run(self):
+    while not self._stopped.is_set():
+      self.flush(self.interval)
+
+  def flush(self, timeout=None):
+    """
+    Registers queued rewards in batches until the queue becomes empty.
+    Waits for `timeout` seconds for the first reward if specified.
+    """
+    while True:
+      try:
+        batch = [self._queue.get(timeout is not None, timeout)]
+      except queue.Empty:
+        return
+      timeout = None
+      while len(batch) < self.batch_size:
+        try:
+          batch.append(self._queue.get_nowait())
+        except queue.Empty:
+          break
+      try:
+        self._service.register_rewards(batch, pipeline=1)
+        self.registered += len(batch)
+      except Exception as e:
+        self.failed += len(batch)
+        _logger.warning('failed to register %d rewards: %s', len(batch), e)
+      if len(batch) < self.batch_size:
+        return
+
+  def stop(self, flush=True):
+    self._stopped.set()
+    if self is not threading.current_thread():
+      self.join()
+    if flush:
+      self.flush()
+
+  def stats(self):
+    return {
+      'queued': self._queue.qsize(),
+      'registered': self.registered,
+      'dropped': self.dropped,
+      'failed': self.failed,
+    }
+
 class Config(GenericConfig):
   """
   Configuration to run Bandit service.
@@ -6,6 +6,13 @@ import collections
 import copy
 import random
 import math
+import threading
+import multiprocessing
+import multiprocessing.pool
+import os
+import time
+from io import BytesIO
+from binascii import crc32
 
 import jubatus
 
@@ -13,6 +20,7 @@ from .shell import JubaShell
 from .compat import *
 from .logger import get_logger
 from ._process import _ServiceBackend
+from .model import JubaModel, LinearMerger
 
 _logger = get_logger()
 
@@ -434,9 +442,12 @@ class BaseService(object):
     self._timeout = timeout
     self._embedded = False
     self._backend = None
+    self._checkpointer = None
+    self._cache = None
 
   def __del__(self):
-    # Invoke the backend destructor as fast as possible.
+    # Stop the checkpoint thread and invoke the backend destructor as fast as possible.
+    self.stop_checkpoint()
     self._backend = None
 
   @classmethod
@@ -476,17 +487,165 @@ class BaseService(object):
       service._backend = backend
       service._embedded = True
     else:
-      backend = _ServiceBackend(cls.name(), config, port)
+      backend = None
+      if port is None:
+        backend = ServicePool.acquire(cls.name(), config)
+      if backend is None:
+        backend = _ServiceBackend(cls.name(), config, port)
       _logger.info('service %s started on port %d', cls.name(), backend.port)
       service = cls('127.0.0.1', backend.port)
       service._backend = backend
     return service
 
+  @classmethod
+  def train_parallel(cls, config, dataset, n_jobs=None, mix_rounds=1, model=None):
+    """
+    Trains a model in parallel using `n_jobs` worker processes (defaults to
+    the number of CPUs), each holding an embedded model, and returns the
+    embedded service with the merged model.
+
+    The static `dataset` is split into `mix_rounds` blocks; in each round,
+    the block is partitioned across workers and the models trained by the
+    workers are averaged (weighted by the number of records) before the
+    next round starts.  Only services whose models can be merged by
+    ``JubaModel.merge`` (linear Classifier / Regression) are supported.
+    If `model` (bytes taken by `snapshot`) is given, workers start training
+    from the model.  Statistics (e.g., label counts) of the model each
+    round starts from are counted only once in the merged model.
+    """
+    LinearMerger.check_mergeable(cls.name(), config)
+    if not dataset.is_static():
+      raise RuntimeError('non-static datasets cannot be trained in parallel')
+    if n_jobs is None:
+      n_jobs = multiprocessing.cpu_count()
+    if n_jobs < 1 or mix_rounds < 1:
+      raise RuntimeError('n_jobs and mix_rounds must be positive integers')
+
+    indices = list(range(len(dataset)))
+    model_bytes = model
+    pool = multiprocessing.Pool(n_jobs) if 1 < n_jobs else None
+    try:
+      for r in range(mix_rounds):
+        block = indices[len(indices) * r // mix_rounds:len(indices) * (r + 1) // mix_rounds]
+        tasks = []
+        for w in range(n_jobs):
+          part = block[w::n_jobs]
+          if len(part) != 0:
+            tasks.append((cls, config, model_bytes, dataset[part]))
+        if len(tasks) == 0:
+          continue
+
+        _logger.info('parallel training round %d: %d records in %d workers', r, len(block), len(tasks))
+        if pool is None:
+          results = [_train_parallel_task(task) for task in tasks]
+        else:
+          results = pool.map(_train_parallel_task, tasks)
+
+        if len(results) == 1:
+          model_bytes = results[0]
+        else:
+          models = [JubaModel.load_binary(BytesIO(result)) for result in results]
+          base = None if model_bytes is None else JubaModel.load_binary(BytesIO(model_bytes))
+          merged = JubaModel.merge(models, [len(task[3]) for task in tasks], base)
+          buf = BytesIO()
+          merged.dump_binary(buf)
+          model_bytes = buf.getvalue()
+    finally:
+      if pool is not None:
+        pool.terminate()
+        pool.join()
+
+    service = cls.run(config, embedded=True)
+    if model_bytes is not None:
+      service._backend.load_bytes(model_bytes)
+    return service
+
   def _client(self):
     if self._embedded:
       return self._backend.model
     return self._client_class()(self._host, self._port, self._cluster, self._timeout)
 
+  def _map_chunks(self, func, chunks, pipeline=1):
+    """
+    Calls ``func(client, chunk)`` for each chunk and yields ``(chunk, result)``
+    in order.  When `pipeline` is greater than 1, up to `pipeline` requests
+    are kept in flight using separate connections.  Chunks are taken from
+    `chunks` only as requests complete, so memory usage stays bounded.
+    """
+    if pipeline <= 1 or self._embedded:
+      cli = self._client()
+      for chunk in chunks:
+        yield (chunk, func(cli, chunk))
+      return
+
+    local = threading.local()
+    def call(chunk):
+      cli = getattr(local, 'client', None)
+      if cli is None:
+        cli = local.client = self._client()
+      return (chunk, func(cli, chunk))
+
+    pool = multiprocessing.pool.ThreadPool(pipeline)
+    try:
+      pending = collections.deque()
+      for chunk in chunks:
+        pending.append(pool.apply_async(call, (chunk,)))
+        if pipeline <= len(pending):
+          yield pending.popleft().get()
+      while 0 < len(pending):
+        yield pending.popleft().get()
+    finally:
+      pool.terminate()
+      pool.join()
+
+  def _update_rows(self, method, dataset, chunk_size, pipeline, retries, backoff):
+    """
+    Calls RPC ``method`` with ``(row_id, datum)`` for each record, in chunks
+    of `chunk_size` records with up to `pipeline` chunks in flight.  Rows
+    that failed are retried up to `retries` times with exponential backoff
+    starting from `backoff` seconds, using a new connection for each retry.
+    Yields a dict of statistics for each chunk.
+    """
+    def _update(cli, chunk):
+      start = time.time()
+      (pending, failed, retried) = (chunk, [], 0)
+      for attempt in range(retries + 1):
+        if 0 < attempt:
+          time.sleep(backoff * (2 ** (attempt - 1)))
+          cli = self._client()
+          retried += len(pending)
+        failed = []
+        for (idx, (row_id, d)) in pending:
+          try:
+            getattr(cli, method)(row_id, d)
+          except Exception as e:
+            failed.append((idx, row_id, e))
+        if len(failed) == 0:
+          break
+        _logger.warning('%s: %d of %d rows failed (attempt %d)', method, len(failed), len(pending), attempt + 1)
+        failed_idx = set([idx for (idx, _, _) in failed])
+        pending = [(idx, row) for (idx, row) in pending if idx in failed_idx]
+      return (failed, retried, time.time() - start)
+
+    def _chunks():
+      for chunk in Utils.chunk(dataset, chunk_size):
+        for (idx, (row_id, d)) in chunk:
+          if row_id is None:
+            raise RuntimeError('dataset must have `id`')
+        yield chunk
+
+    for (i, (chunk, (failed, retried, elapsed))) in enumerate(self._map_chunks(_update, _chunks(), pipeline)):
+      self._invalidate_cache()
+      yield {
+        'chunk': i,
+        'size': len(chunk),
+        'succeeded': len(chunk) - len(failed),
+        'failed': failed,
+        'retried': retried,
+        'elapsed': elapsed,
+        'throughput': len(chunk) / elapsed if 0 < elapsed else float('inf'),
+      }
+
   def _shell(self, **kwargs):
     if self._embedded:
       raise RuntimeError('embedded service does not support shell')
@@ -503,9 +662,14 @@ class BaseService(object):
 
   def stop(self):
     """
-    Stops the backend process if exists.
+    Stops the backend process if exists.  If the server pool is enabled,
+    the backend process is cleared and returned to the pool instead.
     """
+    self.stop_checkpoint()
     if self._backend is not None:
+      if not self._embedded and ServicePool.release(self._backend):
+        self._backend = None
+        return None
       return self._backend.stop()
 
   def clear(self):
@@ -514,26 +678,198 @@ class BaseService(object):
     """
     if not self._client().clear():
       raise RuntimeError('failed to clear model')
+    self._invalidate_cache()
     _logger.info('model cleared')
 
   def save(self, name, path=None):
     """
     Saves the model using `name`.  If `path` is specified, copy the saved
-    model file to local `path`.
+    model file to local `path`.  For embedded services, the model is directly
+    written to `path` without saving it under `name`.
     """
-    self._client().save(name)
+    if self._embedded and path is not None:
+      self._write_model_file(self._backend.save_bytes(), path)
+      _logger.info('model saved: %s', path)
+      return
+
+    result = self._client().save(name)
     _logger.info('model saved: %s', name)
-    # TODO copy source from `jubafetch` and make path option work.
+    if path is not None:
+      if len(result) != 1:
+        raise RuntimeError('path cannot be specified for distributed servers')
+      self._check_local()
+      self._copy_model_file(list(result.values())[0], path)
+      _logger.info('model copied: %s', path)
 
   def load(self, name, path=None):
     """
     Loads the model using `name`.  If `path` is specified, copy the model
-    file from local `path` to remote location.
-    """
+    file from local `path` to remote location.  For embedded services, the
+    model is directly read from `path`.
+    """
+    if self._embedded and path is not None:
+      with open(path, 'rb') as f:
+        self._backend.load_bytes(f.read())
+      self._invalidate_cache()
+      _logger.info('model loaded: %s', path)
+      return
+
+    if path is not None:
+      self._check_local()
+      status = self.get_status()
+      if len(status) != 1:
+        raise RuntimeError('path cannot be specified for distributed servers')
+      (server_id, st) = status.popitem()
+      remote_path = os.path.join(st['datadir'], '{0}_{1}_{2}.jubatus'.format(server_id, st['type'], name))
+      self._copy_model_file(path, remote_path)
+      _logger.info('model copied: %s', remote_path)
+
     if not self._client().load(name):
       raise RuntimeError('failed to load model: {0}'.format(name))
+    self._invalidate_cache()
     _logger.info('model loaded: %s', name)
-    # TODO copy source from `jubafetch` and make path option work.
+
+  def snapshot(self):
+    """
+    Returns the model of the embedded service as bytes.  The result can be
+    given to `restore` or written to a file loadable by `load`.
+    """
+    if not self._embedded:
+      raise RuntimeError('snapshot is only available for embedded service')
+    return self._backend.save_bytes()
+
+  def restore(self, data):
+    """
+    Restores the model of the embedded service from `data`, which is bytes
+    or a file-like object containing the snapshot.
+    """
+    if not self._embedded:
+      raise RuntimeError('restore is only available for embedded service')
+    if not isinstance(data, bytes):
+      data = data.read()
+    self._backend.load_bytes(data)
+    self._invalidate_cache()
+    _logger.info('model restored from snapshot (%d bytes)', len(data))
+
+  def enable_cache(self, size=1024, ttl=None):
+    """
+    Enables the client-side cache of query results (e.g.,
+    `similar_row_from_id`) holding up to `size` entries in LRU order.  If
+    `ttl` is specified, entries expire after `ttl` seconds.  The cache is
+    invalidated when the model is updated through this service object;
+    updates made by other clients are not detected, so use `ttl` to bound
+    the staleness.
+    """
+    self._cache = _ResultCache(size, ttl)
+
+  def disable_cache(self):
+    """
+    Disables the client-side cache.
+    """
+    self._cache = None
+
+  def cache_stats(self):
+    """
+    Returns the dict of cache statistics with keys `hits`, `misses`,
+    `invalidations` and `size`, or None if the cache is disabled.
+    """
+    if self._cache is None:
+      return None
+    return self._cache.stats()
+
+  def _cached(self, key, func):
+    """
+    Returns the cached result for `key`, or calls `func` to get the result
+    and caches it.
+    """
+    if self._cache is None:
+      return func()
+    return self._cache.get(key, func)
+
+  def _invalidate_cache(self):
+    if self._cache is not None:
+      self._cache.invalidate()
+
+  def start_checkpoint(self, target, interval=60.0):
+    """
+    Starts the background thread that takes the snapshot of the embedded
+    service every `interval` seconds.  `target` is the path to write the
+    snapshot to, or a callable that receives the snapshot bytes.  Writing
+    the snapshot is done in the background thread so that the training
+    loop is not stalled by disk I/O.  Calls to the embedded model are
+    serialized, so snapshots are never taken in the middle of an update.
+    """
+    if not self._embedded:
+      raise RuntimeError('checkpoint is only available for embedded service')
+    if interval <= 0:
+      raise RuntimeError('checkpoint interval must be positive: {0}'.format(interval))
+    self.stop_checkpoint()
+    self._checkpointer = _Checkpointer(self, target, interval)
+    self._checkpointer.start()
+
+  def stop_checkpoint(self, final=False):
+    """
+    Stops the background checkpoint thread if running.  If `final` is True,
+    the last snapshot is taken before stopping.
+    """
+    checkpointer = getattr(self, '_checkpointer', None)
+    if checkpointer is None:
+      return
+    self._checkpointer = None
+    checkpointer.stop(final)
+
+  def _check_local(self):
+    """
+    Model files can only be transferred with servers on the local host.
+    """
+    if self._host not in ('127.0.0.1', 'localhost'):
+      raise RuntimeError('path option is only available for servers running on localhost')
+
+  @classmethod
+  def _copy_model_file(cls, src, dst, chunk_size=1048576):
+    """
+    Copies the model file `src` to `dst` in chunks.  The copy is written to
+    a temporary file and then renamed to `dst`, and its checksum is verified
+    at `dst`.
+    """
+    try:
+      fsrc = open(src, 'rb')
+    except IOError as e:
+      raise RuntimeError('model file {0} is not accessible: {1}'.format(src, e))
+    with fsrc:
+      cls._write_model_file(iter(lambda: fsrc.read(chunk_size), b''), dst, chunk_size)
+
+  @classmethod
+  def _write_model_file(cls, data, dst, chunk_size=1048576):
+    """
+    Writes the model `data` (bytes or iterable of chunks) to `dst`.  The
+    checksum of the file at `dst` is verified after the rename, and `dst` is
+    removed if it does not match.
+    """
+    if isinstance(data, bytes):
+      data = [data]
+
+    tmp = '{0}.{1}.tmp'.format(dst, os.getpid())
+    try:
+      checksum = 0
+      with open(tmp, 'wb') as f:
+        for chunk in data:
+          checksum = crc32(chunk, checksum)
+          f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+      os.rename(tmp, dst)
+    finally:
+      if os.path.exists(tmp):
+        os.remove(tmp)
+
+    written = 0
+    with open(dst, 'rb') as f:
+      for chunk in iter(lambda: f.read(chunk_size), b''):
+        written = crc32(chunk, written)
+    if checksum != written:
+      os.remove(dst)
+      raise RuntimeError('checksum mismatch while writing model file {0}'.format(dst))
 
   def get_status(self):
     """
@@ -559,7 +895,8 @@ class BaseService(object):
 
 class _ServiceBackendEmbedded(object):
   def __init__(self, clazz, config):
-    self.model = clazz(config)
+    self.lock = threading.Lock()
+    self.model = _LockedModel(clazz(config), self.lock)
 
   def stop(self):
     pass
@@ -570,6 +907,275 @@ class _ServiceBackendEmbedded(object):
     """
     return {}
 
+  def save_bytes(self):
+    """
+    Returns the model file content as bytes.
+    """
+    return self.model.save_bytes()
+
+  def load_bytes(self, data):
+    """
+    Loads the model from the model file content.
+    """
+    self.model.load_bytes(data)
+
+class _LockedModel(object):
+  """
+  Proxy of the embedded model that calls each method holding `lock`, so that
+  the model is never saved (e.g., by the checkpoint thread) while another
+  thread is updating it.
+  """
+
+  def __init__(self, model, lock):
+    self._model = model
+    self._lock = lock
+
+  def __getattr__(self, name):
+    attr = getattr(self._model, name)
+    if not callable(attr):
+      return attr
+    def _locked(*args, **kwargs):
+      with self._lock:
+        return attr(*args, **kwargs)
+    return _locked
+
+class _ResultCache(object):
+  """
+  LRU cache of query results with optional expiration.
+  """
+
+  def __init__(self, size, ttl=None):
+    if size < 1:
+      raise RuntimeError('cache size must be a positive integer: {0}'.format(size))
+    self.size = size
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self.invalidations = 0
+    self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, func):
+    with self._lock:
+      entry = self._entries.pop(key, None)
+      if entry is not None and (self.ttl is None or time.time() < entry[0]):
+        self._entries[key] = entry
+        self.hits += 1
+        return copy.copy(entry[1])
+      self.misses += 1
+      generation = self.invalidations
+
+    value = func()
+    with self._lock:
+      # Do not cache the result if the model was updated during the query.
+      if generation == self.invalidations:
+        expire = None if self.ttl is None else time.time() + self.ttl
+        self._entries[key] = (expire, value)
+        while self.size < len(self._entries):
+          self._entries.popitem(last=False)
+    return copy.copy(value)
+
+  def invalidate(self):
+    with self._lock:
+      self._entries.clear()
+      self.invalidations += 1
+
+  def stats(self):
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'invalidations': self.invalidations,
+        'size': len(self._entries),
+      }
+
+class _Checkpointer(threading.Thread):
+  """
+  Background thread that periodically writes the snapshot of the service.
+  """
+
+  def __init__(self, service, target, interval):
+    super(_Checkpointer, self).__init__()
+    self.daemon = True
+    self.target = target
+    self.interval = interval
+    self.count = 0
+    self.error = None
+    self._backend = service._backend
+    self._stopped = threading.Event()
+
+  def run(self):
+    while not self._stopped.wait(self.interval):
+      self.checkpoint()
+
+  def checkpoint(self):
+    try:
+      data = self._backend.save_bytes()
+      if callable(self.target):
+        self.target(data)
+      else:
+        BaseService._write_model_file(data, self.target)
+      self.count += 1
+      _logger.debug('checkpoint written (%d bytes)', len(data))
+    except Exception as e:
+      self.error = e
+      _logger.warning('failed to write checkpoint: %s', e)
+
+  def stop(self, final=False):
+    self._stopped.set()
+    if self is not threading.current_thread():
+      self.join()
+    if final:
+      self.checkpoint()
+
+def _train_parallel_task(args):
+  """
+  Trains an embedded model in the worker process of
+  ``BaseService.train_parallel`` and returns the model as bytes.
+  """
+  (service_class, config, model_bytes, dataset) = args
+  service = service_class.run(config, embedded=True)
+  if model_bytes is not None:
+    service._backend.load_bytes(model_bytes)
+  for _ in service.train(dataset):
+    pass
+  return service._backend.save_bytes()
+
+class ServicePool(object):
+  """
+  ServicePool keeps idle server processes started by ``BaseService.run``
+  so that they can be reused instead of launching a new process every time.
+
+  The pool is disabled by default.  Once enabled, ``BaseService.stop``
+  clears the model and returns the server to the pool, and the subsequent
+  ``BaseService.run`` for the same service hands it out.  If the config
+  differs, the server is restarted with the new config.
+  """
+
+  _lock = threading.Lock()
+  _size = 0
+  _idle = {}
+
+  @classmethod
+  def enable(cls, size=4):
+    """
+    Enables the pool.  At most `size` idle servers are kept per service.
+    """
+    if size < 1:
+      raise RuntimeError('pool size must be a positive integer: {0}'.format(size))
+    with cls._lock:
+      cls._size = size
+      for backends in cls._idle.values():
+        while size < len(backends):
+          cls._stop(backends.pop(0))
+
+  @classmethod
+  def disable(cls):
+    """
+    Disables the pool and stops all idle servers.
+    """
+    with cls._lock:
+      cls._size = 0
+      for backends in cls._idle.values():
+        for backend in backends:
+          cls._stop(backend)
+      cls._idle = {}
+
+  @classmethod
+  def is_enabled(cls):
+    return 0 < cls._size
+
+  @classmethod
+  def warmup(cls, service, config, count=1):
+    """
+    Starts servers for the `service` class in advance so that subsequent
+    ``run`` calls with `config` can be served immediately.  The pool must
+    be enabled before warming up.
+    """
+    if not cls.is_enabled():
+      raise RuntimeError('pool is not enabled')
+    name = service.name()
+    for i in range(count):
+      with cls._lock:
+        if cls._size <= len(cls._idle.get(name, [])):
+          break
+      backend = _ServiceBackend(name, config)
+      if not cls.release(backend, clear=False):
+        cls._stop(backend)
+        break
+
+  @classmethod
+  def idle_count(cls, name=None):
+    """
+    Returns the number of idle servers in the pool.  If `name` is given,
+    only servers of that service are counted.
+    """
+    with cls._lock:
+      if name is not None:
+        return len(cls._idle.get(name, []))
+      return sum([len(backends) for backends in cls._idle.values()])
+
+  @classmethod
+  def acquire(cls, name, config):
+    """
+    Takes an idle server of the service `name` from the pool, or returns
+    None if no server is available.  A server running with the identical
+    config is preferred; otherwise the server is restarted with `config`.
+    """
+    key = _ServiceBackend.get_config_key(config)
+    with cls._lock:
+      backends = cls._idle.get(name)
+      if not backends:
+        return None
+      for (i, backend) in enumerate(backends):
+        if backend.config_key == key:
+          break
+      else:
+        i = 0
+      backend = backends.pop(i)
+
+    if backend.config_key != key:
+      _logger.debug('restarting pooled %s server with new config', name)
+      backend.restart(config)
+    else:
+      backend.config = config
+    _logger.debug('reusing pooled %s server on port %d', name, backend.port)
+    return backend
+
+  @classmethod
+  def release(cls, backend, clear=True):
+    """
+    Returns the server to the pool.  Returns False if the pool is disabled
+    or full, or the server is unusable; the caller is responsible for
+    stopping the server in that case.
+    """
+    with cls._lock:
+      if cls._size <= len(cls._idle.get(backend.name, [])):
+        return False
+    if not backend.is_running():
+      return False
+    if clear:
+      try:
+        if not backend.clear():
+          return False
+      except Exception as e:
+        _logger.debug('failed to clear pooled server: %s', e)
+        return False
+    with cls._lock:
+      backends = cls._idle.setdefault(backend.name, [])
+      if cls._size <= len(backends):
+        return False
+      backends.append(backend)
+    _logger.debug('%s server on port %d returned to pool', backend.name, backend.port)
+    return True
+
+  @classmethod
+  def _stop(cls, backend):
+    try:
+      backend.stop()
+    except Exception as e:
+      _logger.debug('failed to stop pooled server: %s', e)
+
 class BaseConfig(dict):
   """
   Config is a convenient class to build new config.
@@ -728,6 +1334,22 @@ class GenericConfig(BaseConfig):
     }
 
 class Utils(object):
+  @staticmethod
+  def chunk(iterable, size):
+    """
+    Yields lists of at most `size` items from `iterable`.
+    """
+    if size < 1:
+      raise RuntimeError('chunk size must be a positive integer: {0}'.format(size))
+    buf = []
+    for x in iterable:
+      buf.append(x)
+      if size <= len(buf):
+        yield buf
+        buf = []
+    if 0 < len(buf):
+      yield buf
+
   @staticmethod
   def softmax(x):
     max_x = max(x)
@@ -3,6 +3,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import json
+import math
+import time
 import uuid
 
 import jubatus
@@ -152,6 +154,50 @@ class Burst(BaseService):
       result = cli.add_documents([jubatus.burst.types.Document(pos, text)])
       yield (idx, result)
 
+  def add_documents_stream(self, document_dataset, window=None, batch_size=1000,
+                           poll_interval=None, on_bursted=None):
+    """
+    Register the documents for burst detection in batches, and yields
+    ``(list_of_idx, result)`` for each batch.
+
+    Documents are buffered and sent by a single RPC call when the position
+    crosses the boundary of ``window`` (typically the ``batch_interval`` of
+    the config) or when ``batch_size`` documents are buffered.  Batches are
+    taken from the dataset only as RPC calls complete, so reading a stream
+    is throttled when the server is slow.  Batches are sent one at a time
+    in the order of the dataset, as the server ignores documents older
+    than the current window.
+
+    If ``on_bursted`` is specified, it is called with the result of
+    ``get_all_bursted_results`` every ``poll_interval`` seconds (checked
+    after each batch; every batch if not specified) and after the last batch.
+    """
+    def _batches():
+      (batch, current) = ([], None)
+      for (idx, (pos, text)) in document_dataset:
+        if pos is None:
+          raise RuntimeError('Document dataset without position ' +
+                             'column cannot be used.')
+        boundary = None if window is None else math.floor(pos / window)
+        if 0 < len(batch) and (boundary != current or batch_size <= len(batch)):
+          yield batch
+          batch = []
+        current = boundary
+        batch.append((idx, jubatus.burst.types.Document(pos, text)))
+      if 0 < len(batch):
+        yield batch
+
+    cli = self._client()
+    last_poll = time.time()
+    for batch in _batches():
+      result = cli.add_documents([doc for (_, doc) in batch])
+      yield ([idx for (idx, _) in batch], result)
+      if on_bursted is not None and (poll_interval is None or poll_interval <= time.time() - last_poll):
+        on_bursted(self.get_all_bursted_results())
+        last_poll = time.time()
+    if on_bursted is not None and poll_interval is not None:
+      on_bursted(self.get_all_bursted_results())
+
   def get_result(self, keyword):
     """
     Returns the burst detection result of the current window
@@ -144,28 +144,31 @@ class Classifier(BaseService):
       assert result == 1
       yield (idx, label)
 
-  def classify(self, dataset, softmax=False):
+  def classify(self, dataset, softmax=False, batch_size=1):
     """
     Classify the given dataset using this classifier.
     When ``softmax`` is set to True, softmax is applied to the resulting scores.
+    When ``batch_size`` is greater than 1, records are classified in batches
+    of ``batch_size`` records per RPC call.
     """
 
     cli = self._client()
-    for (idx, (label, d)) in dataset:
-      # Do classification for the record.
-      result = cli.classify([d])
-      assert len(result) == 1
-
-      # Create the list of (label, score) desc sorted by score.
-      label_score_sorted = [(ent.label, ent.score) for ent in sorted(result[0], key=lambda x: x.score, reverse=True)]
-
-      if softmax:
-        labels = [x[0] for x in label_score_sorted]
-        scores = [x[1] for x in label_score_sorted]
-        label_score_sorted = list(zip(labels, Utils.softmax(scores)))
-
-      # Note: label may become None.
-      yield (idx, label, label_score_sorted)
+    for batch in Utils.chunk(dataset, batch_size):
+      # Do classification for the records.
+      results = cli.classify([d for (_, (_, d)) in batch])
+      assert len(results) == len(batch)
+
+      for ((idx, (label, _)), result) in zip(batch, results):
+        # Create the list of (label, score) desc sorted by score.
+        label_score_sorted = [(ent.label, ent.score) for ent in sorted(result, key=lambda x: x.score, reverse=True)]
+
+        if softmax:
+          labels = [x[0] for x in label_score_sorted]
+          scores = [x[1] for x in label_score_sorted]
+          label_score_sorted = list(zip(labels, Utils.softmax(scores)))
+
+        # Note: label may become None.
+        yield (idx, label, label_score_sorted)
 
   @classmethod
   def train_and_classify(cls, config, train_dataset, test_dataset, metric):
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides utilities to evaluate services.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import time
+import multiprocessing
+import multiprocessing.pool
+
+from .classifier import Classifier
+from .regression import Regression
+from .compat import *
+from .logger import get_logger
+
+_logger = get_logger()
+
+# Dataset shared by the worker processes; set by ``_init_worker``.
+_worker_dataset = None
+
+def cross_validate(service_cls, config, dataset, folds, metric, n_jobs=1, embedded=False):
+  """
+  Performs cross validation of ``service_cls`` (Classifier, Regression or
+  their subclasses) trained with ``config`` and returns the list of dicts
+  holding the result of each fold, with keys ``fold``, ``score``,
+  ``train_size``, ``test_size``, ``train_time`` and ``test_time``.
+
+  ``dataset`` must be a static Dataset.  ``folds`` is the number of folds
+  (K-fold without shuffling; shuffle the dataset beforehand if needed), or
+  an iterable of ``(train_indices, test_indices)`` tuples (e.g., from
+  ``split`` method of scikit-learn splitters).  ``metric`` is a callable
+  that takes ``(y_true, y_pred)`` and returns the score.
+
+  Folds are run concurrently in ``n_jobs`` workers, each running its own
+  service.  For servers, workers are threads (enable ``ServicePool`` to
+  reuse server processes).  For embedded services, workers are processes
+  that share the dataset given at startup; ``metric`` must be picklable.
+  """
+  if not dataset.is_static():
+    raise RuntimeError('non-static datasets cannot be cross-validated')
+  if n_jobs is None:
+    n_jobs = multiprocessing.cpu_count()
+  if n_jobs < 1:
+    raise RuntimeError('n_jobs must be a positive integer: {0}'.format(n_jobs))
+
+  if isinstance(folds, int):
+    folds = _kfold(len(dataset), folds)
+  tasks = [(service_cls, config, embedded, i, list(train_idx), list(test_idx), metric) for (i, (train_idx, test_idx)) in enumerate(folds)]
+
+  n_jobs = min(n_jobs, len(tasks))
+  if n_jobs <= 1:
+    _init_worker(dataset)
+    try:
+      return [_run_fold(task) for task in tasks]
+    finally:
+      _init_worker(None)
+
+  if embedded:
+    # Embedded models run in-process; use processes to utilize multiple cores.
+    # The dataset is inherited by (or pickled once for) each worker process.
+    pool = multiprocessing.Pool(n_jobs, initializer=_init_worker, initargs=(dataset,))
+    try:
+      return pool.map(_run_fold, tasks)
+    finally:
+      pool.terminate()
+      pool.join()
+
+  # Computation is done in server processes; threads are sufficient.
+  pool = multiprocessing.pool.ThreadPool(n_jobs)
+  try:
+    return pool.map(_run_fold, [task + (dataset,) for task in tasks])
+  finally:
+    pool.terminate()
+    pool.join()
+
+def _kfold(n, k):
+  """
+  Returns the list of (train_indices, test_indices) for K-fold.
+  """
+  if not 2 <= k <= n:
+    raise RuntimeError('number of folds must be in range [2, {0}]: {1}'.format(n, k))
+  folds = []
+  for i in range(k):
+    (start, end) = (n * i // k, n * (i + 1) // k)
+    folds.append((list(range(0, start)) + list(range(end, n)), list(range(start, end))))
+  return folds
+
+def _init_worker(dataset):
+  global _worker_dataset
+  _worker_dataset = dataset
+
+def _run_fold(task):
+  """
+  Trains and tests the service for one fold.
+  """
+  (service_cls, config, embedded, fold, train_idx, test_idx, metric) = task[:7]
+  dataset = task[7] if 7 < len(task) else _worker_dataset
+  (train_ds, test_ds) = (dataset[train_idx], dataset[test_idx])
+
+  service = service_cls.run(config, embedded=embedded)
+  try:
+    start = time.time()
+    for _ in service.train(train_ds):
+      pass
+    train_time = time.time() - start
+
+    start = time.time()
+    (y_true, y_pred) = _predict(service, test_ds)
+    test_time = time.time() - start
+  finally:
+    service.stop()
+
+  score = metric(y_true, y_pred)
+  _logger.info('fold %d: score %s (train %.3f sec, test %.3f sec)', fold, score, train_time, test_time)
+  return {
+    'fold': fold,
+    'score': score,
+    'train_size': len(train_ds),
+    'test_size': len(test_ds),
+    'train_time': train_time,
+    'test_time': test_time,
+  }
+
+def _predict(service, dataset):
+  """
+  Returns (y_true, y_pred) tuple for the dataset.
+  """
+  (y_true, y_pred) = ([], [])
+  if isinstance(service, Classifier):
+    for (idx, label, result) in service.classify(dataset):
+      if 0 < len(result):
+        y_true.append(label)
+        y_pred.append(result[0][0])
+  elif isinstance(service, Regression):
+    for (idx, target, result) in service.estimate(dataset):
+      y_true.append(target)
+      y_pred.append(result)
+  else:
+    raise RuntimeError('cross validation is not supported for {0}'.format(service.name()))
+  return (y_true, y_pred)
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import jubatus
+import jubatus.embedded
+from jubatus.graph.types import Edge, PresetQuery, ShortestPathQuery
+
+from .base import BaseSchema, BaseDataset, BaseService, GenericConfig, Utils
+from .compat import *
+from .logger import get_logger
+
+_logger = get_logger()
+
+class _PropertySchema(BaseSchema):
+  """
+  Base Schema for Graph service.  Values of PROPERTY keys are stored as
+  properties (string to string map) of nodes or edges.
+  """
+
+  PROPERTY = 'p'
+
+  def _transform_as_property(self, row, skip_keys=[]):
+    prop = {}
+    for (key, value) in row.items():
+      if key in skip_keys:
+        continue
+
+      key_type = self._key2type.get(key, self._fallback)
+      key_name = self._key2name.get(key, key)
+      if key_type is None:
+        raise RuntimeError('schema does not match: unknown key {0}'.format(key))
+      elif key_type == self.PROPERTY:
+        if value is not None:
+          if isinstance(value, bytes):
+            value = value.decode()
+          prop[key_name] = unicode_t(value)
+      elif key_type != self.IGNORE:
+        raise RuntimeError('invalid type {0} for key {1}'.format(key_type, key))
+    return prop
+
+class NodeSchema(_PropertySchema):
+  """
+  Node schema for Graph service.
+  """
+
+  ID = 'i'
+
+  def __init__(self, mapping, fallback=None):
+    super(NodeSchema, self).__init__(mapping, fallback)
+    self._id_key = self._get_unique_mapping(mapping, fallback, self.ID, 'ID')
+
+  def transform(self, row):
+    node_id = row.get(self._id_key, None)
+    if node_id is None:
+      raise RuntimeError('Row without ID column cannot be used.')
+    return (unicode_t(node_id), self._transform_as_property(row, [self._id_key]))
+
+class EdgeSchema(_PropertySchema):
+  """
+  Edge schema for Graph service.
+  """
+
+  SOURCE = 's'
+  TARGET = 't'
+
+  def __init__(self, mapping, fallback=None):
+    super(EdgeSchema, self).__init__(mapping, fallback)
+    self._source_key = self._get_unique_mapping(mapping, fallback, self.SOURCE, 'SOURCE')
+    self._target_key = self._get_unique_mapping(mapping, fallback, self.TARGET, 'TARGET')
+
+  def transform(self, row):
+    source = row.get(self._source_key, None)
+    target = row.get(self._target_key, None)
+    if source is None or target is None:
+      raise RuntimeError('Row without source or target column cannot be used.')
+    prop = self._transform_as_property(row, [self._source_key, self._target_key])
+    return (unicode_t(source), unicode_t(target), prop)
+
+class NodeDataset(BaseDataset):
+  """
+  Node dataset for Graph service.
+  """
+
+  @classmethod
+  def _predict(cls, row):
+    raise RuntimeError('schema must be specified for NodeDataset')
+
+class EdgeDataset(BaseDataset):
+  """
+  Edge dataset for Graph service.
+  """
+
+  @classmethod
+  def _predict(cls, row):
+    raise RuntimeError('schema must be specified for EdgeDataset')
+
+class Graph(BaseService):
+  """
+  Graph service.
+
+  Nodes are identified by IDs given in datasets, which are mapped to node
+  IDs assigned by the server.  The mapping is held in this service object,
+  so nodes must be added and queried through the same service object.
+  """
+
+  # Maximum number of hops used when `max_hop` is not specified.
+  MAX_HOP = 2 ** 32 - 1
+
+  def __init__(self, host='127.0.0.1', port=9199, cluster='', timeout=0):
+    super(Graph, self).__init__(host, port, cluster, timeout)
+    self._node_ids = {}
+    self._node_names = {}
+
+  @classmethod
+  def name(cls):
+    return 'graph'
+
+  @classmethod
+  def _client_class(cls):
+    return jubatus.graph.client.Graph
+
+  @classmethod
+  def _embedded_class(cls):
+    return jubatus.embedded.Graph
+
+  def add_nodes(self, node_dataset, chunk_size=1000, pipeline=4):
+    """
+    Creates nodes (or updates properties of existing nodes) using the given
+    dataset, and yields ``(idx, node, node_id)`` for each record, where
+    ``node_id`` is the ID assigned by the server.  Requests are sent in
+    chunks of ``chunk_size`` records, keeping up to ``pipeline`` chunks in
+    flight over separate connections.
+    """
+    def _chunks():
+      pending = set()
+      for chunk in Utils.chunk(node_dataset, chunk_size):
+        for (_, (node, _)) in chunk:
+          if node in pending:
+            raise RuntimeError('duplicate node in dataset: {0}'.format(node))
+          pending.add(node)
+        yield [(idx, node, self._node_ids.get(node), prop) for (idx, (node, prop)) in chunk]
+
+    def _add_nodes(cli, chunk):
+      node_ids = []
+      for (_, _, node_id, prop) in chunk:
+        if node_id is None:
+          node_id = cli.create_node()
+        if 0 < len(prop):
+          cli.update_node(node_id, prop)
+        node_ids.append(node_id)
+      return node_ids
+
+    count = 0
+    for (chunk, node_ids) in self._map_chunks(_add_nodes, _chunks(), pipeline):
+      for ((idx, node, _, _), node_id) in zip(chunk, node_ids):
+        self._register_node(node, node_id)
+        yield (idx, node, node_id)
+      count += len(chunk)
+      _logger.info('graph: %d nodes added', count)
+
+  def add_edges(self, edge_dataset, chunk_size=1000, pipeline=4, create_nodes=True):
+    """
+    Creates edges using the given dataset, and yields ``(idx, edge_id)`` for
+    each record.  If ``create_nodes`` is True, nodes that have not been
+    added are created (sequentially; use ``add_nodes`` beforehand for large
+    graphs).  See ``add_nodes`` for ``chunk_size`` and ``pipeline``.
+    """
+    cli = self._client()
+
+    def _resolve(node):
+      node_id = self._node_ids.get(node)
+      if node_id is None:
+        if not create_nodes:
+          raise RuntimeError('unknown node: {0}'.format(node))
+        node_id = cli.create_node()
+        self._register_node(node, node_id)
+      return node_id
+
+    def _chunks():
+      for chunk in Utils.chunk(edge_dataset, chunk_size):
+        yield [(idx, _resolve(source), _resolve(target), prop) for (idx, (source, target, prop)) in chunk]
+
+    def _add_edges(cli, chunk):
+      return [cli.create_edge(source, Edge(prop, source, target)) for (_, source, target, prop) in chunk]
+
+    count = 0
+    for (chunk, edge_ids) in self._map_chunks(_add_edges, _chunks(), pipeline):
+      for ((idx, _, _, _), edge_id) in zip(chunk, edge_ids):
+        yield (idx, edge_id)
+      count += len(chunk)
+      _logger.info('graph: %d edges added', count)
+
+  def get_node_id(self, node):
+    """
+    Returns the node ID assigned by the server for the given node.
+    """
+    node_id = self._node_ids.get(unicode_t(node))
+    if node_id is None:
+      raise RuntimeError('unknown node: {0}'.format(node))
+    return node_id
+
+  def add_centrality_query(self, query=None):
+    """
+    Registers the preset query for centrality.  ``query`` defaults to the
+    empty query.
+    """
+    return self._client().add_centrality_query(query or PresetQuery([], []))
+
+  def add_shortest_path_query(self, query=None):
+    """
+    Registers the preset query for shortest path.  ``query`` defaults to the
+    empty query.
+    """
+    return self._client().add_shortest_path_query(query or PresetQuery([], []))
+
+  def update_index(self):
+    """
+    Updates the index.  Centrality and shortest path queries reflect the
+    graph at the last index update.
+    """
+    return self._client().update_index()
+
+  def get_centralities(self, nodes, centrality_type=0, query=None, chunk_size=100, pipeline=4):
+    """
+    Returns the list of centrality (``centrality_type`` 0 is PageRank) of
+    each of ``nodes`` using the preset ``query`` (defaults to the empty
+    query).  See ``add_nodes`` for ``chunk_size`` and ``pipeline``.
+    """
+    query = query or PresetQuery([], [])
+
+    def _centrality(cli, chunk):
+      return [cli.get_centrality(node_id, centrality_type, query) for node_id in chunk]
+
+    node_ids = [self.get_node_id(node) for node in nodes]
+    results = []
+    for (_, result) in self._map_chunks(_centrality, Utils.chunk(node_ids, chunk_size), pipeline):
+      results.extend(result)
+    return results
+
+  def get_shortest_paths(self, pairs, max_hop=None, query=None, chunk_size=100, pipeline=4):
+    """
+    Returns the list of shortest paths (list of nodes) for each of
+    ``(source, target)`` pairs using the preset ``query`` (defaults to the
+    empty query).  See ``add_nodes`` for ``chunk_size`` and ``pipeline``.
+    """
+    query = query or PresetQuery([], [])
+    if max_hop is None:
+      max_hop = self.MAX_HOP
+
+    def _shortest_path(cli, chunk):
+      return [cli.get_shortest_path(ShortestPathQuery(s, t, max_hop, query)) for (s, t) in chunk]
+
+    requests = [(self.get_node_id(s), self.get_node_id(t)) for (s, t) in pairs]
+    paths = []
+    for (_, result) in self._map_chunks(_shortest_path, Utils.chunk(requests, chunk_size), pipeline):
+      paths.extend([[self._node_names.get(node_id, node_id) for node_id in path] for path in result])
+    return paths
+
+  def clear(self):
+    super(Graph, self).clear()
+    self._node_ids = {}
+    self._node_names = {}
+
+  def _register_node(self, node, node_id):
+    self._node_ids[node] = node_id
+    self._node_names[node_id] = node
+
+class Config(GenericConfig):
+  """
+  Configuration to run Graph service.
+  """
+
+  @classmethod
+  def methods(cls):
+    return ['graph_wo_index']
+
+  @classmethod
+  def _default_method(cls):
+    return 'graph_wo_index'
+
+  @classmethod
+  def _default_parameter(cls, method):
+    if method not in cls.methods():
+      raise RuntimeError('unknown method: {0}'.format(method))
+    return {
+      'damping_factor': 0.9,
+      'landmark_num': 5,
+    }
+
+  @classmethod
+  def _default_converter(cls):
+    return None
@@ -8,13 +8,28 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import sys
 import copy
+import itertools
 import struct
 from binascii import crc32
-from io import BytesIO
+from io import BytesIO, BufferedReader
 import base64
 import subprocess
 import tempfile
 import optparse
+import gzip
+import os
+import glob
+import multiprocessing
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+try:
+  import lz4.frame
+except ImportError:
+  lz4 = None
 
 import msgpack
 import json
@@ -51,6 +66,85 @@ class JubaDump(object):
       f.flush()
       return cls.dump_file(f.name)
 
+class _ModelCompression(object):
+  """
+  ``_ModelCompression`` provides streaming codecs for compressed model
+  containers.  A compressed container is just a standard binary model file
+  compressed as a whole, so decompressing it gives a file that can be loaded
+  by Jubatus server as is.
+  """
+
+  # List of (codec_name, signature) sorted by preference.
+  _SIGNATURES = [
+    ('gzip', b'\x1f\x8b'),
+    ('zstd', b'\x28\xb5\x2f\xfd'),
+    ('lz4',  b'\x04\x22\x4d\x18'),
+  ]
+
+  @classmethod
+  def codecs(cls):
+    """
+    Returns the list of codecs available in this environment.
+    ``gzip`` is always available; ``zstd`` and ``lz4`` require ``zstandard``
+    and ``lz4`` modules respectively.
+    """
+    available = {
+      'gzip': True,
+      'zstd': zstandard is not None,
+      'lz4':  lz4 is not None,
+    }
+    return [codec for (codec, _) in cls._SIGNATURES if available[codec]]
+
+  @classmethod
+  def detect(cls, f):
+    """
+    Peeks the binary stream ``f`` and returns the codec name used to compress
+    it, or ``None`` if the stream is not compressed.  Non-seekable streams are
+    always treated as uncompressed.
+    """
+    if hasattr(f, 'seekable') and not f.seekable():
+      return None
+    sig = f.read(4)
+    f.seek(-len(sig), 1)
+    for (codec, magic) in cls._SIGNATURES:
+      if sig.startswith(magic):
+        return codec
+    return None
+
+  @classmethod
+  def reader(cls, f, codec):
+    """
+    Returns a binary stream that decompresses ``f`` on the fly.
+    """
+    cls._check_available(codec)
+    if codec == 'gzip':
+      return gzip.GzipFile(fileobj=f, mode='rb')
+    elif codec == 'zstd':
+      # Decompression reader may return partial reads; buffer it so that
+      # ``read(n)`` always returns ``n`` bytes unless EOF is reached.
+      return BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, closefd=False))
+    elif codec == 'lz4':
+      return lz4.frame.LZ4FrameFile(f, mode='rb')
+
+  @classmethod
+  def writer(cls, f, codec):
+    """
+    Returns a binary stream that compresses data written into ``f``.
+    The stream must be closed to flush the trailer; ``f`` is left open.
+    """
+    cls._check_available(codec)
+    if codec == 'gzip':
+      return gzip.GzipFile(fileobj=f, mode='wb')
+    elif codec == 'zstd':
+      return zstandard.ZstdCompressor().stream_writer(f, closefd=False)
+    elif codec == 'lz4':
+      return lz4.frame.LZ4FrameFile(f, mode='wb')
+
+  @classmethod
+  def _check_available(cls, codec):
+    if codec not in cls.codecs():
+      raise InvalidModelFormatError('compression codec {0} is not available'.format(codec))
+
 class JubaModel(object):
   """
   ``JubaModel`` provides features to perform low-level manipulation of Jubatus model data structure.
@@ -67,7 +161,16 @@ class JubaModel(object):
     """
     Loads Jubatus binary model file from binary stream ``f``.
     When ``validate`` is ``True``, the model file format is strictly validated.
+    Compressed containers are transparently decompressed when ``f`` is seekable.
     """
+    codec = _ModelCompression.detect(f)
+    if codec is not None:
+      with _ModelCompression.reader(f, codec) as r:
+        return cls._load_binary(r, validate)
+    return cls._load_binary(f, validate)
+
+  @classmethod
+  def _load_binary(cls, f, validate):
     m = cls()
     checksum = 0
 
@@ -108,10 +211,20 @@ class JubaModel(object):
           'CRC32 mismatch: expected {0}, got {1}'.format(checksum, h.crc32))
     return m
 
-  def dump_binary(self, f):
+  def dump_binary(self, f, compression=None):
     """
     Dumps the model as Jubatus binary model file to binary stream ``f``.
+    When ``compression`` (``gzip``, ``zstd`` or ``lz4``) is specified, the
+    model is written as a compressed container instead.
     """
+    if compression is not None:
+      w = _ModelCompression.writer(f, compression)
+      try:
+        self.dump_binary(w)
+      finally:
+        w.close()
+      return
+
     # Dump header
     self.header.dump(f)
 
@@ -129,9 +242,35 @@ class JubaModel(object):
   def load_json(cls, f):
     """
     Loads model file saved as JSON file from text stream ``f``.
+    Files in JSON Lines format (see ``dump_json``) are read line by line, so
+    that ``user_raw`` records are decoded chunk by chunk.
     """
     m = cls()
-    record = json.load(f)
+    record = {}
+    user_raw = None
+    has_user = False
+
+    first_line = f.readline()
+    try:
+      lines = itertools.chain([json.loads(first_line)], cls._iter_json_lines(f))
+    except ValueError:
+      # Not in JSON Lines format; load the whole document at once.
+      lines = [json.loads(first_line + f.read())]
+
+    for ent in lines:
+      if ent is None:
+        # ``user`` record following ``user_raw`` records; skipped.
+        has_user = True
+        continue
+      if 'user_raw' in ent:
+        if user_raw is None:
+          user_raw = BytesIO()
+        user_raw.write(base64.b64decode(ent.pop('user_raw')))
+      if 'user' in ent:
+        has_user = True
+        if user_raw is not None:
+          del ent['user']
+      record.update(ent)
 
     # Load header
     if 'header' not in record:
@@ -144,10 +283,10 @@ class JubaModel(object):
     m.system.set(record['system'])
 
     # Load user_data
-    if 'user_raw' in record:
-      if 'user' in record:
+    if user_raw is not None:
+      if has_user:
         printe('Notice: using "user_raw" record from JSON; "user" record is ignored')
-      raw = base64.b64decode(record['user_raw'])
+      raw = user_raw.getvalue()
       try:
         m.user = cls.UserContainer.loads(raw)
       except UnicodeDecodeError:
@@ -162,24 +301,75 @@ class JubaModel(object):
 
     return m
 
-  def dump_json(self, f, without_raw=False):
+  @classmethod
+  def _iter_json_lines(cls, f):
+    """
+    Yields each record of the JSON Lines text stream ``f``.
+    ``user`` records following ``user_raw`` records are yielded as ``None``
+    without being parsed, as they are ignored anyway.
+    """
+    seen_raw = False
+    for line in f:
+      if not line.strip():
+        continue
+      if seen_raw and line.startswith('{"user":'):
+        yield None
+        continue
+      ent = json.loads(line)
+      seen_raw = seen_raw or 'user_raw' in ent
+      yield ent
+
+  def dump_json(self, f, without_raw=False, lines=False):
     """
     Dumps the model as JSON file to a text stream ``f``.
+    Each section is written incrementally and ``user_raw`` is base64-encoded
+    chunk by chunk, so the whole JSON document is never built on memory.
+    When ``lines`` is ``True``, the model is written in JSON Lines format
+    (one record per section, followed by ``user_raw`` chunk records), which
+    ``load_json`` can read back without loading the whole file.
     """
-    record = {}
-
-    # Dump header
-    record['header'] = dict(self.header.get())
-
-    # Dump system_data
-    record['system'] = dict(self.system.get())
-
-    # Dump user_data
-    record['user'] = dict(self.user.get())
+    sections = [
+      ('header', dict(self.header.get())),
+      ('system', dict(self.system.get())),
+      ('user',   dict(self.user.get())),
+    ]
+
+    if lines:
+      # ``user_raw`` records come before ``user`` so that the reader can skip
+      # parsing the (usually large) ``user`` record.
+      records = sections[:2]
+      if not without_raw:
+        records = itertools.chain(records, (('user_raw', chunk) for chunk in self._iter_user_raw_base64()))
+      encoder = json.JSONEncoder()
+      for (key, value) in itertools.chain(records, sections[2:]):
+        f.write('{{"{0}": '.format(key))
+        for chunk in encoder.iterencode(value):
+          f.write(chunk)
+        f.write('}\n')
+      return
+
+    encoder = json.JSONEncoder(indent=2)
+    f.write('{')
+    for (i, (key, value)) in enumerate(sections):
+      f.write('{0}\n  "{1}": '.format(',' if i else '', key))
+      for chunk in encoder.iterencode(value):
+        f.write(chunk.replace('\n', '\n  '))
     if not without_raw:
-      record['user_raw'] = base64.b64encode(self._user_raw).decode()
+      f.write(',\n  "user_raw": "')
+      for chunk in self._iter_user_raw_base64():
+        f.write(chunk)
+      f.write('"')
+    f.write('\n}')
 
-    json.dump(record, f, indent=2)
+  def _iter_user_raw_base64(self, chunk_size=3 * 65536):
+    """
+    Yields base64-encoded chunks of ``user_raw``.
+    ``chunk_size`` must be a multiple of 3 so that each chunk can be decoded
+    independently.
+    """
+    raw = self._user_raw
+    for offset in range(0, len(raw), chunk_size):
+      yield base64.b64encode(raw[offset:offset + chunk_size]).decode()
 
   def dump_text(self, f):
     """
@@ -203,8 +393,15 @@ class JubaModel(object):
     """
     Loads the model file named ``filename``.
     Returns ``binary`` or ``json``.
+    Compressed containers are reported as ``binary``.
     """
     with open(filename, 'rb') as f:
+      codec = _ModelCompression.detect(f)
+      if codec is not None:
+        with _ModelCompression.reader(f, codec) as r:
+          if r.read(len(cls.Header._MAGIC)) == cls.Header._MAGIC:
+            return 'binary'
+        raise InvalidModelFormatError('compressed model does not contain binary model')
       sig = f.read(1)
       f.seek(-1, 1)
       if sig[0] == cls.Header._MAGIC[0]:
@@ -216,6 +413,11 @@ class JubaModel(object):
   def fix_header(self):
     """
     Repairs the header values.
+    The header is always repaired in the standard (uncompressed) format, which
+    is written by ``dump_binary`` and can be loaded by Jubatus server: data
+    sizes and CRC32 are recomputed from the system and user containers, e.g.,
+    of a model loaded from a compressed container.  If the raw user data is
+    not available, it is rebuilt from the user container.
     """
     # Update magic
     self.header.magic = self.header._MAGIC
@@ -225,6 +427,9 @@ class JubaModel(object):
     self.header.system_data_size = len(system_raw)
 
     # Update user_data_size
+    if self._user_raw is None:
+      printe('Warning: conversion from Python object to binary model format may generate corrupt model')
+      self._user_raw = self.user.dumps()
     user_raw = self._user_raw
     self.header.user_data_size = len(user_raw)
 
@@ -245,6 +450,18 @@ class JubaModel(object):
     """
     return self.user.user_data
 
+  @classmethod
+  def merge(cls, models, weights=None, base=None):
+    """
+    Merges linear Classifier / Regression ``models`` sharing the same config
+    into a new model by averaging weights (and covariances) with ``weights``.
+    If ``models`` are trained from the same model ``base``, specify it so
+    that statistics in ``base`` are counted only once.
+    """
+    if len(models) == 0:
+      raise UnsupportedMergeError('no model specified')
+    return LinearMerger(models[0]).merge(models, weights, base)
+
   def transform(self, service):
     t = self.system.type
     trans = None
@@ -544,11 +761,190 @@ class ClusteringTransformer(GenericTransformer):
   # Only supports conversion to weight service.
   pass
 
+class LinearMerger(GenericTransformer):
+  """
+  Merges linear Classifier / Regression models trained independently (e.g.,
+  on each shard of the dataset) into one model by weighted averaging, just
+  like MIX does for distributed servers.
+  """
+
+  # Methods whose storage holds diagonal covariances in ``v2``.  Features
+  # missing in some models are treated as the initial covariance (1.0).
+  _COVARIANCE_METHODS = ('CW', 'confidence_weighted', 'AROW', 'NHERD', 'normal_herd')
+
+  _LINEAR_METHODS = ('perceptron', 'PA', 'passive_aggressive',
+                     'PA1', 'passive_aggressive_1', 'PA2', 'passive_aggressive_2') + _COVARIANCE_METHODS
+
+  def merge(self, models, weights=None, base=None):
+    """
+    Merges ``models`` (including the model of this merger) into a new model.
+    ``weights`` is a list of weights of each model; models are equally
+    weighted by default.  ``base`` is the model all ``models`` are trained
+    from, if any; statistics are merged as ``base`` plus the sum of
+    increases of each model from ``base``.
+    """
+    service = self._m.system.type
+    self.check_mergeable(service, self._cfg)
+    for m in models + ([] if base is None else [base]):
+      if m.system.type != service or json.loads(m.system.config) != self._cfg:
+        raise UnsupportedMergeError('models of different service or config cannot be merged')
+
+    if weights is None:
+      weights = [1.0] * len(models)
+    if len(weights) != len(models):
+      raise UnsupportedMergeError('number of weights does not match number of models')
+    total = float(sum(weights))
+    if total <= 0:
+      raise UnsupportedMergeError('sum of weights must be positive')
+    weights = [w / total for w in weights]
+
+    # Unpack each model into Python objects.
+    (rms, wms) = ([], [])
+    for m in models:
+      (rm, wm) = self.__class__(m)._unpack_generic()
+      rms.append(msgpack.Unpacker(rm).unpack())
+      wms.append(msgpack.Unpacker(wm).unpack())
+    (base_rm, base_wm) = (None, None)
+    if base is not None:
+      (rm, wm) = self.__class__(base)._unpack_generic()
+      (base_rm, base_wm) = (msgpack.Unpacker(rm).unpack(), msgpack.Unpacker(wm).unpack())
+
+    if isinstance(rms[0][0], dict):
+      # regression_->pack(pk)
+      #  +- storage_->get_model()->pack(pk)
+      rm = self._merge_storage(rms, weights)
+    else:
+      # classifier_->pack(pk)
+      #  +- storage_->get_model()->pack(pk)
+      #  +- labels_.get_model()->pack(pk)
+      rm = [
+        self._merge_storage([x[0] for x in rms], weights),
+        self._merge_versioned([x[1] for x in rms], None if base_rm is None else base_rm[1]),
+      ]
+    wm = self._merge_versioned(wms, base_wm)
+
+    return self._get_converted_model(service, 1, [BytesIO(msgpack.packb(rm)), BytesIO(msgpack.packb(wm))], self._cfg)
+
+  @classmethod
+  def check_mergeable(cls, service, config):
+    """
+    Raises UnsupportedMergeError if models of the ``service`` trained with
+    ``config`` cannot be merged.
+    """
+    if service not in ('classifier', 'regression'):
+      raise UnsupportedMergeError('{0} models cannot be merged'.format(service))
+    if config.get('method') not in cls._LINEAR_METHODS:
+      raise UnsupportedMergeError('models using {0} method cannot be merged'.format(config.get('method')))
+
+  def _merge_storage(self, storages, weights):
+    """
+    Merges the storage data structure ``[tbl, class2id, tbl_diff, version]``,
+    where ``tbl`` and ``tbl_diff`` map each feature to
+    ``{class_id: [v1, v2, v3]}`` and ``class2id`` is a key manager
+    ``[key2id, id2key, next_id]``.  Values of each model are ``tbl + tbl_diff``
+    (weights trained since the last MIX are held in ``tbl_diff``).  Class IDs
+    are assigned by each model independently, so values are aggregated by
+    class names.  The merged values are stored in ``tbl`` with an empty
+    ``tbl_diff`` and a new version, as the result of MIX.
+    """
+    default = [0.0, 1.0 if self._is_method(*self._COVARIANCE_METHODS) else 0.0, 0.0]
+
+    # Assign new class IDs in order of appearance.
+    key2id = {}
+    for storage in storages:
+      for (key, _) in sorted(storage[1][0].items(), key=lambda x: x[1]):
+        key2id.setdefault(key, len(key2id))
+
+    # Accumulate weighted values and the total weight of models having them.
+    tbl = {}
+    present = {}
+    for (storage, w) in zip(storages, weights):
+      id2id = dict([(cid, key2id[key]) for (key, cid) in storage[1][0].items()])
+      for (feature, values) in self._storage_values(storage).items():
+        for (cid, val3) in values.items():
+          key = (feature, id2id[cid])
+          v = tbl.setdefault(feature, {}).setdefault(key[1], [0.0] * len(val3))
+          for i in range(len(val3)):
+            v[i] += w * val3[i]
+          present[key] = present.get(key, 0.0) + w
+
+    # Fill in the default value for models without the entry.
+    for ((feature, cid), w) in present.items():
+      v = tbl[feature][cid]
+      tbl[feature][cid] = [x + (1.0 - w) * d for (x, d) in zip(v, default)]
+
+    id2key = storages[0][1][1]
+    if isinstance(id2key, dict):
+      id2key = dict([(cid, key) for (key, cid) in key2id.items()])
+    else:
+      id2key = [key for (key, _) in sorted(key2id.items(), key=lambda x: x[1])]
+    class2id = [key2id, id2key] + [len(key2id)] * (len(storages[0][1]) - 2)
+
+    if len(storages[0]) < 4:
+      return [tbl, class2id] + storages[0][2:]
+    version = max([s[3][0] for s in storages]) + 1
+    return [tbl, class2id, {}, [version]] + storages[0][4:]
+
+  def _storage_values(self, storage):
+    """
+    Returns the effective values ``tbl + tbl_diff`` of the storage.
+    """
+    if len(storage) < 3:
+      return storage[0]
+    values = {}
+    for table in (storage[0], storage[2]):
+      for (feature, cids) in table.items():
+        for (cid, val3) in cids.items():
+          v = values.setdefault(feature, {}).get(cid)
+          values[feature][cid] = list(val3) if v is None else [x + y for (x, y) in zip(v, val3)]
+    return values
+
+  def _merge_versioned(self, objs, base=None):
+    """
+    Merges the data structure holding statistics (e.g., label counts,
+    document frequencies) by summing them up.  Versions (represented as
+    an 1-element array of integer) are merged by taking the maximum.
+    If ``base`` (the same data structure of the model all ``objs`` are
+    trained from) is given, statistics in ``base`` are counted only once.
+    """
+    if isinstance(objs[0], list) and len(objs[0]) == 1 and isinstance(objs[0][0], (int, long_t)):
+      # Version numbers.
+      return [max([x[0] for x in objs])]
+    return self._sum(objs, base)
+
+  def _sum(self, objs, base=None):
+    first = objs[0]
+    if isinstance(first, dict):
+      if not isinstance(base, dict):
+        base = {}
+      result = {}
+      for obj in objs:
+        for k in obj.keys():
+          if k not in result:
+            result[k] = self._sum([x[k] for x in objs if k in x], base.get(k))
+      return result
+    elif isinstance(first, list):
+      if not isinstance(base, list) or len(base) != len(first):
+        base = [None] * len(first)
+      return [self._merge_versioned(list(x), b) for (x, b) in zip(zip(*objs), base)]
+    elif isinstance(first, bool):
+      return first
+    elif isinstance(first, (int, long_t, float)):
+      if isinstance(base, bool) or not isinstance(base, (int, long_t, float)):
+        return sum(objs)
+      # base + sum of increases from base
+      return sum(objs) - (len(objs) - 1) * base
+    return first
+
 class UnsupportedTransformationError(Exception):
   def __init__(self, service):
     msg = 'Error: this model cannot be transformed as {0}'.format(service)
     super(UnsupportedTransformationError, self).__init__(msg)
 
+class UnsupportedMergeError(Exception):
+  def __init__(self, msg):
+    super(UnsupportedMergeError, self).__init__('Error: {0}'.format(msg))
+
 class InvalidModelFormatError(Exception):
   pass
 
@@ -578,30 +974,18 @@ class _JubaModelCommand(object):
   def run(cls, target, in_fmt, out_fmt, output=None,
           fix_header=False, output_config=None, transform=None,
           replace_config=None, replace_version=None,
-          no_validate=False):
-    # Predict model file format
-    if in_fmt == 'auto':
+          no_validate=False, compression='gzip',
+          merge=None, merge_weights=None):
+    # Load model file
+    m = cls._load(target, in_fmt, no_validate)
+
+    # Merge model files
+    if merge:
+      models = [m] + [cls._load(x, in_fmt, no_validate) for x in merge]
       try:
-        in_fmt = JubaModel.predict_format(target)
-      except InvalidModelFormatError as e:
-        raise JubaModelError('{0}: invalid model file format'.format(target), e)
+        m = JubaModel.merge(models, merge_weights)
       except Exception as e:
-        raise JubaModelError('{0}: failed to predict model format'.format(target), e)
-
-    # Load model file
-    try:
-      if in_fmt == 'binary':
-        with open(target, 'rb') as f:
-          m = JubaModel.load_binary(f, not no_validate)
-      elif in_fmt == 'json':
-        with open(target, 'r') as f:
-          m = JubaModel.load_json(f)
-      else:
-        raise ValueError(in_fmt)
-    except InvalidModelFormatError as e:
-      raise JubaModelError('{0}: failed to parse model as {1}'.format(target, in_fmt), e)
-    except Exception as e:
-      raise JubaModelError('{0}: failed to load from model'.format(target), e)
+        raise JubaModelError('{0}: failed to merge models'.format(target), e)
 
     # Transform model
     if transform:
@@ -637,12 +1021,18 @@ class _JubaModelCommand(object):
           raise JubaModelError('output file must be specified for binary output')
         with open(output, 'wb') as f:
           m.dump_binary(f)
-      elif out_fmt == 'json':
+      elif out_fmt == 'compressed':
+        if not output:
+          raise JubaModelError('output file must be specified for compressed output')
+        with open(output, 'wb') as f:
+          m.dump_binary(f, compression)
+      elif out_fmt in ('json', 'jsonl'):
+        lines = (out_fmt == 'jsonl')
         if not output:
-          m.dump_json(get_stdio()[1])  # stdout
+          m.dump_json(get_stdio()[1], lines=lines)  # stdout
         else:
           with open(output, 'w') as f:
-            m.dump_json(f)
+            m.dump_json(f, lines=lines)
       elif out_fmt == 'text':
         if not output:
           m.dump_text(get_stdio()[1])  # stdout
@@ -660,13 +1050,84 @@ class _JubaModelCommand(object):
       except Exception as e:
         raise JubaModelError('{0}: failed to write config'.format(output_config), e)
 
+  @classmethod
+  def run_batch(cls, targets, output_dir, jobs=None, **kwargs):
+    """
+    Processes multiple model files concurrently using ``jobs`` processes.
+    Each model is written to ``output_dir`` with the same file name.
+    Yields (target, output, error) tuple for each model file in order;
+    ``error`` is ``None`` if the model is processed successfully.
+    """
+    tasks = [dict(kwargs, target=x, output=os.path.join(output_dir, os.path.basename(x))) for x in targets]
+    if jobs == 1 or len(tasks) == 1:
+      for task in tasks:
+        yield _run_batch_task(task)
+      return
+
+    pool = multiprocessing.Pool(jobs)
+    try:
+      for result in pool.imap(_run_batch_task, tasks):
+        yield result
+    finally:
+      pool.terminate()
+      pool.join()
+
+  @classmethod
+  def _expand_files(cls, files):
+    """
+    Expands directories and glob patterns in ``files``.
+    Returns (list_of_files, is_expanded) tuple.
+    """
+    result = []
+    expanded = (1 < len(files))
+    for path in files:
+      if os.path.isdir(path):
+        entries = [os.path.join(path, x) for x in sorted(os.listdir(path))]
+        result.extend([x for x in entries if os.path.isfile(x)])
+        expanded = True
+      elif not os.path.exists(path) and glob.has_magic(path):
+        result.extend(sorted(glob.glob(path)))
+        expanded = True
+      else:
+        result.append(path)
+    return (result, expanded)
+
+  @classmethod
+  def _load(cls, target, in_fmt, no_validate):
+    # Predict model file format
+    if in_fmt == 'auto':
+      try:
+        in_fmt = JubaModel.predict_format(target)
+      except InvalidModelFormatError as e:
+        raise JubaModelError('{0}: invalid model file format'.format(target), e)
+      except Exception as e:
+        raise JubaModelError('{0}: failed to predict model format'.format(target), e)
+
+    # Load model file
+    try:
+      if in_fmt == 'binary':
+        with open(target, 'rb') as f:
+          m = JubaModel.load_binary(f, not no_validate)
+      elif in_fmt == 'json':
+        with open(target, 'r') as f:
+          m = JubaModel.load_json(f)
+      else:
+        raise ValueError(in_fmt)
+    except InvalidModelFormatError as e:
+      raise JubaModelError('{0}: failed to parse model as {1}'.format(target, in_fmt), e)
+    except Exception as e:
+      raise JubaModelError('{0}: failed to load from model'.format(target), e)
+    return m
+
   @classmethod
   def start(cls, args):
     USAGE = '''
     jubamodel [--in-format IN_FORMAT] [--out-format OUT_FORMAT]
               [--output OUTPUT] [--output-config OUTPUT_CONFIG]
-              [--transform TRANSFORM]
+              [--transform TRANSFORM] [--compression COMPRESSION]
               [--no-validate] [--fix-header]  model_file
+    jubamodel --merge [--merge-weights WEIGHTS] [options...]  model_file model_file ...
+    jubamodel --output OUTPUT_DIR [--jobs JOBS] [options...]  model_file model_file ...
     jubamodel --help'''
 
     EPILOG = '  model_file            input model file in format specified by --in-format'
@@ -676,10 +1137,10 @@ class _JubaModelCommand(object):
     # arguments
     parser.add_option('-i', '--in-format',       choices=('auto','binary','json'), default='auto',
                       help='model input format (default: %default)')
-    parser.add_option('-o', '--out-format',      choices=('text','binary','json'), default='text',
+    parser.add_option('-o', '--out-format',      choices=('text','binary','json','jsonl','compressed'), default='text',
                       help='model output format (default: %default)')
     parser.add_option('-O', '--output',          type='str',                       default=None,
-                      help='specify output file instead of stdout')
+                      help='specify output file (or directory for multiple model files) instead of stdout')
     parser.add_option('-C', '--output-config',   type='str',                       default=None,
                       help='specify output file of config extracted from model')
     parser.add_option('-T', '--transform',       type='str',                       default=None,
@@ -688,6 +1149,14 @@ class _JubaModelCommand(object):
                       help='replace configuration in model with specified file')
     parser.add_option('-Z', '--replace-version', type='str',                       default=None,
                       help='replace Jubatus version in model file')
+    parser.add_option('-c', '--compression',     choices=_ModelCompression.codecs(), default='gzip',
+                      help='compression codec for compressed output (default: %default)')
+    parser.add_option('-M', '--merge',           action='store_true',              default=False,
+                      help='merge linear classifier / regression models by averaging')
+    parser.add_option('-W', '--merge-weights',   type='str',                       default=None,
+                      help='comma-separated weights of each model to merge (default: equal)')
+    parser.add_option('-j', '--jobs',            type='int',                       default=None,
+                      help='number of processes to process multiple model files (default: number of CPUs)')
     parser.add_option('-f', '--no-validate',     action='store_true',              default=False,
                       help='disable validation of binary model files')
     parser.add_option('-F', '--fix-header',      action='store_true',              default=False,
@@ -702,7 +1171,8 @@ class _JubaModelCommand(object):
       print()
       print('Supported Formats:')
       print('  IN_FORMAT:  auto | binary | json')
-      print('  OUT_FORMAT: text | binary | json')
+      print('  OUT_FORMAT: text | binary | json | jsonl | compressed')
+      print('  COMPRESSION: {0}'.format(' | '.join(_ModelCompression.codecs())))
 
     (args, files) = parser.parse_args(args)
 
@@ -717,19 +1187,70 @@ class _JubaModelCommand(object):
       return 0
 
     # Validate parameters.
+    (files, batch) = cls._expand_files(files)
     if len(files) == 0:
       print('Error: no model file specified')
       print_usage()
       return 1
-    if len(files) != 1:
-      print('Error: cannot specify multiple model files at once')
-      print_usage()
-      return 1
-    if args.out_format == 'binary' and args.output is None:
-      print('Error: --output must be specified to output in binary format')
+    if args.merge:
+      batch = False
+    if batch:
+      if args.output is None or not os.path.isdir(args.output):
+        print('Error: --output must be an existing directory to process multiple model files')
+        print_usage()
+        return 1
+      if args.output_config is not None:
+        print('Error: --output-config cannot be used to process multiple model files')
+        print_usage()
+        return 1
+      basenames = [os.path.basename(x) for x in files]
+      if len(set(basenames)) != len(basenames):
+        print('Error: cannot process multiple model files with the same name at once')
+        print_usage()
+        return 1
+      if args.jobs is not None and args.jobs < 1:
+        print('Error: --jobs must be a positive number')
+        print_usage()
+        return 1
+    merge_weights = None
+    if args.merge_weights is not None:
+      try:
+        merge_weights = [float(x) for x in args.merge_weights.split(',')]
+      except ValueError:
+        print('Error: invalid --merge-weights: {0}'.format(args.merge_weights))
+        print_usage()
+        return 1
+      if len(merge_weights) != len(files):
+        print('Error: number of --merge-weights does not match number of model files')
+        print_usage()
+        return 1
+    if args.out_format in ('binary', 'compressed') and args.output is None:
+      print('Error: --output must be specified to output in {0} format'.format(args.out_format))
       print_usage()
       return 1
 
+    if batch:
+      failed = 0
+      for (target, output, error) in cls.run_batch(
+          targets=files,
+          output_dir=args.output,
+          jobs=args.jobs,
+          in_fmt=args.in_format,
+          out_fmt=args.out_format,
+          transform=args.transform,
+          replace_config=args.replace_config,
+          replace_version=args.replace_version,
+          no_validate=args.no_validate,
+          fix_header=args.fix_header,
+          compression=args.compression):
+        if error is None:
+          print('OK: {0} -> {1}'.format(target, output))
+        else:
+          print(error)
+          failed += 1
+      print('{0} model files processed, {1} failed'.format(len(files), failed))
+      return 0 if failed == 0 else 3
+
     success = False
     try:
       cls.run(
@@ -743,6 +1264,9 @@ class _JubaModelCommand(object):
         replace_version=args.replace_version,
         no_validate=args.no_validate,
         fix_header=args.fix_header,
+        compression=args.compression,
+        merge=files[1:] if args.merge else None,
+        merge_weights=merge_weights,
       )
       success = True
     except JubaModelError as e:
@@ -750,6 +1274,19 @@ class _JubaModelCommand(object):
 
     return 0 if success else 3
 
+def _run_batch_task(kwargs):
+  """
+  Processes a model file in the worker process of ``jubamodel``.
+  """
+  (target, output) = (kwargs['target'], kwargs['output'])
+  try:
+    _JubaModelCommand.run(**kwargs)
+  except JubaModelError as e:
+    return (target, output, str(e))
+  except Exception as e:
+    return (target, output, str(JubaModelError('{0}: failed to process model'.format(target), e)))
+  return (target, output, None)
+
 def _main():
   """
   Entry point for ``jubamodel`` command.
@@ -7,7 +7,8 @@ import jubatus
 import jubatus.embedded
 import uuid
 
-from .base import BaseDataset, BaseService, GenericConfig, GenericSchema
+from .base import (BaseDataset, BaseService, GenericConfig, GenericSchema,
+                   Utils)
 from .compat import unicode_t
 from .loader.array import ArrayLoader, ZipArrayLoader
 from .loader.chain import MergeChainLoader
@@ -145,8 +146,21 @@ class NearestNeighbor(BaseService):
             if row_id is None:
                 raise RuntimeError('dataset must have id.')
             result = cli.set_row(row_id, d)
+            self._invalidate_cache()
             yield (idx, row_id, result)
 
+    def set_row_bulk(self, dataset, chunk_size=1000, pipeline=4, retries=3,
+                     backoff=0.1):
+        """Updates rows using the given dataset in chunks of chunk_size rows,
+        keeping up to pipeline chunks in flight over separate connections.
+        Rows that failed are retried up to retries times with exponential
+        backoff starting from backoff seconds.
+        Yields a dict for each chunk with keys chunk, size, succeeded,
+        failed (list of (idx, row_id, exception) for rows that failed after
+        all retries), retried, elapsed and throughput (rows per second)."""
+        return self._update_rows('set_row', dataset, chunk_size, pipeline,
+                                 retries, backoff)
+
     def neighbor_row_from_id(self, dataset, size=10):
         """Returns size rows (at maximum) that have most similar datum
         to id and their distance values."""
@@ -170,13 +184,16 @@ class NearestNeighbor(BaseService):
     def similar_row_from_id(self, dataset, size=10):
         """Returns ret_num rows (at maximum) that have most similar datum to id
         and their similarity values.
+        Results are cached if the cache is enabled (see enable_cache).
         """
         cli = self._client()
         for (idx, (row_id, _)) in dataset:
             if row_id is None:
                 raise RuntimeError(
                     'Non ID-based datasets must use `similar_row_from_datum`')
-            result = cli.similar_row_from_id(row_id, size)
+            result = self._cached(
+                ('similar_row_from_id', row_id, size),
+                lambda: cli.similar_row_from_id(row_id, size))
             yield (idx, row_id, result)
 
     def similar_row_from_datum(self, dataset, size=10):
@@ -188,6 +205,58 @@ class NearestNeighbor(BaseService):
             result = cli.similar_row_from_datum(d, size)
             yield (idx, row_id, result)
 
+    def neighbor_row_array(self, dataset, size=10, chunk_size=100,
+                           pipeline=4):
+        """Returns the tuple of NumPy arrays (ids, distances) of shape
+        [n_queries, size] holding size rows (at maximum) of which datum are
+        most similar to each query datum in the dataset, nearest first.
+        Missing entries are filled with None (ids) and inf (distances).
+        Queries are sent in chunks of chunk_size datums, keeping up to
+        pipeline chunks in flight."""
+        return self._row_array('neighbor_row_from_datum', dataset, size,
+                               chunk_size, pipeline, False)
+
+    def similar_row_array(self, dataset, size=10, chunk_size=100,
+                          pipeline=4):
+        """Returns the tuple of NumPy arrays (ids, scores) of shape
+        [n_queries, size] holding size rows (at maximum) of which datum are
+        most similar to each query datum in the dataset, most similar first.
+        Missing entries are filled with None (ids) and -inf (scores).
+        See neighbor_row_array for chunk_size and pipeline."""
+        return self._row_array('similar_row_from_datum', dataset, size,
+                               chunk_size, pipeline, True)
+
+    def _row_array(self, method, dataset, size, chunk_size, pipeline,
+                   descending):
+        import numpy as np
+
+        def _query(cli, chunk):
+            return [getattr(cli, method)(d, size) for (_, (_, d)) in chunk]
+
+        (ids, scores) = ([], [])
+        fill = -np.inf if descending else np.inf
+        for (_, results) in self._map_chunks(
+                _query, Utils.chunk(dataset, chunk_size), pipeline):
+            for result in results:
+                # Results from multiple servers are merged by the proxy, but
+                # sort them again to guarantee the order.
+                result = sorted(result, key=lambda x: x.score,
+                                reverse=descending)[:size]
+                row_ids = [None] * size
+                row_scores = [fill] * size
+                for (i, r) in enumerate(result):
+                    row_ids[i] = r.id
+                    row_scores[i] = r.score
+                ids.append(row_ids)
+                scores.append(row_scores)
+
+        id_array = np.empty((len(ids), size), dtype=object)
+        if 0 < len(ids):
+            id_array[:] = ids
+        score_array = np.array(scores, dtype=np.float64).reshape(
+            (len(scores), size))
+        return (id_array, score_array)
+
     def get_all_rows(self):
         """Returns the list of all row IDs."""
         cli = self._client()
@@ -64,6 +64,7 @@ class Recommender(BaseService):
       if row_id is None:
         raise RuntimeError('dataset must have `id`.')
       result = cli.clear_row(row_id)
+      self._invalidate_cache()
       yield (idx, row_id, result)
 
   def update_row(self, dataset):
@@ -75,8 +76,22 @@ class Recommender(BaseService):
       if row_id is None:
         raise RuntimeError('datasets must have `id`')
       result = cli.update_row(row_id, d)
+      self._invalidate_cache()
       yield (idx, row_id, result)
 
+  def update_row_bulk(self, dataset, chunk_size=1000, pipeline=4, retries=3, backoff=0.1):
+    """
+    Update data points to the recommender model using the given dataset in
+    chunks of ``chunk_size`` rows, keeping up to ``pipeline`` chunks in
+    flight over separate connections.  Rows that failed are retried up to
+    ``retries`` times with exponential backoff starting from ``backoff``
+    seconds.  Yields a dict for each chunk with keys ``chunk``, ``size``,
+    ``succeeded``, ``failed`` (list of ``(idx, row_id, exception)`` for rows
+    that failed after all retries), ``retried``, ``elapsed`` and
+    ``throughput`` (rows per second).
+    """
+    return self._update_rows('update_row', dataset, chunk_size, pipeline, retries, backoff)
+
   def complete_row_from_id(self, dataset):
     """
     Returns data points from the row id in the recommender model,
@@ -102,12 +117,13 @@ class Recommender(BaseService):
   def similar_row_from_id(self, dataset, size=10):
     """
     Returns similar data points from the row id in the recommender model.
+    Results are cached if the cache is enabled (see `enable_cache`).
     """
     cli = self._client()
     for (idx, (row_id, d)) in dataset:
       if row_id is None:
         raise RuntimeError('Non ID-based datasets must use `similar_row_from_datum`')
-      result = cli.similar_row_from_id(row_id, size)
+      result = self._cached(('similar_row_from_id', row_id, size), lambda: cli.similar_row_from_id(row_id, size))
       yield (idx, row_id, result)
 
   def similar_row_from_id_and_score(self, dataset, score=0.8):
@@ -127,16 +127,19 @@ class Regression(BaseService):
       assert result == 1
       yield (idx, target)
 
-  def estimate(self, dataset):
+  def estimate(self, dataset, batch_size=1):
     """
     Estimate target values of the given dataset using this Regression.
+    When ``batch_size`` is greater than 1, records are estimated in batches
+    of ``batch_size`` records per RPC call.
     """
     cli = self._client()
-    for (idx, (target, d)) in dataset:
-      # Do regression for the record.
-      result = cli.estimate([d])
-      assert len(result) == 1
-      yield (idx, target, result[0])
+    for batch in Utils.chunk(dataset, batch_size):
+      # Do regression for the records.
+      results = cli.estimate([d for (_, (_, d)) in batch])
+      assert len(results) == len(batch)
+      for ((idx, (target, _)), result) in zip(batch, results):
+        yield (idx, target, result)
 
   @classmethod
   def train_and_estimate(cls, config, train_dataset, test_dataset, metric):
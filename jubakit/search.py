@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides hyperparameter search over Config variants.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import itertools
+import math
+import multiprocessing
+import multiprocessing.pool
+import random
+
+from .evaluation import _predict
+from .compat import *
+from .logger import get_logger
+
+_logger = get_logger()
+
+# Transformed datasets shared by the worker processes; set by ``_init_worker``.
+_worker_datasets = None
+
+def config_grid(config_cls, methods=None, parameters=None, converters=None):
+  """
+  Returns the list of Config (instance of ``config_cls``) for all
+  combinations of ``methods`` (list of method names), ``parameters`` (dict
+  that maps parameter names to the list of candidate values) and
+  ``converters`` (list of converter dicts).  Parameters are only applied
+  to methods that have the ``parameter`` block.
+
+    >>> configs = config_grid(Config, ['AROW', 'CW'], {'regularization_weight': [0.1, 1.0]})
+  """
+  if methods is None:
+    methods = [config_cls._default_method()]
+  if converters is None:
+    converters = [None]
+
+  param_grid = [{}]
+  if parameters:
+    keys = sorted(parameters.keys())
+    param_grid = [dict(zip(keys, values)) for values in itertools.product(*[parameters[k] for k in keys])]
+
+  configs = []
+  for method in methods:
+    has_param = config_cls._default_parameter(method) is not None
+    for param in (param_grid if has_param else [{}]):
+      for converter in converters:
+        configs.append(config_cls(method=method, parameter=(dict(param) if param else None), converter=converter))
+  return configs
+
+def search(service_cls, configs, train_dataset, test_dataset, metric, n_jobs=1, embedded=False, eta=None, greater_is_better=True, seed=None):
+  """
+  Trains ``service_cls`` (Classifier, Regression or their subclasses) with
+  each of ``configs`` and evaluates it with ``test_dataset`` using ``metric``
+  that takes ``(y_true, y_pred)`` and returns the score.  Returns the list
+  of dicts with keys ``config``, ``score``, ``budget`` (number of records
+  used for training) and ``round``, sorted from the best candidate.
+
+  When ``eta`` (an integer >= 2) is given, successive halving is performed:
+  all candidates are first trained with a small subset of the training
+  data, then only the top ``1/eta`` candidates proceed to the next round
+  with ``eta`` times larger subset, until the full dataset is used.
+  Subsets are taken from the training data shuffled once with ``seed``,
+  so that early rounds are not biased by the order of the dataset (e.g.,
+  sorted by labels).  Without ``eta``, all candidates are trained with the
+  full dataset in its order.
+
+  Candidates are evaluated concurrently in ``n_jobs`` workers (threads for
+  servers, processes for embedded services).  Datasets are transformed
+  only once and shared by all candidates, as converters are applied in
+  services.
+  """
+  if n_jobs is None:
+    n_jobs = multiprocessing.cpu_count()
+  if n_jobs < 1:
+    raise RuntimeError('n_jobs must be a positive integer: {0}'.format(n_jobs))
+  if eta is not None and eta < 2:
+    raise RuntimeError('eta must be an integer >= 2: {0}'.format(eta))
+  if len(configs) == 0:
+    raise RuntimeError('no config specified')
+
+  datasets = ([x for x in train_dataset], [x for x in test_dataset])
+  n_train = len(datasets[0])
+  if eta is not None:
+    random.Random(seed).shuffle(datasets[0])
+
+  n_rounds = 1
+  if eta is not None:
+    n_rounds += int(math.log(len(configs)) / math.log(eta) + 1e-9)
+
+  # Worker processes receive datasets once at startup; otherwise datasets
+  # are passed with each task.
+  (pool, shared) = (None, (datasets,))
+  if 1 < n_jobs and embedded:
+    pool = multiprocessing.Pool(n_jobs, initializer=_init_worker, initargs=(datasets,))
+    shared = ()
+  elif 1 < n_jobs:
+    pool = multiprocessing.pool.ThreadPool(n_jobs)
+
+  results = {}
+  candidates = list(range(len(configs)))
+  try:
+    for r in range(n_rounds):
+      budget = max(1, n_train * (eta ** r) // (eta ** (n_rounds - 1))) if eta else n_train
+      _logger.info('search round %d: %d candidates with %d records', r, len(candidates), budget)
+      tasks = [(service_cls, configs[c], embedded, c, budget, metric) + shared for c in candidates]
+      if pool is None:
+        scores = [_run_candidate(task) for task in tasks]
+      else:
+        scores = pool.map(_run_candidate, tasks)
+
+      for (c, score) in zip(candidates, scores):
+        results[c] = {'config': configs[c], 'score': score, 'budget': budget, 'round': r}
+
+      ranked = _rank(candidates, scores, greater_is_better)
+      candidates = ranked[:max(1, int(math.ceil(len(ranked) / eta)))] if eta else ranked
+  finally:
+    if pool is not None:
+      pool.terminate()
+      pool.join()
+
+  # Candidates survived longer come first, then sorted by score.
+  order = _rank(list(results.keys()), [results[c]['score'] for c in results.keys()], greater_is_better)
+  return sorted([results[c] for c in order], key=lambda x: -x['round'])
+
+def _rank(candidates, scores, greater_is_better):
+  """
+  Returns the candidates sorted from the best score (stable).
+  """
+  sign = -1 if greater_is_better else 1
+  return [c for (_, _, c) in sorted([(sign * s, i, c) for (i, (c, s)) in enumerate(zip(candidates, scores))])]
+
+def _init_worker(datasets):
+  global _worker_datasets
+  _worker_datasets = datasets
+
+def _run_candidate(task):
+  """
+  Trains and tests the service with one candidate config.
+  """
+  (service_cls, config, embedded, candidate, budget, metric) = task[:6]
+  (train_data, test_data) = task[6] if 6 < len(task) else _worker_datasets
+
+  service = service_cls.run(config, embedded=embedded)
+  try:
+    for _ in service.train(train_data[:budget]):
+      pass
+    (y_true, y_pred) = _predict(service, test_data)
+  finally:
+    service.stop()
+
+  score = metric(y_true, y_pred)
+  _logger.info('candidate %d: score %s with %d records', candidate, score, budget)
+  return score
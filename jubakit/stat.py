@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import collections
+
+import jubatus
+import jubatus.embedded
+
+from .base import BaseSchema, BaseDataset, BaseService, BaseConfig, Utils
+from .compat import *
+from .logger import get_logger
+
+_logger = get_logger()
+
+class Schema(BaseSchema):
+  """
+  Schema for Stat service.
+  """
+
+  KEY = 'k'
+  VALUE = 'v'
+
+  def __init__(self, mapping, fallback=None):
+    super(Schema, self).__init__(mapping, fallback)
+    self._key_key = self._get_unique_mapping(mapping, fallback, self.KEY, 'KEY')
+    self._value_key = self._get_unique_mapping(mapping, fallback, self.VALUE, 'VALUE')
+
+  def transform(self, row):
+    key = row.get(self._key_key, None)
+    value = row.get(self._value_key, None)
+    if key is None or value is None:
+      raise RuntimeError('Row without key or value column cannot be used.')
+    return (unicode_t(key), float(value))
+
+class Dataset(BaseDataset):
+  """
+  Dataset for Stat service.
+  """
+
+  @classmethod
+  def _predict(cls, row):
+    raise RuntimeError('schema must be specified for Stat Dataset')
+
+class Stat(BaseService):
+  """
+  Stat service.
+  """
+
+  STATS = ['sum', 'stddev', 'max', 'min', 'entropy']
+
+  def __init__(self, host='127.0.0.1', port=9199, cluster='', timeout=0):
+    super(Stat, self).__init__(host, port, cluster, timeout)
+    self._window_size = None
+
+  @classmethod
+  def name(cls):
+    return 'stat'
+
+  @classmethod
+  def _client_class(cls):
+    return jubatus.stat.client.Stat
+
+  @classmethod
+  def _embedded_class(cls):
+    return jubatus.embedded.Stat
+
+  @classmethod
+  def run(cls, config, port=None, embedded=False):
+    service = super(Stat, cls).run(config, port, embedded)
+    service._window_size = config.get('window_size', None)
+    return service
+
+  def push(self, data, values=None, chunk_size=10000, window_size=None):
+    """
+    Pushes values and returns the dict with keys ``pushed`` (number of
+    values sent to the server) and ``skipped`` (number of values skipped by
+    local pre-aggregation).
+
+    ``data`` is a Dataset, an iterable (e.g., NumPy array) of ``(key, value)``
+    pairs, or an iterable of keys when ``values`` is specified.  Values are
+    read in chunks of ``chunk_size``.
+
+    The window of the server is shared by all keys and holds the last
+    ``window_size`` values pushed, so values are pushed in the given order
+    over a single connection.  When more than ``window_size`` values are
+    given, leading values that would be evicted by the rest are skipped, as
+    the resulting window is the same.  ``window_size`` defaults to the one in
+    the config when the service is started by ``run``; if it is unknown,
+    nothing is skipped.
+    """
+    if window_size is None:
+      window_size = self._window_size
+
+    if isinstance(data, BaseDataset):
+      pairs = (pair for (_, pair) in data)
+    elif values is not None:
+      pairs = zip(data, values)
+    else:
+      pairs = data
+
+    cli = self._client()
+    def _push(rows):
+      for (key, value) in rows:
+        cli.push(key, value)
+      return len(rows)
+
+    pushed = 0
+    skipped = 0
+    tail = collections.deque(maxlen=window_size)
+    for chunk in Utils.chunk(pairs, chunk_size):
+      rows = [(unicode_t(key), float(value)) for (key, value) in chunk]
+      if window_size is None:
+        pushed += _push(rows)
+      else:
+        # Only the last `window_size` values can remain in the window.
+        skipped += max(0, len(tail) + len(rows) - window_size)
+        tail.extend(rows)
+    pushed += _push(list(tail))
+    _logger.info('stat: %d values pushed (%d skipped)', pushed, skipped)
+    return {'pushed': pushed, 'skipped': skipped}
+
+  def query(self, keys, stats=None, chunk_size=100, pipeline=4):
+    """
+    Returns the dict that maps each of ``keys`` to the dict of statistics.
+    ``stats`` is the list of statistics to fetch (any of ``sum``,
+    ``stddev``, ``max``, ``min`` and ``entropy``; all by default).  Queries
+    are sent in chunks of ``chunk_size`` keys, keeping up to ``pipeline``
+    chunks in flight over separate connections.
+    """
+    if stats is None:
+      stats = self.STATS
+    for s in stats:
+      if s not in self.STATS:
+        raise RuntimeError('unknown statistics: {0}'.format(s))
+
+    def _query(cli, chunk):
+      return [dict([(s, getattr(cli, s)(key)) for s in stats]) for key in chunk]
+
+    keys = [unicode_t(k) for k in keys]
+    results = {}
+    for (chunk, result) in self._map_chunks(_query, Utils.chunk(keys, chunk_size), pipeline):
+      results.update(zip(chunk, result))
+    return results
+
+class Config(BaseConfig):
+  """
+  Configuration to run Stat service.
+  """
+
+  def __init__(self, window_size=None):
+    super(Config, self).__init__()
+    if window_size is not None:
+      self['window_size'] = window_size
+
+  @classmethod
+  def _default(cls, cfg):
+    cfg.clear()
+    cfg['window_size'] = 128
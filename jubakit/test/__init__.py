@@ -12,6 +12,18 @@ try:
 except ImportError:
   embedded_available = False
 
+try:
+  import numpy
+  numpy_available = True
+except ImportError:
+  numpy_available = False
+
+try:
+  import scipy
+  scipy_available = True
+except ImportError:
+  scipy_available = False
+
 try:
   import numpy
   import scipy
@@ -24,6 +36,10 @@ try:
   from unittest import skipUnless
   def requireSklearn(target):
     return skipUnless(sklearn_available, 'requires scikit-learn')(target)
+  def requireNumpy(target):
+    return skipUnless(numpy_available, 'requires numpy')(target)
+  def requireScipy(target):
+    return skipUnless(scipy_available, 'requires scipy')(target)
   def requirePython3(target):
     return skipUnless(PYTHON3, 'requires Python 3.x')(target)
   def requireEmbedded(target):
@@ -31,6 +47,10 @@ try:
 except ImportError:
   def requireSklearn(target):
     return target if sklearn_available else None
+  def requireNumpy(target):
+    return target if numpy_available else None
+  def requireScipy(target):
+    return target if scipy_available else None
   def requirePython3(target):
     return target if PYTHON3 else None
   def requireEmbedded(target):
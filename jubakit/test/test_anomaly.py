@@ -7,7 +7,7 @@ from unittest import TestCase
 from jubakit.anomaly import Schema, Dataset, Anomaly, Config
 from jubakit.compat import *
 
-from . import requireEmbedded
+from . import requireEmbedded, requireNumpy
 from .stub import *
 
 class SchemaTest(TestCase):
@@ -48,10 +48,81 @@ class DatasetTest(TestCase):
     dataset = Dataset(loader, None)  # predict
     self.assertEqual(['v', 1.0], dataset[0][2].num_values[0])
 
+class _StubAnomalyClient(object):
+  def __init__(self):
+    self.calls = []
+
+  def add_bulk(self, data):
+    self.calls.append(len(data))
+    return [str(d.num_values[0][1]) for d in data]
+
+  def calc_score(self, d):
+    self.calls.append(1)
+    return d.num_values[0][1] / 10
+
 class AnomalyTest(TestCase):
+  def _dataset(self):
+    loader = StubLoader()
+    loader.DATA = list(range(5))
+    return Dataset(loader, Schema({'v': Schema.NUMBER}))
+
   def test_simple(self):
     anomaly = Anomaly()
 
+  def test_add_bulk(self):
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    expected = [str(float(i)) for i in range(5)]
+    self.assertEqual(expected, anomaly.add_bulk(self._dataset(), chunk_size=2))
+    self.assertEqual([2, 2, 1], cli.calls)
+
+  def test_add_bulk_not_iterated(self):
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    anomaly.add_bulk(self._dataset())
+    self.assertEqual([5], cli.calls)
+
+  def test_add_bulk_stream(self):
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    dataset = self._dataset()
+    expected = [(i, str(float(i))) for i in range(5)]
+    self.assertEqual(expected, list(anomaly.add_bulk_stream(dataset, chunk_size=2)))
+    self.assertEqual([2, 2, 1], cli.calls)
+
+    result = list(anomaly.add_bulk_stream(dataset, chunk_size=2, per_chunk=True))
+    self.assertEqual([([0, 1], ['0.0', '1.0']), ([2, 3], ['2.0', '3.0']), ([4], ['4.0'])], result)
+
+  def test_add_bulk_stream_pipeline(self):
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    expected = [(i, str(float(i))) for i in range(5)]
+    self.assertEqual(expected, list(anomaly.add_bulk_stream(self._dataset(), chunk_size=1, pipeline=3)))
+    self.assertEqual([1] * 5, cli.calls)
+
+  def test_calc_score(self):
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    dataset = self._dataset()
+    expected = [(i, None, None, i / 10) for i in range(5)]
+    self.assertEqual(expected, list(anomaly.calc_score(dataset)))
+    self.assertEqual(expected, list(anomaly.calc_score(dataset, chunk_size=2, pipeline=3)))
+
+  @requireNumpy
+  def test_calc_score_array(self):
+    import numpy as np
+    cli = _StubAnomalyClient()
+    anomaly = Anomaly()
+    anomaly._client = lambda: cli
+    (flags, scores) = anomaly.calc_score_array(self._dataset(), chunk_size=2)
+    self.assertEqual((5,), flags.shape)
+    self.assertTrue(np.allclose([0.0, 0.1, 0.2, 0.3, 0.4], scores))
+
   @requireEmbedded
   def test_embedded(self):
     anomaly = Anomaly.run(Config(), embedded=True)
@@ -9,8 +9,67 @@ from jubakit.bandit import Bandit, Config
 from . import requireEmbedded
 
 
+class _StubBanditClient(object):
+
+  def __init__(self):
+    self.rewards = []
+
+  def select_arm(self, player_id):
+    return 'arm_' + player_id
+
+  def register_reward(self, player_id, arm_id, reward):
+    if player_id == 'error':
+      raise RuntimeError('stub error')
+    self.rewards.append((player_id, arm_id, reward))
+    return True
+
+
 class BanditTest(TestCase):
 
+  def _stub(self):
+    cli = _StubBanditClient()
+    bandit = Bandit()
+    bandit._client = lambda: cli
+    return (bandit, cli)
+
+  def test_select_arms(self):
+    (bandit, cli) = self._stub()
+    arms = bandit.select_arms([1, 2, 3, 4, 5], chunk_size=2, pipeline=2)
+    self.assertEqual(['arm_1', 'arm_2', 'arm_3', 'arm_4', 'arm_5'], arms)
+    self.assertEqual([], bandit.select_arms([]))
+
+  def test_register_rewards(self):
+    (bandit, cli) = self._stub()
+    results = bandit.register_rewards([(1, 2, 3), ('p', 'a', '0.5')], chunk_size=1)
+    self.assertEqual([True, True], results)
+    self.assertEqual([('1', '2', 3.0), ('p', 'a', 0.5)], cli.rewards)
+
+  def test_reward_queue(self):
+    (bandit, cli) = self._stub()
+    self.assertRaises(RuntimeError, bandit.queue_reward, 'p', 'a', 1)
+    self.assertEqual(None, bandit.reward_queue_stats())
+
+    bandit.start_reward_queue(max_size=10, batch_size=3, interval=0.01)
+    self.assertRaises(RuntimeError, bandit.start_reward_queue)
+    for i in range(5):
+      self.assertTrue(bandit.queue_reward('p', 'a', i))
+    self.assertTrue(bandit.queue_reward('error', 'a', 0))
+    bandit.stop_reward_queue()
+    self.assertEqual([float(i) for i in range(5)], [r for (_, _, r) in cli.rewards])
+    self.assertEqual(None, bandit.reward_queue_stats())
+
+  def test_reward_queue_full(self):
+    (bandit, cli) = self._stub()
+    bandit.start_reward_queue(max_size=2, interval=0.01)
+    # Stop the thread without flushing to fill the queue.
+    bandit._reward_queue.stop(False)
+    for i in range(3):
+      bandit.queue_reward('p', 'a', i)
+    stats = bandit.reward_queue_stats()
+    self.assertEqual({'queued': 2, 'registered': 0, 'dropped': 1, 'failed': 0}, stats)
+    bandit.stop_reward_queue(flush=True)
+    self.assertEqual(2, len(cli.rewards))
+
   def test_simple(self):
     Bandit()
 
@@ -5,6 +5,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from unittest import TestCase
 
 import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
 
 try:
   import numpy as np
@@ -13,7 +19,8 @@ except ImportError:
 
 from jubatus.common import Datum
 
-from jubakit.base import BaseLoader, BaseSchema, GenericSchema, BaseDataset, BaseService, BaseConfig, GenericConfig, Utils
+from jubakit.base import BaseLoader, BaseSchema, GenericSchema, BaseDataset, BaseService, BaseConfig, GenericConfig, Utils, ServicePool, _ServiceBackendEmbedded, _ResultCache
+from jubakit._process import _ServiceBackend
 
 from . import requireSklearn
 from .stub import *
@@ -399,6 +406,243 @@ class TestBaseService(TestCase):
     self.assertRaises(RuntimeError, service.run, StubConfig())  # juba_stub does not exist
     service.stop()
 
+  def test_save_load_remote(self):
+    service = StubService('192.0.2.1', 9199)
+    self.assertRaises(RuntimeError, service.load, 'test', '/dev/null')
+
+  def test_copy_model_file(self):
+    tmpdir = tempfile.mkdtemp()
+    try:
+      src = os.path.join(tmpdir, 'src.jubatus')
+      dst = os.path.join(tmpdir, 'dst.jubatus')
+      data = os.urandom(100000)
+      with open(src, 'wb') as f:
+        f.write(data)
+      BaseService._copy_model_file(src, dst, chunk_size=4096)
+      with open(dst, 'rb') as f:
+        self.assertEqual(data, f.read())
+      self.assertEqual(['dst.jubatus', 'src.jubatus'], sorted(os.listdir(tmpdir)))
+
+      BaseService._write_model_file(b'test', dst)
+      with open(dst, 'rb') as f:
+        self.assertEqual(b'test', f.read())
+
+      self.assertRaises(RuntimeError, BaseService._copy_model_file, os.path.join(tmpdir, 'missing'), dst)
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_write_model_file_checksum(self):
+    tmpdir = tempfile.mkdtemp()
+    rename = os.rename
+    def _corrupt_rename(src, dst):
+      rename(src, dst)
+      with open(dst, 'ab') as f:
+        f.write(b'corrupted')
+    try:
+      dst = os.path.join(tmpdir, 'dst.jubatus')
+      os.rename = _corrupt_rename
+      self.assertRaises(RuntimeError, BaseService._write_model_file, b'test', dst)
+      self.assertEqual([], os.listdir(tmpdir))
+    finally:
+      os.rename = rename
+      shutil.rmtree(tmpdir)
+
+  def test_snapshot_restore(self):
+    service = self._embedded_service(b'model')
+    self.assertEqual(b'model', service.snapshot())
+    service.restore(b'new')
+    self.assertEqual(b'new', service.snapshot())
+    service.restore(BytesIO(b'buffer'))
+    self.assertEqual(b'buffer', service.snapshot())
+
+    service = StubService()
+    self.assertRaises(RuntimeError, service.snapshot)
+    self.assertRaises(RuntimeError, service.restore, b'')
+    self.assertRaises(RuntimeError, service.start_checkpoint, '/dev/null')
+
+  def test_checkpoint(self):
+    service = self._embedded_service(b'model')
+    snapshots = []
+    self.assertRaises(RuntimeError, service.start_checkpoint, snapshots.append, 0)
+    service.start_checkpoint(snapshots.append, 0.01)
+    checkpointer = service._checkpointer
+    for i in range(500):
+      if 2 <= checkpointer.count: break
+      time.sleep(0.01)
+    service.stop_checkpoint(final=True)
+    self.assertFalse(checkpointer.is_alive())
+    self.assertTrue(3 <= len(snapshots))
+    self.assertEqual([b'model'], list(set(snapshots)))
+    self.assertEqual(None, service._checkpointer)
+
+    # Checkpoint to file.
+    (fd, path) = tempfile.mkstemp()
+    os.close(fd)
+    try:
+      service.start_checkpoint(path, 60)
+      service.stop()
+      self.assertEqual(None, service._checkpointer)
+      service.start_checkpoint(path, 60)
+      service.stop_checkpoint(final=True)
+      with open(path, 'rb') as f:
+        self.assertEqual(b'model', f.read())
+    finally:
+      os.remove(path)
+
+  def test_checkpoint_while_training(self):
+    class _StubModel(object):
+      def __init__(self, config):
+        self.trained = [0, 0]
+      def train(self, n):
+        self.trained[0] += n
+        time.sleep(0.0001)
+        self.trained[1] += n
+      def save_bytes(self):
+        return '{0},{1}'.format(*self.trained).encode()
+    service = StubService()
+    service._backend = _ServiceBackendEmbedded(_StubModel, None)
+    service._embedded = True
+
+    def _train():
+      cli = service._client()
+      for _ in range(300):
+        cli.train(1)
+    trainer = threading.Thread(target=_train)
+    snapshots = []
+    service.start_checkpoint(snapshots.append, 0.0001)
+    trainer.start()
+    trainer.join()
+    service.stop_checkpoint(final=True)
+    self.assertEqual(b'300,300', snapshots[-1])
+    for snapshot in snapshots:
+      (before, after) = snapshot.split(b',')
+      self.assertEqual(before, after)
+
+  def _embedded_service(self, data):
+    class _StubModel(object):
+      def __init__(self, data):
+        self.data = data
+      def save_bytes(self):
+        return self.data
+      def load_bytes(self, data):
+        self.data = data
+    backend = _ServiceBackendEmbedded(_StubModel, data)
+    service = StubService()
+    service._backend = backend
+    service._embedded = True
+    return service
+
+class _StubBackend(object):
+  def __init__(self, config, port=10000):
+    self.name = StubService.name()
+    self.config = config
+    self.config_key = _ServiceBackend.get_config_key(config)
+    self.port = port
+    self.running = True
+    self.cleared = 0
+    self.restarted = 0
+
+  def restart(self, config):
+    self.config = config
+    self.config_key = _ServiceBackend.get_config_key(config)
+    self.restarted += 1
+
+  def is_running(self):
+    return self.running
+
+  def clear(self):
+    self.cleared += 1
+    return True
+
+  def stop(self):
+    self.running = False
+
+class TestServicePool(TestCase):
+  def setUp(self):
+    ServicePool.enable(2)
+
+  def tearDown(self):
+    ServicePool.disable()
+
+  def test_disabled(self):
+    ServicePool.disable()
+    self.assertFalse(ServicePool.is_enabled())
+    self.assertFalse(ServicePool.release(_StubBackend({})))
+    self.assertEqual(None, ServicePool.acquire(StubService.name(), {}))
+    self.assertRaises(RuntimeError, ServicePool.warmup, StubService, StubConfig())
+    self.assertRaises(RuntimeError, ServicePool.enable, 0)
+
+  def test_acquire_release(self):
+    backend = _StubBackend({'test': 1})
+    self.assertTrue(ServicePool.release(backend))
+    self.assertEqual(1, backend.cleared)
+    self.assertEqual(1, ServicePool.idle_count())
+    self.assertEqual(None, ServicePool.acquire('_other', {'test': 1}))
+    self.assertEqual(backend, ServicePool.acquire(StubService.name(), {'test': 1}))
+    self.assertEqual(0, backend.restarted)
+    self.assertEqual(0, ServicePool.idle_count())
+
+  def test_config_change(self):
+    b1 = _StubBackend({'test': 1}, 10001)
+    b2 = _StubBackend({'test': 2}, 10002)
+    ServicePool.release(b1)
+    ServicePool.release(b2)
+    self.assertEqual(b2, ServicePool.acquire(StubService.name(), {'test': 2}))
+    self.assertEqual(b1, ServicePool.acquire(StubService.name(), {'test': 3}))
+    self.assertEqual(0, b2.restarted)
+    self.assertEqual(1, b1.restarted)
+    self.assertEqual({'test': 3}, b1.config)
+
+  def test_limit(self):
+    backends = [_StubBackend({}, 10000 + i) for i in range(3)]
+    self.assertEqual([True, True, False], [ServicePool.release(b) for b in backends])
+    ServicePool.enable(1)
+    self.assertEqual(1, ServicePool.idle_count(StubService.name()))
+    self.assertFalse(backends[0].running)
+    ServicePool.disable()
+    self.assertFalse(backends[1].running)
+    self.assertEqual(0, ServicePool.idle_count())
+
+  def test_not_running(self):
+    backend = _StubBackend({})
+    backend.running = False
+    self.assertFalse(ServicePool.release(backend))
+    self.assertEqual(0, backend.cleared)
+
+  def test_run_stop(self):
+    backend = _StubBackend(StubConfig(), 12345)
+    ServicePool.release(backend)
+    service = StubService.run(StubConfig())
+    self.assertEqual(backend, service._backend)
+    self.assertEqual(12345, service._port)
+    self.assertEqual(None, service.stop())
+    self.assertEqual(None, service._backend)
+    self.assertTrue(backend.running)
+    self.assertEqual(1, ServicePool.idle_count())
+
+class ResultCacheTest(TestCase):
+  def test_lru(self):
+    cache = _ResultCache(2)
+    self.assertEqual([1], cache.get('a', lambda: [1]))
+    self.assertEqual([2], cache.get('b', lambda: [2]))
+    self.assertEqual([1], cache.get('a', lambda: None))
+    self.assertEqual([3], cache.get('c', lambda: [3]))  # evicts 'b'
+    self.assertEqual(None, cache.get('b', lambda: None))
+    self.assertEqual({'hits': 1, 'misses': 4, 'invalidations': 0, 'size': 2}, cache.stats())
+
+    cache.invalidate()
+    self.assertEqual({'hits': 1, 'misses': 4, 'invalidations': 1, 'size': 0}, cache.stats())
+
+  def test_ttl(self):
+    cache = _ResultCache(2, ttl=0.05)
+    self.assertEqual(1, cache.get('a', lambda: 1))
+    self.assertEqual(1, cache.get('a', lambda: 2))
+    time.sleep(0.1)
+    self.assertEqual(3, cache.get('a', lambda: 3))
+
+  def test_invalid(self):
+    self.assertRaises(RuntimeError, _ResultCache, 0)
+
 class TestBaseConfig(TestCase):
   def test_base(self):
     self.assertRaises(NotImplementedError, BaseConfig)
@@ -470,6 +714,12 @@ class TestGenericConfg(TestCase):
     self.assertEqual('動詞,*|名詞,固有名詞,*', config['converter']['string_types']['mecab3']['exclude_features'])
 
 class UtilsTest(TestCase):
+  def test_chunk(self):
+    self.assertEqual([[0, 1], [2, 3], [4]], list(Utils.chunk(range(5), 2)))
+    self.assertEqual([[0, 1, 2]], list(Utils.chunk(iter(range(3)), 5)))
+    self.assertEqual([], list(Utils.chunk([], 5)))
+    self.assertRaises(RuntimeError, list, Utils.chunk([], 0))
+
   def test_softmax(self):
     res = Utils.softmax([0])
     self.assertEqual(res, [1.0])
@@ -169,6 +169,19 @@ class DocumentDatasetTest(TestCase):
       self.assertEqual(self.TEXTS[idx], text)
 
 
+class StubBurstClient(object):
+
+  def __init__(self):
+    self.batches = []
+
+  def add_documents(self, docs):
+    self.batches.append([doc.pos for doc in docs])
+    return len(docs)
+
+  def get_all_bursted_results(self):
+    return {'polled': len(self.batches)}
+
+
 class BurstTest(TestCase):
 
   def test_simple(self):
@@ -194,6 +207,46 @@ class BurstTest(TestCase):
       self.assertEqual(result, 1)
     burst.stop()
 
+  def test_add_documents_stream(self):
+    cli = StubBurstClient()
+    burst = Burst()
+    burst._client = lambda: cli
+    loader = StubDocumentLoader([1, 2, 11, 12, 13, 14, 25], ['a'] * 7)
+    schema = DocumentSchema({
+      'position': DocumentSchema.POSITION,
+      'text': DocumentSchema.TEXT
+    })
+    dataset = DocumentDataset(loader, schema)
+
+    polled = []
+    results = list(burst.add_documents_stream(
+        dataset, window=10, batch_size=3, on_bursted=polled.append))
+    self.assertEqual([([0, 1], 2), ([2, 3, 4], 3), ([5], 1), ([6], 1)], results)
+    self.assertEqual([[1, 2], [11, 12, 13], [14], [25]], cli.batches)
+    self.assertEqual([{'polled': n} for n in [1, 2, 3, 4]], polled)
+
+    cli.batches = []
+    polled = []
+    results = list(burst.add_documents_stream(
+        dataset, poll_interval=3600, on_bursted=polled.append))
+    self.assertEqual([(list(range(7)), 7)], results)
+    self.assertEqual([{'polled': 1}], polled)
+
+  def test_add_documents_stream_order(self):
+    cli = StubBurstClient()
+    burst = Burst()
+    burst._client = lambda: cli
+    loader = StubDocumentLoader([1, 11, 2, 12, 21, 3], ['a'] * 6)
+    schema = DocumentSchema({
+      'position': DocumentSchema.POSITION,
+      'text': DocumentSchema.TEXT
+    })
+    dataset = DocumentDataset(loader, schema)
+
+    results = list(burst.add_documents_stream(dataset, window=10))
+    self.assertEqual([([i], 1) for i in range(6)], results)
+    self.assertEqual([[1], [11], [2], [12], [21], [3]], cli.batches)
+
   def test_get_results(self):
     burst = Burst.run(Config())
     burst.get_result('keyword')
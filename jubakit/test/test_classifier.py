@@ -3,6 +3,9 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from unittest import TestCase
+import os
+import tempfile
+from io import BytesIO
 
 try:
   import numpy as np
@@ -11,10 +14,51 @@ except ImportError:
   pass
 
 from jubakit.classifier import Schema, Dataset, Classifier, Config
+from jubakit.model import JubaModel, UnsupportedMergeError
+from jubatus.classifier.types import EstimateResult
 from jubakit.compat import *
 
 from . import requireSklearn, requireEmbedded
 from .stub import *
+from .test_model import _get_linear_model
+
+class _ShardBackend(object):
+  """
+  Backend that produces a PA model having one class and one feature for
+  each label trained.  Label counts of the loaded model are taken over.
+  """
+
+  def __init__(self):
+    self.labels = []
+    self.loaded = None
+
+  def save_bytes(self):
+    labels = sorted(set(self.labels))
+    key2id = dict([(label, i) for (i, label) in enumerate(labels)])
+    diff = dict([('f_' + label, {i: [1.0, 0.0, 0.0]}) for (label, i) in key2id.items()])
+    counts = dict([(label, self.labels.count(label)) for label in labels])
+    buf = BytesIO()
+    _get_linear_model(diff, key2id, counts, 'PA').dump_binary(buf)
+    return buf.getvalue()
+
+  def load_bytes(self, data):
+    self.loaded = data
+    (_, (labels, _, _)) = JubaModel.load_binary(BytesIO(data)).data()[0]
+    for (label, count) in labels.items():
+      self.labels.extend([label] * count)
+
+class _ShardClassifier(Classifier):
+  @classmethod
+  def run(cls, config, port=None, embedded=False):
+    service = cls()
+    service._backend = _ShardBackend()
+    service._embedded = True
+    return service
+
+  def train(self, dataset):
+    for (idx, (label, d)) in dataset:
+      self._backend.labels.append(label)
+      yield (idx, label)
 
 class SchemaTest(TestCase):
   def test_simple(self):
@@ -200,14 +244,90 @@ class DatasetTest(TestCase):
     data = np.array([1, 2, 3, 4, 5, 6])
     return csr_matrix((data, (row, col)), shape=(3, 3))
 
+class _StubClassifierClient(object):
+  def __init__(self):
+    self.calls = 0
+
+  def classify(self, data):
+    self.calls += 1
+    return [[EstimateResult('pos', d.num_values[0][1]), EstimateResult('neg', -d.num_values[0][1])] for d in data]
+
 class ClassifierTest(TestCase):
   def test_simple(self):
     classifier = Classifier()
 
+  def test_classify_batch(self):
+    cli = _StubClassifierClient()
+    classifier = Classifier()
+    classifier._client = lambda: cli
+    dataset = Dataset.from_array([[1.0], [-2.0], [3.0]], ['pos', 'neg', 'pos'])
+    expected = list(classifier.classify(dataset))
+    self.assertEqual(3, cli.calls)
+    for batch_size in [2, 3, 10]:
+      cli.calls = 0
+      self.assertEqual(expected, list(classifier.classify(dataset, batch_size=batch_size)))
+      self.assertEqual((3 + batch_size - 1) // batch_size, cli.calls)
+    self.assertEqual((1, 'neg', [('neg', 2.0), ('pos', -2.0)]), expected[1])
+
   @requireEmbedded
   def test_embedded(self):
     classifier = Classifier.run(Config(), embedded=True)
 
+  @requireEmbedded
+  def test_embedded_save_load(self):
+    (fd, path) = tempfile.mkstemp()
+    os.close(fd)
+    try:
+      classifier = Classifier.run(Config(), embedded=True)
+      classifier.save('test', path)
+      classifier2 = Classifier.run(Config(), embedded=True)
+      classifier2.load('test', path)
+    finally:
+      os.remove(path)
+
+  def test_train_parallel_invalid(self):
+    schema = Schema({'v': Schema.LABEL})
+    dataset = Dataset(StubLoader(), schema)
+    self.assertRaises(UnsupportedMergeError, Classifier.train_parallel, Config(method='NN'), dataset)
+    dataset = Dataset(StubLoader(), schema, static=False)
+    self.assertRaises(RuntimeError, Classifier.train_parallel, Config(), dataset)
+    dataset = Dataset(StubLoader(), schema)
+    self.assertRaises(RuntimeError, Classifier.train_parallel, Config(), dataset, 0)
+
+  def test_train_parallel_shards(self):
+    # Shards learn disjoint labels (and features); all of them must be merged.
+    data = [{'label': 'a' if i % 2 == 0 else 'b'} for i in range(6)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL})).convert(lambda _: data)
+    classifier = _ShardClassifier.train_parallel(Config(method='PA'), dataset, n_jobs=2)
+    model = JubaModel.load_binary(BytesIO(classifier._backend.loaded))
+    ((tbl, (key2id, _, _), diff, _), (labels, _, _)) = model.data()[0]
+    self.assertEqual(['a', 'b'], sorted(key2id.keys()))
+    self.assertEqual({'a': 3, 'b': 3}, labels)
+    self.assertEqual({}, diff)
+    self.assertEqual([0.5, 0.0, 0.0], tbl['f_a'][key2id['a']])
+    self.assertEqual([0.5, 0.0, 0.0], tbl['f_b'][key2id['b']])
+
+  def test_train_parallel_base(self):
+    # Label counts of the model each round starts from are counted once.
+    data = [{'label': 'a' if i % 3 == 0 else 'b'} for i in range(12)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL})).convert(lambda _: data)
+    classifier = _ShardClassifier.train_parallel(Config(method='PA'), dataset, n_jobs=2, mix_rounds=3)
+    model = JubaModel.load_binary(BytesIO(classifier._backend.loaded))
+    self.assertEqual({'a': 4, 'b': 8}, model.data()[0][1][0])
+
+    classifier = _ShardClassifier.train_parallel(Config(method='PA'), dataset, n_jobs=4, model=classifier._backend.loaded)
+    model = JubaModel.load_binary(BytesIO(classifier._backend.loaded))
+    self.assertEqual({'a': 8, 'b': 16}, model.data()[0][1][0])
+
+  @requireEmbedded
+  def test_train_parallel(self):
+    data = [{'label': 'pos' if i % 2 == 0 else 'neg', 'x': 1.0 if i % 2 == 0 else -1.0} for i in range(20)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL, 'x': Schema.NUMBER}))
+    dataset = dataset.convert(lambda _: data)
+    classifier = Classifier.train_parallel(Config(method='PA'), dataset, n_jobs=2, mix_rounds=2)
+    for (idx, label, result) in classifier.classify(dataset):
+      self.assertEqual(label, result[0][0])
+
 class ConfigTest(TestCase):
   def test_simple(self):
     config = Config()
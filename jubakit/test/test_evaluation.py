@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from unittest import TestCase
+
+from jubakit.classifier import Schema, Dataset, Classifier, Config
+from jubakit.evaluation import cross_validate, _kfold
+
+from . import requireEmbedded
+from .stub import *
+
+class _MajorityClassifier(Classifier):
+  """
+  Classifier that always predicts the most frequent label.
+  """
+
+  @classmethod
+  def run(cls, config, port=None, embedded=False):
+    service = cls()
+    service._labels = []
+    return service
+
+  def train(self, dataset):
+    for (idx, (label, d)) in dataset:
+      self._labels.append(label)
+      yield (idx, label)
+
+  def classify(self, dataset, softmax=False):
+    major = max(sorted(set(self._labels)), key=self._labels.count)
+    for (idx, (label, d)) in dataset:
+      yield (idx, label, [(major, 1.0)])
+
+def _accuracy(y_true, y_pred):
+  return sum([1 for (t, p) in zip(y_true, y_pred) if t == p]) / len(y_true)
+
+class CrossValidateTest(TestCase):
+  def _dataset(self):
+    data = [{'label': 'a' if i < 6 else 'b', 'x': i} for i in range(10)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL, 'x': Schema.NUMBER}))
+    return dataset.convert(lambda _: data)
+
+  def test_kfold(self):
+    folds = _kfold(5, 2)
+    self.assertEqual([([2, 3, 4], [0, 1]), ([0, 1], [2, 3, 4])], folds)
+    self.assertRaises(RuntimeError, _kfold, 5, 1)
+    self.assertRaises(RuntimeError, _kfold, 5, 6)
+
+  def test_simple(self):
+    results = cross_validate(_MajorityClassifier, Config(), self._dataset(), 5, _accuracy)
+    self.assertEqual([0, 1, 2, 3, 4], [r['fold'] for r in results])
+    self.assertEqual([1.0, 1.0, 1.0, 0.0, 0.0], [r['score'] for r in results])
+    self.assertEqual([8] * 5, [r['train_size'] for r in results])
+    self.assertEqual([2] * 5, [r['test_size'] for r in results])
+    self.assertTrue(all([0 <= r['train_time'] and 0 <= r['test_time'] for r in results]))
+
+  def test_parallel(self):
+    dataset = self._dataset()
+    expected = cross_validate(_MajorityClassifier, Config(), dataset, 5, _accuracy)
+    for embedded in [False, True]:
+      results = cross_validate(_MajorityClassifier, Config(), dataset, 5, _accuracy, n_jobs=3, embedded=embedded)
+      self.assertEqual([r['score'] for r in expected], [r['score'] for r in results])
+
+  def test_folds(self):
+    folds = [([0, 1, 2, 3], [8, 9]), ([6, 7, 8, 9], [0, 1])]
+    results = cross_validate(_MajorityClassifier, Config(), self._dataset(), folds, _accuracy)
+    self.assertEqual([0.0, 0.0], [r['score'] for r in results])
+
+  def test_invalid(self):
+    dataset = Dataset(StubLoader(), Schema({'v': Schema.LABEL}), static=False)
+    self.assertRaises(RuntimeError, cross_validate, _MajorityClassifier, Config(), dataset, 2, _accuracy)
+    self.assertRaises(RuntimeError, cross_validate, _MajorityClassifier, Config(), self._dataset(), 2, _accuracy, 0)
+
+  @requireEmbedded
+  def test_embedded(self):
+    results = cross_validate(Classifier, Config(), self._dataset(), 2, _accuracy, n_jobs=2, embedded=True)
+    self.assertEqual(2, len(results))
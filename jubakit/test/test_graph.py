@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from unittest import TestCase
+
+from jubakit.graph import NodeSchema, EdgeSchema, NodeDataset, EdgeDataset, Graph, Config
+from jubakit.compat import *
+
+from . import requireEmbedded
+from .stub import *
+
+class _StubGraphClient(object):
+  def __init__(self):
+    self.nodes = {}
+    self.edges = []
+
+  def create_node(self):
+    node_id = unicode_t(len(self.nodes))
+    self.nodes[node_id] = {}
+    return node_id
+
+  def update_node(self, node_id, prop):
+    self.nodes[node_id].update(prop)
+    return True
+
+  def create_edge(self, node_id, e):
+    assert node_id == e.source
+    self.edges.append((e.source, e.target, e.property))
+    return len(self.edges) - 1
+
+  def get_centrality(self, node_id, centrality_type, query):
+    return float(len([e for e in self.edges if e[1] == node_id]))
+
+  def get_shortest_path(self, query):
+    return [query.source, query.target]
+
+class NodeSchemaTest(TestCase):
+  def test_simple(self):
+    schema = NodeSchema({'id': NodeSchema.ID, 'name': NodeSchema.PROPERTY, 'x': NodeSchema.IGNORE})
+    (node, prop) = schema.transform({'id': 1, 'name': 'foo', 'x': 'bar'})
+    self.assertEqual('1', node)
+    self.assertEqual({'name': 'foo'}, prop)
+
+  def test_fallback(self):
+    schema = NodeSchema({'id': NodeSchema.ID}, NodeSchema.PROPERTY)
+    (node, prop) = schema.transform({'id': 'a', 'k1': 1, 'k2': None})
+    self.assertEqual({'k1': '1'}, prop)
+
+  def test_illegal(self):
+    self.assertRaises(RuntimeError, NodeSchema, {'name': NodeSchema.PROPERTY})
+    self.assertRaises(RuntimeError, NodeSchema({'id': NodeSchema.ID}).transform, {'id': 'a', 'k': 'v'})
+    self.assertRaises(RuntimeError, NodeSchema({'id': NodeSchema.ID}, NodeSchema.PROPERTY).transform, {'k': 'v'})
+
+class EdgeSchemaTest(TestCase):
+  def test_simple(self):
+    schema = EdgeSchema({'src': EdgeSchema.SOURCE, 'dst': EdgeSchema.TARGET}, EdgeSchema.PROPERTY)
+    (source, target, prop) = schema.transform({'src': 1, 'dst': 2, 'weight': 0.5})
+    self.assertEqual(('1', '2'), (source, target))
+    self.assertEqual({'weight': '0.5'}, prop)
+
+  def test_illegal(self):
+    self.assertRaises(RuntimeError, EdgeSchema, {'src': EdgeSchema.SOURCE})
+    schema = EdgeSchema({'src': EdgeSchema.SOURCE, 'dst': EdgeSchema.TARGET})
+    self.assertRaises(RuntimeError, schema.transform, {'src': 1})
+
+class GraphTest(TestCase):
+  def _graph(self):
+    cli = _StubGraphClient()
+    graph = Graph()
+    graph._client = lambda: cli
+    return (graph, cli)
+
+  def _edges(self, edges):
+    schema = EdgeSchema({'src': EdgeSchema.SOURCE, 'dst': EdgeSchema.TARGET}, EdgeSchema.PROPERTY)
+    return EdgeDataset(StubLoader(), schema).convert(lambda _: [{'src': s, 'dst': t} for (s, t) in edges])
+
+  def test_simple(self):
+    graph = Graph()
+
+  @requireEmbedded
+  def test_embedded(self):
+    graph = Graph.run(Config(), embedded=True)
+
+  def test_add_nodes(self):
+    (graph, cli) = self._graph()
+    schema = NodeSchema({'v': NodeSchema.ID})
+    dataset = NodeDataset(StubLoader(), schema)
+    result = list(graph.add_nodes(dataset, chunk_size=2, pipeline=2))
+    self.assertEqual([(0, '1', '0'), (1, '2', '1'), (2, '3', '2')], result)
+    self.assertEqual('2', graph.get_node_id(3))
+    self.assertRaises(RuntimeError, graph.get_node_id, 4)
+
+    # existing nodes are updated
+    dataset = NodeDataset(StubLoader(), NodeSchema({'v': NodeSchema.ID}, NodeSchema.PROPERTY)).convert(lambda _: [{'v': 1, 'p': 'x'}])
+    self.assertEqual([(0, '1', '0')], list(graph.add_nodes(dataset)))
+    self.assertEqual({'p': 'x'}, cli.nodes['0'])
+    self.assertEqual(3, len(cli.nodes))
+
+    # duplicate nodes
+    dataset = NodeDataset(StubLoader(), schema).convert(lambda _: [{'v': 1}, {'v': 1}])
+    self.assertRaises(RuntimeError, list, graph.add_nodes(dataset))
+
+  def test_add_edges(self):
+    (graph, cli) = self._graph()
+    result = list(graph.add_edges(self._edges([('a', 'b'), ('b', 'c'), ('a', 'c')]), chunk_size=2))
+    self.assertEqual([(0, 0), (1, 1), (2, 2)], result)
+    self.assertEqual([('0', '1', {}), ('1', '2', {}), ('0', '2', {})], cli.edges)
+    self.assertEqual(3, len(cli.nodes))
+
+    self.assertRaises(RuntimeError, list, graph.add_edges(self._edges([('a', 'd')]), create_nodes=False))
+
+  def test_queries(self):
+    (graph, cli) = self._graph()
+    list(graph.add_edges(self._edges([('a', 'b'), ('b', 'c'), ('a', 'c')])))
+    self.assertEqual([0.0, 1.0, 2.0], graph.get_centralities(['a', 'b', 'c'], chunk_size=2, pipeline=2))
+    self.assertEqual([['a', 'c'], ['b', 'a']], graph.get_shortest_paths([('a', 'c'), ('b', 'a')]))
+    self.assertRaises(RuntimeError, graph.get_centralities, ['d'])
+
+class ConfigTest(TestCase):
+  def test_simple(self):
+    config = Config()
+    self.assertEqual('graph_wo_index', config['method'])
+    self.assertEqual(0.9, config['parameter']['damping_factor'])
+    self.assertTrue('converter' not in config)
+
+  def test_invalid_method(self):
+    self.assertRaises(RuntimeError, Config._default_parameter, 'invalid_method')
@@ -4,14 +4,21 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from unittest import TestCase
 from tempfile import NamedTemporaryFile as TempFile
+import tempfile
+import shutil
+import os
+import copy
 import json
+import base64
+
+import msgpack
 
 import jubatus
 
 from jubakit.model import \
     JubaDump, JubaModel, \
-    InvalidModelFormatError, UnsupportedTransformationError, \
-    _JubaModelCommand
+    InvalidModelFormatError, UnsupportedTransformationError, UnsupportedMergeError, \
+    _JubaModelCommand, _ModelCompression
 from jubakit.compat import *
 from jubakit._stdio import set_stdio, devnull
 
@@ -56,6 +63,28 @@ def _get_model(valid=True):
     m.header.crc32 = 0  # break the model file
   return m
 
+def _get_linear_model(diff, key2id, labels, method='AROW', tbl=None, version=0, doc_count=0):
+  """
+  Returns a linear classifier model whose storage is
+  ``[tbl_, class2id_, tbl_diff_, model_version_]``.  Weights trained since
+  the last MIX are held in ``tbl_diff_`` (``diff``); ``tbl_`` defaults to
+  zeros for the same entries as real models do.  ``doc_count`` is the
+  number of documents held in the weight manager.
+  """
+  m = _get_model()
+  m.system.config = json.dumps({'method': method, 'parameter': {'regularization_weight': 1.0}, 'converter': {}})
+  id2key = dict([(v, k) for (k, v) in key2id.items()])
+  if tbl is None:
+    tbl = dict([(f, dict([(cid, [0.0] * 3) for cid in cids])) for (f, cids) in diff.items()])
+  storage = [tbl, [key2id, id2key, len(key2id)], diff, [version]]
+  weight_manager = copy.deepcopy(TEST_JSON['user']['user_data'][1])
+  weight_manager[1][0] = doc_count
+  user_data = [[storage, [labels, {}, [1]]], weight_manager]
+  m._user_raw = msgpack.packb([1, user_data])
+  m.user = JubaModel.UserContainer.loads(m._user_raw)
+  m.fix_header()
+  return m
+
 def _get_json_file(valid=True):
   f = StringIO()
   _get_model(valid).dump_json(f)
@@ -121,9 +150,96 @@ class JubaModelTest(TestCase):
     self.assertEqual(TEST_JSON['user']['user_data'], m.user.user_data)
     self.assertTrue(m._user_raw is not None)
 
+  def test_compressed(self):
+    for codec in _ModelCompression.codecs():
+      f = BytesIO()
+      _get_model().dump_binary(f, codec)
+      self.assertNotEqual(_get_binary_file().read(), f.getvalue())
+
+      # compressed container must be loaded transparently
+      f.seek(0)
+      self.assertEqual(codec, _ModelCompression.detect(f))
+      m = JubaModel.load_binary(f, True)
+      self.assertEqual(TEST_JSON['user']['user_data'], m.user.user_data)
+
+      # must be predicted as binary
+      with TempFile() as tf:
+        tf.write(f.getvalue())
+        tf.flush()
+        self.assertEqual('binary', JubaModel.predict_format(tf.name))
+
+  def test_compressed_fix_header(self):
+    for codec in _ModelCompression.codecs():
+      f = BytesIO()
+      _get_model(False).dump_binary(f, codec)
+      f.seek(0)
+      m = JubaModel.load_binary(f, False)
+      m.header.system_data_size = 0
+      m.fix_header()
+
+      # must be dumped in the standard format
+      f = BytesIO()
+      m.dump_binary(f, None)
+      self.assertEqual(None, _ModelCompression.detect(f))
+      self.assertEqual(_get_binary_file().read(), f.getvalue())
+      f.seek(0)
+      JubaModel.load_binary(f, True)
+
+  def test_fix_header_without_raw(self):
+    m = _get_model()
+    m._user_raw = None
+    m.fix_header()
+    f = BytesIO()
+    m.dump_binary(f)
+    f.seek(0)
+    self.assertEqual(TEST_JSON['user']['user_data'], JubaModel.load_binary(f, True).user.user_data)
+
+  def test_compressed_broken(self):
+    f = BytesIO()
+    _get_model(False).dump_binary(f, 'gzip')
+    f.seek(0)
+    self.assertRaises(InvalidModelFormatError, JubaModel.load_binary, f, True)
+
+  def test_json_stream(self):
+    m = _get_model()
+
+    # must be a valid JSON document with the same records
+    f = StringIO()
+    m.dump_json(f)
+    record = json.loads(f.getvalue())
+    self.assertEqual(['header', 'system', 'user', 'user_raw'], sorted(record.keys()))
+    self.assertEqual(dict(m.header.get()), record['header'])
+    self.assertEqual(TEST_JSON['user_raw'], record['user_raw'])
+
+    # each section must be written as a record in JSON Lines format
+    f = StringIO()
+    m.dump_json(f, lines=True)
+    records = [json.loads(line) for line in f.getvalue().splitlines()]
+    self.assertEqual(['header', 'system', 'user_raw', 'user'], [list(r.keys())[0] for r in records])
+
+    # each chunk of raw model must be decoded independently
+    chunks = list(m._iter_user_raw_base64(3))
+    self.assertEqual(len(m._user_raw) // 3, len(chunks))
+    self.assertEqual(m._user_raw, b''.join([base64.b64decode(c) for c in chunks]))
+
+  def test_json_lines(self):
+    m = _get_model()
+    for without_raw in (False, True):
+      f = StringIO()
+      m.dump_json(f, without_raw, lines=True)
+      f.seek(0)
+      m2 = JubaModel.load_json(f)
+      self.assertEqual(m.header.get(), m2.header.get())
+      self.assertEqual(m.system.get(), m2.system.get())
+      self.assertEqual(TEST_JSON['user']['user_data'], m2.user.user_data)
+      if without_raw:
+        self.assertTrue(m2._user_raw is None)
+      else:
+        self.assertEqual(m._user_raw, m2._user_raw)
+
   def test_convert_matrix(self):
     for in_fmt in ('binary', 'json'):
-      for out_fmt in ('binary', 'json', 'text'):
+      for out_fmt in ('binary', 'json', 'jsonl', 'text', 'compressed'):
         # input
         if in_fmt == 'binary':
           m = JubaModel.load_binary(_get_binary_file())
@@ -136,11 +252,21 @@ class JubaModelTest(TestCase):
           m.dump_binary(f)
           f.seek(0)
           m2 = JubaModel.load_binary(f)
+        elif out_fmt == 'compressed':
+          f = BytesIO()
+          m.dump_binary(f, 'gzip')
+          f.seek(0)
+          m2 = JubaModel.load_binary(f)
         elif out_fmt == 'json':
           f = StringIO()
           m.dump_json(f)
           f.seek(0)
           m2 = JubaModel.load_json(f)
+        elif out_fmt == 'jsonl':
+          f = StringIO()
+          m.dump_json(f, lines=True)
+          f.seek(0)
+          m2 = JubaModel.load_json(f)
         elif out_fmt == 'text':
           m.dump_text(StringIO())
           continue
@@ -162,6 +288,96 @@ class JubaModelTest(TestCase):
     self.assertEqual('weight', m2.system.type)
     self.assertRaises(UnsupportedTransformationError, m2.transform, 'recommender')
 
+  def test_merge(self):
+    m1 = _get_linear_model({'f1': {0: [1.0, 0.5, 0.0]}}, {'x': 0}, {'x': 2})
+    m2 = _get_linear_model({'f1': {1: [3.0, 0.3, 0.0]}, 'f2': {0: [2.0, 0.2, 0.0]}}, {'y': 0, 'x': 1}, {'x': 1, 'y': 1})
+    m = JubaModel.merge([m1, m2])
+
+    # merged model must be valid
+    f = BytesIO()
+    m.dump_binary(f)
+    f.seek(0)
+    m = JubaModel.load_binary(f, True)
+
+    ((tbl, (key2id, id2key, next_id), diff, model_version), (labels, _, version)) = m.data()[0]
+    self.assertEqual({'x': 0, 'y': 1}, key2id)
+    self.assertEqual({0: 'x', 1: 'y'}, id2key)
+    self.assertEqual(2, next_id)
+    self.assertEqual([2.0, 0.4, 0.0], [round(v, 6) for v in tbl['f1'][0]])
+    self.assertEqual([1.0, 0.6, 0.0], [round(v, 6) for v in tbl['f2'][1]])  # covariance defaults to 1.0
+    self.assertEqual({}, diff)
+    self.assertEqual([1], model_version)
+    self.assertEqual({'x': 3, 'y': 1}, labels)
+    self.assertEqual([1], version)
+
+  def test_merge_tbl(self):
+    # Effective weights are tbl_ + tbl_diff_.
+    m1 = _get_linear_model({'f1': {0: [1.0, 0.0, 0.0]}}, {'x': 0}, {'x': 1}, 'PA', tbl={'f1': {0: [2.0, 0.0, 0.0]}}, version=3)
+    m2 = _get_linear_model({}, {'x': 0}, {'x': 1}, 'PA', tbl={'f1': {0: [1.0, 0.0, 0.0]}}, version=2)
+    (tbl, _, diff, model_version) = JubaModel.merge([m1, m2]).data()[0][0]
+    self.assertEqual([2.0, 0.0, 0.0], [round(v, 6) for v in tbl['f1'][0]])
+    self.assertEqual({}, diff)
+    self.assertEqual([4], model_version)
+
+  def test_merge_weights(self):
+    m1 = _get_linear_model({'f1': {0: [1.0, 0.0, 0.0]}}, {'x': 0}, {'x': 1}, 'PA')
+    m2 = _get_linear_model({'f1': {0: [4.0, 0.0, 0.0]}}, {'x': 0}, {'x': 1}, 'PA')
+    m = JubaModel.merge([m1, m2], [2, 1])
+    self.assertEqual([2.0, 0.0, 0.0], [round(v, 6) for v in m.data()[0][0][0]['f1'][0]])
+
+  def test_merge_example(self):
+    path = os.path.join(os.path.dirname(__file__), '..', '..', 'example', 'classifier_iris_model.jubatus')
+    if not os.path.exists(path):
+      self.skipTest('example model is not available')
+    with open(path, 'rb') as f:
+      m1 = JubaModel.load_binary(f)
+    (_, class2id, diff1, _) = m1.data()[0][0]
+
+    # Merging with a model with all-zero weights halves the trained weights.
+    with open(path, 'rb') as f:
+      m2 = JubaModel.load_binary(f)
+    (version, user_data) = msgpack.unpackb(m2._user_raw)
+    storage = user_data[0][0]
+    for table in (storage[0], storage[2]):
+      for cids in table.values():
+        for cid in cids.keys():
+          cids[cid] = [0.0, 0.0, 0.0]
+    m2._user_raw = msgpack.packb([version, user_data])
+    m2.user = JubaModel.UserContainer.loads(m2._user_raw)
+    m2.fix_header()
+    zero = JubaModel.merge([m1, m2])
+    (tbl, merged_class2id, diff, _) = zero.data()[0][0]
+    self.assertEqual({}, diff)
+    for (f, cids) in diff1.items():
+      for (cid, val3) in cids.items():
+        label = class2id[1][cid]
+        self.assertAlmostEqual(val3[0] / 2, tbl[f][merged_class2id[0][label]][0])
+
+  def test_merge_base(self):
+    # Statistics of the shared base model must be counted only once.
+    base = _get_linear_model({}, {'x': 0}, {'x': 10}, 'PA', doc_count=10)
+    models = [
+      _get_linear_model({}, {'x': 0}, {'x': 10 + i}, 'PA', doc_count=10 + i) for i in range(4)
+    ] + [_get_linear_model({}, {'x': 0, 'y': 1}, {'x': 10, 'y': 2}, 'PA', doc_count=12)]
+    m = JubaModel.merge(models, base=base)
+    ((_, (labels, _, _)), weight_manager) = m.data()
+    self.assertEqual({'x': 10 + 0 + 1 + 2 + 3, 'y': 2}, labels)
+    self.assertEqual(10 + 0 + 1 + 2 + 3 + 2, weight_manager[1][0])
+
+    # Without base, statistics are summed up.
+    (_, (labels, _, _)) = JubaModel.merge(models).data()[0]
+    self.assertEqual({'x': 56, 'y': 2}, labels)
+
+    self.assertRaises(UnsupportedMergeError, JubaModel.merge, models, None, _get_linear_model({}, {}, {}, 'AROW'))
+
+  def test_merge_invalid(self):
+    m1 = _get_linear_model({}, {}, {}, 'AROW')
+    m2 = _get_linear_model({}, {}, {}, 'PA')
+    self.assertRaises(UnsupportedMergeError, JubaModel.merge, [m1, m2])
+    self.assertRaises(UnsupportedMergeError, JubaModel.merge, [m1, m1], [1])
+    m3 = _get_linear_model({}, {}, {}, 'NN')
+    self.assertRaises(UnsupportedMergeError, JubaModel.merge, [m3, m3])
+
 class JubaModelCommandTest(TestCase):
   def _exit(self, args, status):
     return _JubaModelCommand.start(args)
@@ -177,6 +393,65 @@ class JubaModelCommandTest(TestCase):
       args = ['--in-format', 'binary', '--out-format', 'json', f.name]
       self.assertEqual(_JubaModelCommand.start(args), 0)
 
+  def test_compressed_param(self):
+    with TempFile() as f, TempFile() as out:
+      f.write(_get_binary_file().read())
+      f.flush()
+      args = ['--out-format', 'compressed', '--compression', 'gzip', '--output', out.name, f.name]
+      self.assertEqual(_JubaModelCommand.start(args), 0)
+      args = ['--fix-header', '--out-format', 'binary', '--output', out.name, out.name]
+      self.assertEqual(_JubaModelCommand.start(args), 0)
+      self.assertEqual(_get_binary_file().read(), out.read())
+
+      # output file must be specified
+      args = ['--out-format', 'compressed', f.name]
+      self.assertNotEqual(_JubaModelCommand.start(args), 0)
+
+  def test_merge_param(self):
+    m = _get_linear_model({'f1': {0: [1.0, 0.5, 0.0]}}, {'x': 0}, {'x': 2})
+    with TempFile() as f, TempFile() as out:
+      m.dump_binary(f)
+      f.flush()
+      args = ['--merge', '--out-format', 'binary', '--output', out.name, f.name, f.name]
+      self.assertEqual(_JubaModelCommand.start(args), 0)
+      args = ['--merge', '--merge-weights', '1,2', '--out-format', 'binary', '--output', out.name, f.name, f.name]
+      self.assertEqual(_JubaModelCommand.start(args), 0)
+
+      # number of weights must match
+      args = ['--merge', '--merge-weights', '1', f.name, f.name]
+      self.assertNotEqual(_JubaModelCommand.start(args), 0)
+
+      # multiple files cannot be specified without --merge
+      args = [f.name, f.name]
+      self.assertNotEqual(_JubaModelCommand.start(args), 0)
+
+  def test_batch(self):
+    indir = tempfile.mkdtemp()
+    outdir = tempfile.mkdtemp()
+    try:
+      for i in range(3):
+        with open(os.path.join(indir, 'model{0}.jubatus'.format(i)), 'wb') as f:
+          _get_model(False).dump_binary(f)
+
+      # directory
+      args = ['--no-validate', '--fix-header', '--jobs', '2', '-o', 'binary', '-O', outdir, indir]
+      self.assertEqual(_JubaModelCommand.start(args), 0)
+      self.assertEqual(3, len(os.listdir(outdir)))
+      for name in os.listdir(outdir):
+        with open(os.path.join(outdir, name), 'rb') as f:
+          JubaModel.load_binary(f, True)
+
+      # glob pattern; model files with broken header must fail
+      args = ['-o', 'binary', '-O', outdir, os.path.join(indir, 'model*.jubatus')]
+      self.assertEqual(_JubaModelCommand.start(args), 3)
+
+      # output must be a directory
+      args = ['-o', 'binary', '-O', os.path.join(outdir, 'model0.jubatus'), indir]
+      self.assertNotEqual(_JubaModelCommand.start(args), 0)
+    finally:
+      shutil.rmtree(indir)
+      shutil.rmtree(outdir)
+
   def test_invalid_param(self):
     with TempFile() as f:
       args = ['--in-format', 'none', f.name]
@@ -7,8 +7,10 @@ import sys
 import warnings
 from unittest import TestCase
 
+from jubatus.nearest_neighbor.types import IdWithScore
+
 from jubakit.nearest_neighbor import Schema, Dataset, NearestNeighbor, Config
-from . import requireEmbedded
+from . import requireEmbedded, requireNumpy
 from .stub import StubLoader
 
 
@@ -46,6 +48,24 @@ class DatasetTest(TestCase):
         self.assertEqual(['v', 1.0], dataset[0][1].num_values[0])
 
 
+class _StubNearestNeighborClient(object):
+    def __init__(self):
+        self.rows = []
+
+    def set_row(self, row_id, d):
+        self.rows.append(row_id)
+        return True
+
+    # Returns all rows unsorted, as if merged from multiple servers.
+    def neighbor_row_from_datum(self, d, size):
+        v = d.num_values[0][1]
+        return [IdWithScore(r, abs(float(r) - v)) for r in self.rows]
+
+    def similar_row_from_datum(self, d, size):
+        v = d.num_values[0][1]
+        return [IdWithScore(r, -abs(float(r) - v)) for r in self.rows]
+
+
 class NearestNeighborTest(TestCase):
     def test_simple(self):
         nearest_neighbor = NearestNeighbor()
@@ -66,6 +86,41 @@ class NearestNeighborTest(TestCase):
             self.assertEqual(result, True)
         nearest_neighbor.stop()
 
+    def test_set_row_bulk(self):
+        cli = _StubNearestNeighborClient()
+        nearest_neighbor = NearestNeighbor()
+        nearest_neighbor._client = lambda: cli
+        dataset = Dataset(StubLoader(), Schema({'v': Schema.ID}))
+        stats = list(nearest_neighbor.set_row_bulk(dataset, chunk_size=2))
+        self.assertEqual([2, 1], [s['succeeded'] for s in stats])
+        self.assertEqual([[], []], [s['failed'] for s in stats])
+        self.assertEqual(['1', '2', '3'], sorted(cli.rows))
+
+    @requireNumpy
+    def test_row_array(self):
+        import numpy as np
+        cli = _StubNearestNeighborClient()
+        cli.rows = ['3', '1', '2']
+        nearest_neighbor = NearestNeighbor()
+        nearest_neighbor._client = lambda: cli
+        dataset = Dataset(StubLoader(), Schema({'v': Schema.NUMBER}))
+
+        (ids, scores) = nearest_neighbor.neighbor_row_array(
+            dataset, size=2, chunk_size=2)
+        self.assertEqual((3, 2), ids.shape)
+        self.assertEqual([['1', '2'], ['2', '3'], ['3', '2']], ids.tolist())
+        self.assertEqual([[0.0, 1.0], [0.0, 1.0], [0.0, 1.0]],
+                         scores.tolist())
+
+        (ids, scores) = nearest_neighbor.similar_row_array(
+            dataset, size=4, pipeline=1)
+        self.assertEqual(['1', '2', '3', None], ids.tolist()[0])
+        self.assertEqual([0.0, -1.0, -2.0, -np.inf], scores.tolist()[0])
+
+        (ids, scores) = nearest_neighbor.neighbor_row_array(dataset[[]])
+        self.assertEqual((0, 10), ids.shape)
+        self.assertEqual((0, 10), scores.shape)
+
     def test_neighbor_row_from_id(self):
         filter_warning()
         nearest_neighbor = NearestNeighbor.run(Config())
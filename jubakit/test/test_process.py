@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from unittest import TestCase
+import sys
+import os
+import socket
+import subprocess
+
+from jubakit._process import _ServiceBackend
+
+class _StubServiceBackend(_ServiceBackend):
+  """
+  Backend that does not start a server process; a new port is assigned on
+  each start if not specified.
+  """
+
+  _next_port = 10000
+
+  @classmethod
+  def _check_installed(cls, name):
+    pass
+
+  def _start(self):
+    if self.port is None:
+      _StubServiceBackend._next_port += 1
+      self.port = _StubServiceBackend._next_port
+    return (True, None)
+
+  def _stop(self):
+    return (0, '')
+
+class ServiceBackendTest(TestCase):
+  def test_get_free_port(self):
+    port = _ServiceBackend._get_free_port()
+    self.assertTrue(10000 <= port <= 30000)
+    self.assertTrue(_ServiceBackend._is_port_free(port))
+
+  def test_is_port_free(self):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+      sock.bind(('127.0.0.1', 0))
+      sock.listen(1)
+      port = sock.getsockname()[1]
+      self.assertFalse(_ServiceBackend._is_port_free(port))
+      self.assertTrue(_ServiceBackend._is_listening(os.getpid(), port))
+    finally:
+      sock.close()
+
+  def test_wait_until_listening(self):
+    port = _ServiceBackend._get_free_port()
+    code = 'import socket, time; s = socket.socket(); s.bind(("127.0.0.1", {0})); s.listen(1); time.sleep(10)'.format(port)
+    proc = subprocess.Popen([sys.executable, '-c', code])
+    try:
+      self.assertTrue(_ServiceBackend._wait_until_listening(proc, port))
+    finally:
+      proc.kill()
+      proc.communicate()
+
+    # process exited without listening
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    self.assertFalse(_ServiceBackend._wait_until_listening(proc, port))
+    proc.communicate()
+
+    # process running without listening
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(10)'])
+    try:
+      self.assertEqual(None, _ServiceBackend._wait_until_listening(proc, port, 0.1))
+    finally:
+      proc.kill()
+      proc.communicate()
+
+  def test_check_installed(self):
+    self.assertRaises(RuntimeError, _ServiceBackend._check_installed, '_no_such_service')
+    self.assertFalse('_no_such_service' in _ServiceBackend._installed)
+
+  def test_restart(self):
+    # specified port must be reused
+    backend = _StubServiceBackend('classifier', {}, 12345)
+    backend.restart({'method': 'PA'})
+    self.assertEqual(12345, backend.port)
+    self.assertEqual({'method': 'PA'}, backend.config)
+
+    # auto-selected port is selected again
+    backend = _StubServiceBackend('classifier', {})
+    port = backend.port
+    backend.restart({})
+    self.assertNotEqual(port, backend.port)
@@ -43,14 +43,78 @@ class DatasetTest(TestCase):
     dataset = Dataset(loader, None)  # predict
     self.assertEqual(['v', 1.0], dataset[0][1].num_values[0])
 
+class _StubRecommenderClient(object):
+  def __init__(self, fail):
+    self.fail = fail
+    self.rows = {}
+    self.queries = 0
+
+  def update_row(self, row_id, d):
+    if 0 < self.fail.get(row_id, 0):
+      self.fail[row_id] -= 1
+      raise RuntimeError('stub error')
+    self.rows[row_id] = d
+    return True
+
+  def similar_row_from_id(self, row_id, size):
+    self.queries += 1
+    return [(r, 1.0) for r in sorted(self.rows.keys())[:size]]
+
 class RecommenderTest(TestCase):
   def test_simple(self):
     recommender = Recommender()
 
+  def test_update_row_bulk(self):
+    fail = {'2': 1, '3': 10}
+    cli = _StubRecommenderClient(fail)
+    recommender = Recommender()
+    recommender._client = lambda: cli
+    dataset = Dataset(StubLoader(), Schema({'v': Schema.ID}))
+
+    stats = list(recommender.update_row_bulk(dataset, chunk_size=2, pipeline=2, retries=2, backoff=0))
+    self.assertEqual([0, 1], [s['chunk'] for s in stats])
+    self.assertEqual([2, 1], [s['size'] for s in stats])
+    self.assertEqual([2, 0], [s['succeeded'] for s in stats])
+    self.assertEqual([1, 2], [s['retried'] for s in stats])
+    self.assertEqual([(2, '3')], [(idx, row_id) for (idx, row_id, _) in stats[1]['failed']])
+    self.assertEqual(['1', '2'], sorted(cli.rows.keys()))
+
+    # dataset must have id
+    dataset = Dataset(StubLoader(), Schema({'v': Schema.NUMBER}))
+    self.assertRaises(RuntimeError, list, recommender.update_row_bulk(dataset))
+
   @requireEmbedded
   def test_embedded(self):
     recommender = Recommender.run(Config(), embedded=True)
 
+  def test_similar_row_from_id_cache(self):
+    cli = _StubRecommenderClient({})
+    recommender = Recommender()
+    recommender._client = lambda: cli
+    self.assertEqual(None, recommender.cache_stats())
+    recommender.enable_cache(size=2)
+    dataset = Dataset(StubLoader(), Schema({'v': Schema.ID}))
+
+    list(recommender.update_row(dataset[[0]]))
+    for _ in range(2):
+      result = list(recommender.similar_row_from_id(dataset, size=1))
+      self.assertEqual([(0, '1', [('1', 1.0)]), (1, '2', [('1', 1.0)]), (2, '3', [('1', 1.0)])], result)
+    self.assertEqual(6, cli.queries)  # LRU evicts entries before reuse
+    self.assertEqual({'hits': 0, 'misses': 6, 'invalidations': 1, 'size': 2}, recommender.cache_stats())
+
+    list(recommender.similar_row_from_id(dataset[[2, 2]], size=1))
+    self.assertEqual(6, cli.queries)
+    self.assertEqual(2, recommender.cache_stats()['hits'])
+
+    # updates invalidate the cache
+    list(recommender.update_row(dataset[[1]]))
+    result = list(recommender.similar_row_from_id(dataset[[2]], size=2))
+    self.assertEqual([(0, '3', [('1', 1.0), ('2', 1.0)])], result)
+    self.assertEqual(7, cli.queries)
+
+    recommender.disable_cache()
+    self.assertEqual(None, recommender.cache_stats())
+
   def test_clear_row(self):
     recommender = Recommender.run(Config())
     loader = StubLoader()
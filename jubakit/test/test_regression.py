@@ -179,10 +179,30 @@ class DatasetTest(TestCase):
     data = np.array([1, 2, 3, 4, 5, 6])
     return csr_matrix((data, (row, col)), shape=(3, 3))
 
+class _StubRegressionClient(object):
+  def __init__(self):
+    self.calls = 0
+
+  def estimate(self, data):
+    self.calls += 1
+    return [d.num_values[0][1] * 2 for d in data]
+
 class RegressionTest(TestCase):
   def test_simple(self):
     regression = Regression()
 
+  def test_estimate_batch(self):
+    cli = _StubRegressionClient()
+    regression = Regression()
+    regression._client = lambda: cli
+    dataset = Dataset.from_array([[1.0], [-2.0], [3.0]], [1.0, 2.0, 3.0])
+    expected = [(0, 1.0, 2.0), (1, 2.0, -4.0), (2, 3.0, 6.0)]
+    self.assertEqual(expected, list(regression.estimate(dataset)))
+    self.assertEqual(3, cli.calls)
+    cli.calls = 0
+    self.assertEqual(expected, list(regression.estimate(dataset, batch_size=2)))
+    self.assertEqual(2, cli.calls)
+
   @requireEmbedded
   def test_embedded(self):
     regression = Regression.run(Config(), embedded=True)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from unittest import TestCase
+
+from jubakit.classifier import Schema, Dataset, Classifier, Config
+from jubakit.search import config_grid, search
+
+from .stub import *
+
+class _WeightClassifier(Classifier):
+  """
+  Classifier that predicts its regularization weight as a label.
+  """
+
+  @classmethod
+  def run(cls, config, port=None, embedded=False):
+    service = cls()
+    service._config = config
+    return service
+
+  def train(self, dataset):
+    for (idx, (label, d)) in dataset:
+      yield (idx, label)
+
+  def classify(self, dataset, softmax=False):
+    weight = self._config['parameter']['regularization_weight']
+    for (idx, (label, d)) in dataset:
+      yield (idx, label, [(weight, 1.0)])
+
+class _RecordingClassifier(_WeightClassifier):
+  """
+  Classifier that records labels trained by each candidate.
+  """
+
+  trained = []
+
+  def train(self, dataset):
+    labels = set()
+    for (idx, (label, d)) in dataset:
+      labels.add(label)
+      yield (idx, label)
+    self.trained.append(labels)
+
+def _weight(y_true, y_pred):
+  return y_pred[0]
+
+class ConfigGridTest(TestCase):
+  def test_simple(self):
+    configs = config_grid(Config)
+    self.assertEqual([Config()], configs)
+
+  def test_grid(self):
+    configs = config_grid(Config, ['AROW', 'PA'], {'regularization_weight': [0.1, 1.0]})
+    self.assertEqual(3, len(configs))
+    self.assertEqual(['AROW', 'AROW', 'PA'], [c['method'] for c in configs])
+    self.assertEqual([0.1, 1.0], [c['parameter']['regularization_weight'] for c in configs[:2]])
+    self.assertTrue('parameter' not in configs[2])
+
+  def test_converter(self):
+    converters = [{'num_rules': [{'key': '*', 'type': 'num'}]}, {'num_rules': [{'key': '*', 'type': 'log'}]}]
+    configs = config_grid(Config, ['AROW'], {'regularization_weight': [0.1, 1.0]}, converters)
+    self.assertEqual(4, len(configs))
+    self.assertEqual(['num', 'log', 'num', 'log'], [c['converter']['num_rules'][0]['type'] for c in configs])
+    self.assertTrue('string_rules' in configs[0]['converter'])
+
+class SearchTest(TestCase):
+  def _dataset(self):
+    data = [{'label': 'a', 'x': i} for i in range(27)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL, 'x': Schema.NUMBER}))
+    return dataset.convert(lambda _: data)
+
+  def _configs(self, weights):
+    return config_grid(Config, ['AROW'], {'regularization_weight': weights})
+
+  def test_simple(self):
+    dataset = self._dataset()
+    results = search(_WeightClassifier, self._configs([0.1, 3.0, 1.0]), dataset, dataset, _weight)
+    self.assertEqual([3.0, 1.0, 0.1], [r['score'] for r in results])
+    self.assertEqual([27] * 3, [r['budget'] for r in results])
+
+    results = search(_WeightClassifier, self._configs([0.1, 3.0, 1.0]), dataset, dataset, _weight, greater_is_better=False)
+    self.assertEqual([0.1, 1.0, 3.0], [r['score'] for r in results])
+
+  def test_halving(self):
+    dataset = self._dataset()
+    weights = [float(x) for x in range(9)]
+    results = search(_WeightClassifier, self._configs(weights), dataset, dataset, _weight, eta=3)
+    self.assertEqual(9, len(results))
+    self.assertEqual([8.0, 7.0, 6.0, 5.0, 4.0, 3.0, 2.0, 1.0, 0.0], [r['score'] for r in results])
+    self.assertEqual([2, 1, 1, 0, 0, 0, 0, 0, 0], [r['round'] for r in results])
+    self.assertEqual([27, 9, 9, 3, 3, 3, 3, 3, 3], [r['budget'] for r in results])
+
+  def test_halving_shuffle(self):
+    # Early rounds must see all labels of the dataset sorted by labels.
+    data = [{'label': 'a' if i < 9 else 'b', 'x': i} for i in range(27)]
+    dataset = Dataset(StubLoader(), Schema({'label': Schema.LABEL, 'x': Schema.NUMBER})).convert(lambda _: data)
+    _RecordingClassifier.trained = []
+    results = search(_RecordingClassifier, self._configs([0.1, 3.0, 1.0]), dataset, dataset, _weight, eta=3, seed=0)
+    self.assertEqual([27, 9, 9], [r['budget'] for r in results])
+    self.assertEqual([set(['a', 'b'])] * 4, _RecordingClassifier.trained)
+
+  def test_parallel(self):
+    dataset = self._dataset()
+    weights = [float(x) for x in range(9)]
+    expected = search(_WeightClassifier, self._configs(weights), dataset, dataset, _weight, eta=3)
+    for embedded in [False, True]:
+      results = search(_WeightClassifier, self._configs(weights), dataset, dataset, _weight, n_jobs=3, embedded=embedded, eta=3)
+      self.assertEqual(expected, results)
+
+  def test_invalid(self):
+    dataset = self._dataset()
+    self.assertRaises(RuntimeError, search, _WeightClassifier, [], dataset, dataset, _weight)
+    self.assertRaises(RuntimeError, search, _WeightClassifier, [Config()], dataset, dataset, _weight, n_jobs=0)
+    self.assertRaises(RuntimeError, search, _WeightClassifier, [Config()], dataset, dataset, _weight, eta=1)
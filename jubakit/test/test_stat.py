@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from unittest import TestCase
+
+from jubakit.stat import Schema, Dataset, Stat, Config
+from jubakit.compat import *
+
+from . import requireEmbedded, requireNumpy
+from .stub import *
+
+class _StubStatClient(object):
+  """
+  Stat client whose window holds the last `window_size` values pushed for
+  any key, as Jubatus does.
+  """
+
+  def __init__(self, window_size=128):
+    self.pushes = []
+    self.window_size = window_size
+
+  @property
+  def values(self):
+    values = {}
+    for (key, value) in self.pushes[-self.window_size:]:
+      values.setdefault(key, []).append(value)
+    return values
+
+  def push(self, key, value):
+    if key == 'error':
+      raise RuntimeError('stub error')
+    self.pushes.append((key, value))
+    return True
+
+  def sum(self, key):
+    return sum(self.values.get(key, []))
+
+  def max(self, key):
+    return max(self.values.get(key, [0.0]))
+
+class SchemaTest(TestCase):
+  def test_simple(self):
+    schema = Schema({'name': Schema.KEY, 'x': Schema.VALUE})
+    self.assertEqual(('a', 1.5), schema.transform({'name': 'a', 'x': '1.5'}))
+
+  def test_illegal(self):
+    self.assertRaises(RuntimeError, Schema, {'name': Schema.KEY})
+    self.assertRaises(RuntimeError, Schema({'name': Schema.KEY, 'x': Schema.VALUE}).transform, {'name': 'a'})
+
+class StatTest(TestCase):
+  def _stat(self):
+    cli = _StubStatClient()
+    stat = Stat()
+    stat._client = lambda: cli
+    return (stat, cli)
+
+  def test_simple(self):
+    stat = Stat()
+
+  @requireEmbedded
+  def test_embedded(self):
+    stat = Stat.run(Config(), embedded=True)
+    self.assertEqual(128, stat._window_size)
+
+  def test_push(self):
+    (stat, cli) = self._stat()
+    pairs = [('a', 1), ('b', 2), ('a', 3), ('a', 4), ('b', 5)]
+    self.assertEqual({'pushed': 5, 'skipped': 0}, stat.push(pairs, chunk_size=2))
+    self.assertEqual([('a', 1.0), ('b', 2.0), ('a', 3.0), ('a', 4.0), ('b', 5.0)], cli.pushes)
+
+  def test_push_window(self):
+    (stat, cli) = self._stat()
+    cli.window_size = 2
+    pairs = [('a', 1), ('b', 2), ('a', 3), ('a', 4), ('b', 5)]
+    self.assertEqual({'pushed': 2, 'skipped': 3}, stat.push(pairs, chunk_size=2, window_size=2))
+    self.assertEqual([('a', 4.0), ('b', 5.0)], cli.pushes)
+
+    cli.pushes = []
+    self.assertEqual({'pushed': 5, 'skipped': 0}, stat.push(pairs, window_size=5))
+
+  def test_push_window_interleaved(self):
+    pairs = [('a', 1), ('b', 1), ('a', 2), ('a', 3)]
+    (stat, cli) = self._stat()
+    cli.window_size = 2
+    stat.push(pairs, window_size=2)
+    self.assertEqual(0, stat.query(['b'], ['sum'])['b']['sum'])
+    self.assertEqual({'a': [2.0, 3.0]}, cli.values)
+
+    # pre-aggregation must not change the window of the server
+    for window_size in range(1, 6):
+      (stat, cli) = self._stat()
+      (expected, expected_cli) = self._stat()
+      cli.window_size = expected_cli.window_size = window_size
+      cli.pushes = expected_cli.pushes = [('c', 9.0)]
+      stat.push(pairs, chunk_size=3, window_size=window_size)
+      expected.push(pairs)
+      self.assertEqual(expected_cli.values, cli.values)
+
+  def test_push_dataset(self):
+    (stat, cli) = self._stat()
+    schema = Schema({'k': Schema.KEY, 'v': Schema.VALUE})
+    dataset = Dataset(StubLoader(), schema).convert(lambda _: [{'k': 'a', 'v': 1}, {'k': 'b', 'v': '2'}])
+    stat.push(dataset)
+    self.assertEqual({'a': [1.0], 'b': [2.0]}, cli.values)
+
+  @requireNumpy
+  def test_push_array(self):
+    import numpy as np
+    (stat, cli) = self._stat()
+    stat.push(np.array(['a', 'b', 'a']), np.array([1.0, 2.0, 3.0]))
+    self.assertEqual({'a': [1.0, 3.0], 'b': [2.0]}, cli.values)
+
+  def test_push_error(self):
+    (stat, cli) = self._stat()
+    self.assertRaises(RuntimeError, stat.push, [('a', 1), ('error', 1)])
+
+  def test_query(self):
+    (stat, cli) = self._stat()
+    stat.push([('a', 1), ('b', 2), ('a', 3)])
+    result = stat.query(['a', 'b', 'c'], ['sum', 'max'], chunk_size=2)
+    self.assertEqual({
+      'a': {'sum': 4.0, 'max': 3.0},
+      'b': {'sum': 2.0, 'max': 2.0},
+      'c': {'sum': 0, 'max': 0.0},
+    }, result)
+    self.assertRaises(RuntimeError, stat.query, ['a'], ['unknown'])
+
+class ConfigTest(TestCase):
+  def test_simple(self):
+    self.assertEqual({'window_size': 128}, dict(Config()))
+    self.assertEqual({'window_size': 10}, dict(Config(window_size=10)))
+    self.assertEqual({'window_size': 128}, Config.default())
@@ -4,10 +4,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from unittest import TestCase
 
+from jubatus.weight.types import Feature
+
 from jubakit.weight import Schema, Dataset, Weight, Config
 from jubakit.compat import *
 
-from . import requireEmbedded
+from . import requireEmbedded, requireScipy
 from .stub import *
 
 class SchemaTest(TestCase):
@@ -31,10 +33,70 @@ class DatasetTest(TestCase):
     self.assertEqual('k2', d.num_values[0][0])
     self.assertEqual(456, d.num_values[0][1])
 
+class _StubWeightClient(object):
+  def calc_weight(self, d):
+    return [Feature(k, v) for (k, v) in d.num_values]
+
 class WeightTest(TestCase):
+  def _weight(self):
+    weight = Weight()
+    cli = _StubWeightClient()
+    weight._client = lambda: cli
+    return weight
+
+  def _dataset(self, rows):
+    schema = Schema({}, Schema.NUMBER)
+    return Dataset(StubLoader(), schema).convert(lambda _: rows)
+
   def test_simple(self):
     weight = Weight()
 
+  def test_calc_weight(self):
+    weight = self._weight()
+    dataset = self._dataset([{'a': 1}, {'b': 2}, {'a': 3}])
+    expected = [(0, [('a', 1.0)]), (1, [('b', 2.0)]), (2, [('a', 3.0)])]
+    for (chunk_size, pipeline) in [(1, 1), (2, 3)]:
+      result = [(idx, [(f.key, f.value) for f in r]) for (idx, r) in weight.calc_weight(dataset, chunk_size, pipeline)]
+      self.assertEqual(expected, result)
+
+  @requireScipy
+  def test_feature_matrix(self):
+    import scipy.sparse
+    weight = self._weight()
+    dataset = self._dataset([{'a': 1}, {'a': 3, 'b': 2}])
+    (matrix, features) = weight.feature_matrix(dataset)
+    self.assertTrue(scipy.sparse.isspmatrix_csr(matrix))
+    self.assertEqual(['a', 'b'], features)
+    self.assertEqual([[1.0, 0.0], [3.0, 2.0]], matrix.toarray().tolist())
+
+    (matrix, features) = weight.feature_matrix(dataset, ['b', 'c'])
+    self.assertEqual([[0.0, 0.0], [2.0, 0.0]], matrix.toarray().tolist())
+
+  @requireScipy
+  def test_calc_l2norm(self):
+    weight = self._weight()
+    norms = weight.calc_l2norm(self._dataset([{'a': 3, 'b': 4}, {'a': 1}, {}]))
+    self.assertEqual([5.0, 1.0, 0.0], norms.tolist())
+
+  @requireScipy
+  def test_calc_similarity(self):
+    import numpy as np
+    weight = self._weight()
+    lhs = self._dataset([{'a': 1}, {'a': 1, 'b': 1}, {}])
+    rhs = self._dataset([{'b': 2}, {'a': 2}, {'a': 1}])
+
+    sim = weight.calc_similarity(lhs)
+    self.assertEqual((3, 3), sim.shape)
+    self.assertTrue(np.allclose([[1.0, 0.5 ** 0.5, 0.0], [0.5 ** 0.5, 1.0, 0.0], [0.0, 0.0, 0.0]], sim))
+
+    sim = weight.calc_similarity(lhs, rhs)
+    self.assertTrue(np.allclose([[0.0, 1.0, 1.0], [0.5 ** 0.5, 0.5 ** 0.5, 0.5 ** 0.5], [0.0, 0.0, 0.0]], sim))
+
+    sim = weight.calc_similarity(lhs, rhs, paired=True)
+    self.assertTrue(np.allclose([0.0, 0.5 ** 0.5, 0.0], sim))
+
+    self.assertRaises(RuntimeError, weight.calc_similarity, lhs, self._dataset([{'a': 1}]), True)
+
   @requireEmbedded
   def test_embedded(self):
     weight = Weight.run(Config(), embedded=True)
@@ -2,6 +2,8 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import warnings
+from io import BytesIO
 from unittest import TestCase
 
 try:
@@ -9,6 +11,7 @@ try:
 except ImportError:
   pass
 
+from jubakit.model import JubaModel
 from jubakit.wrapper.classifier import LinearClassifier, NearestNeighborsClassifier
 from . import requireEmbedded
 
@@ -65,6 +68,64 @@ class LinearClassifierTest(TestCase):
     y_pred = classifier.decision_function(X)
     self.assertEqual(y_pred.shape, (X.shape[0], c.shape[0]))
 
+  @requireEmbedded
+  def test_fit_reuse(self):
+    X = np.array([[1,1], [0,0]])
+    y = np.array([1,2])
+    classifier = LinearClassifier()
+    classifier.fit(X, y)
+    backend = classifier.classifier_
+    classifier.fit(X, y)
+    self.assertTrue(backend is classifier.classifier_)
+    classifier.set_params(softmax=True)
+    classifier.fit(X, y)
+    self.assertTrue(backend is classifier.classifier_)
+    classifier.set_params(regularization_weight=2.0)
+    classifier.fit(X, y)
+    self.assertTrue(backend is not classifier.classifier_)
+
+  @requireEmbedded
+  def test_n_jobs(self):
+    X = np.array([[1,1], [0,0], [1,0], [0,1]] * 10)
+    y = np.array([1,2,1,2] * 10)
+    classifier = LinearClassifier(n_jobs=2, n_iter=2)
+    classifier._BATCH_SIZE = 10
+    classifier.fit(X, y)
+    self.assertEqual(classifier.predict(X).shape[0], X.shape[0])
+    self.assertTrue(np.array_equal(classifier.decision_function(X), LinearClassifier.decision_function(
+      classifier.set_params(n_jobs=1), X)))
+    self.assertRaises(RuntimeError, LinearClassifier(n_jobs=2, embedded=False).fit, X, y)
+
+  @requireEmbedded
+  def test_partial_fit_n_jobs(self):
+    # Label counts must not be multiplied by n_jobs on each merge.
+    X = np.array([[1,1], [0,0], [1,0], [0,1]] * 5)
+    y = np.array([1,2,1,2] * 5)
+    classifier = LinearClassifier(n_jobs=2, n_iter=2)
+    classifier.partial_fit(X, y)
+    classifier.partial_fit(X, y)
+    model = JubaModel.load_binary(BytesIO(classifier.classifier_.snapshot()))
+    self.assertEqual({'1': 40, '2': 40}, model.data()[0][1][0])
+
+  @requireEmbedded
+  def test_predict_proba(self):
+    X = np.array([[1,1], [0,0], [1,0]])
+    y = np.array([1,2,1])
+    classifier = LinearClassifier()
+    classifier.fit(X, y)
+    proba = classifier.predict_proba(X)
+    self.assertEqual(proba.shape, (X.shape[0], 2))
+    self.assertTrue(np.allclose(proba.sum(axis=1), 1.0))
+    self.assertTrue(np.array_equal(classifier.classes_[proba.argmax(axis=1)], classifier.predict(X)))
+
+  def test_softmax(self):
+    inf = float('inf')
+    scores = np.array([[0.0, -inf], [-inf, -inf], [1.0, 1.0]])
+    proba = LinearClassifier._softmax(scores)
+    self.assertFalse(np.isnan(proba).any())
+    self.assertTrue(np.allclose([[1.0, 0.0], [0.5, 0.5], [0.5, 0.5]], proba))
+    self.assertTrue(np.isneginf(scores[1]).all())
+
   @requireEmbedded
   def test_class_params(self):
     classifier = LinearClassifier()
@@ -83,7 +144,8 @@ class LinearClassifierTest(TestCase):
       'n_iter': 5,
       'shuffle': True,
       'embedded': True,
-      'seed': 42
+      'seed': 42,
+      'n_jobs': 2
     }
     classifier = LinearClassifier(**params)
     self.assertDictEqual(params, classifier.get_params())
@@ -170,6 +232,17 @@ class NearestNeighborsClassifierTest(TestCase):
     y_pred = classifier.decision_function(X)
     self.assertEqual(y_pred.shape, (X.shape[0], c.shape[0]))
 
+  @requireEmbedded
+  def test_n_jobs(self):
+    X = np.array([[1,1], [0,0], [1,0], [0,1]])
+    y = np.array([1,2,1,2])
+    classifier = NearestNeighborsClassifier(n_jobs=2)
+    with warnings.catch_warnings(record=True) as w:
+      warnings.simplefilter('always')
+      classifier.fit(X, y)
+    self.assertEqual(1, len(w))
+    self.assertTrue(np.array_equal(y, classifier.predict(X)))
+
   @requireEmbedded
   def test_class_params(self):
     classifier = NearestNeighborsClassifier()
@@ -190,7 +263,8 @@ class NearestNeighborsClassifierTest(TestCase):
       'n_iter': 5,
       'shuffle': True,
       'embedded': True,
-      'seed': 42
+      'seed': 42,
+      'n_jobs': 2
     }
     classifier = NearestNeighborsClassifier(**params)
     self.assertDictEqual(params, classifier.get_params())
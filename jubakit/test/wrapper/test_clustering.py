@@ -9,7 +9,9 @@ try:
 except ImportError:
   pass
 
-from jubakit.wrapper.clustering import KMeans, GMM, DBSCAN
+from jubatus.common import Datum
+
+from jubakit.wrapper.clustering import KMeans, GMM, DBSCAN, _center_matrix, _nearest_center
 from . import requireEmbedded
 
 
@@ -60,7 +62,7 @@ class KMeansTest(TestCase):
       'forgetting_threshold': 0.5,
       'seed': 0
     }
-    self.assertEqual(compressor_parameter
+    self.assertEqual(compressor_parameter,
                      clustering._make_compressor_parameter('compressive'))
     clustering.stop()
 
@@ -107,7 +109,7 @@ class GMMTest(TestCase):
     self.assertEqual('gmm', clustering._method())
     clustering.stop()
 
-class DBSCANTest(testCase):
+class DBSCANTest(TestCase):
 
   def test_simple(self):
     clustering = DBSCAN(embedded=False)
@@ -133,3 +135,20 @@ class DBSCANTest(testCase):
     self.assertEqual('euclidean', clustering.distance)
     clustering.stop()
 
+
+class NearestCenterTest(TestCase):
+
+  def test_center_matrix(self):
+    centers = [Datum({'v0': 1.0, 'v1': 2.0}), Datum({'v1@num': 3.0, 'x': 4.0})]
+    self.assertTrue(np.array_equal(np.array([[1.0, 2.0], [0.0, 3.0]]), _center_matrix(centers, 2)))
+
+  def test_euclidean(self):
+    X = np.array([[9.0, 9.0], [1.0, 0.0], [11.0, 12.0], [0.0, 0.5]])
+    centers = np.array([[0.0, 0.0], [10.0, 10.0]])
+    self.assertEqual([1, 0, 1, 0], _nearest_center(X, centers, 'euclidean').tolist())
+    self.assertEqual([1, 0, 1, 0], _nearest_center(X, centers, 'euclidean', chunk_size=3).tolist())
+
+  def test_cosine(self):
+    X = np.array([[1.0, 0.1], [0.1, 1.0], [1.0, 1.0], [0.0, 0.0]])
+    centers = np.array([[1.0, 0.0], [0.0, 1.0]])
+    self.assertEqual([0, 1, 0, 0], _nearest_center(X, centers, 'cosine').tolist())
@@ -63,6 +63,19 @@ class LinearRegressionTest(TestCase):
       self.assertTrue(param in regression.__dict__)
     self.assertTrue('invalid_param' not in regression.__dict__)
 
+  @requireEmbedded
+  def test_fit_reuse(self):
+    X = np.array([[1,1], [0,0]])
+    y = np.array([1,2])
+    regression = LinearRegression()
+    regression.fit(X, y)
+    backend = regression.regression_
+    regression.fit(X, y)
+    self.assertTrue(backend is regression.regression_)
+    regression.set_params(method='PA')
+    regression.fit(X, y)
+    self.assertTrue(backend is not regression.regression_)
+
   @requireEmbedded
   def test_get_params(self):
     params = {
@@ -73,7 +86,8 @@ class LinearRegressionTest(TestCase):
       'n_iter': 5,
       'shuffle': True,
       'embedded': True,
-      'seed': 42
+      'seed': 42,
+      'n_jobs': 2
     }
     regression = LinearRegression(**params)
     self.assertDictEqual(params, regression.get_params())
@@ -155,7 +169,7 @@ class NearestNeighborsRegressionTest(TestCase):
   def test_class_params(self):
     regression = NearestNeighborsRegression()
     params = ['method', 'nearest_neighbor_num',
-            'hash_num', 'n_iter', 'shuffle', 'embedded', 'seed']
+            'hash_num', 'n_iter', 'shuffle', 'embedded', 'seed', 'n_jobs']
     for param in params:
       self.assertTrue(param in regression.__dict__)
     self.assertTrue('invalid_param' not in regression.__dict__)
@@ -169,7 +183,8 @@ class NearestNeighborsRegressionTest(TestCase):
       'n_iter': 5,
       'shuffle': True,
       'embedded': True,
-      'seed': 42
+      'seed': 42,
+      'n_jobs': 2
     }
     regression = NearestNeighborsRegression(**params)
     self.assertDictEqual(params, regression.get_params())
@@ -5,7 +5,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import jubatus
 import jubatus.embedded
 
-from .base import GenericSchema, BaseDataset, BaseService, GenericConfig
+from .base import GenericSchema, BaseDataset, BaseService, GenericConfig, Utils
 from .compat import *
 
 class Schema(GenericSchema):
@@ -50,15 +50,98 @@ class Weight(BaseService):
       result = cli.update(d)
       yield (idx, result)
 
-  def calc_weight(self, dataset):
+  def calc_weight(self, dataset, chunk_size=1, pipeline=1):
     """
     Returns extracted feature vectors, without modifying the weight model.
+    When ``pipeline`` is greater than 1, up to ``pipeline`` chunks of
+    ``chunk_size`` records are processed concurrently.
     """
 
-    cli = self._client()
-    for (idx, d) in dataset:
-      result = cli.calc_weight(d)
-      yield (idx, result)
+    def _calc_weight(cli, chunk):
+      return [cli.calc_weight(d) for (_, d) in chunk]
+
+    for (chunk, results) in self._map_chunks(_calc_weight, Utils.chunk(dataset, chunk_size), pipeline):
+      for ((idx, _), result) in zip(chunk, results):
+        yield (idx, result)
+
+  def feature_matrix(self, dataset, features=None, chunk_size=100, pipeline=4):
+    """
+    Returns a tuple of the feature matrix (SciPy CSR sparse matrix of shape
+    [n_samples, n_features]) of the given dataset and the list of feature
+    names.  If ``features`` (list of feature names) is specified, only
+    those features are used as columns.
+    """
+    vectors = [dict([(f.key, f.value) for f in result]) for (_, result) in self.calc_weight(dataset, chunk_size, pipeline)]
+    return _to_matrix(vectors, features)
+
+  def calc_l2norm(self, dataset, chunk_size=100, pipeline=4):
+    """
+    Returns L2 norms of feature vectors of the given dataset as a NumPy
+    array, computed locally.
+    """
+    (matrix, _) = self.feature_matrix(dataset, None, chunk_size, pipeline)
+    return _l2norm(matrix)
+
+  def calc_similarity(self, lhs, rhs=None, paired=False, chunk_size=100, pipeline=4):
+    """
+    Returns cosine similarities between feature vectors, computed locally.
+    Returns the matrix (NumPy array) of shape [len(lhs), len(rhs)] holding
+    similarities of all pairs, or [len(lhs), len(lhs)] if ``rhs`` is not
+    specified.  When ``paired`` is True, returns the array of similarities
+    between i-th records of ``lhs`` and ``rhs``.
+
+    Similarities are equivalent to ``calc_similarity`` RPC of Recommender
+    when this service is configured with the same converter.  Note that
+    global weights (e.g., ``idf``) depend on the documents each service has
+    learned.
+    """
+    import numpy as np
+    import scipy.sparse
+    lhs_vectors = [dict([(f.key, f.value) for f in r]) for (_, r) in self.calc_weight(lhs, chunk_size, pipeline)]
+    rhs_vectors = []
+    if rhs is not None:
+      rhs_vectors = [dict([(f.key, f.value) for f in r]) for (_, r) in self.calc_weight(rhs, chunk_size, pipeline)]
+    (matrix, _) = _to_matrix(lhs_vectors + rhs_vectors)
+
+    norms = _l2norm(matrix)
+    norms[norms == 0] = 1.0  # similarity of zero vectors is 0
+    matrix = scipy.sparse.diags(1.0 / norms).dot(matrix).tocsr()
+    (x, y) = (matrix[:len(lhs_vectors)], matrix[len(lhs_vectors):])
+    if rhs is None:
+      y = x
+
+    if paired:
+      if x.shape[0] != y.shape[0]:
+        raise RuntimeError('number of records mismatch: {0} and {1}'.format(x.shape[0], y.shape[0]))
+      return np.asarray(x.multiply(y).sum(axis=1)).ravel()
+    return x.dot(y.T).toarray()
+
+def _to_matrix(vectors, features=None):
+  """
+  Converts the list of feature vectors (dicts) into the CSR sparse matrix.
+  """
+  import numpy as np
+  import scipy.sparse
+  if features is None:
+    features = sorted(set([k for v in vectors for k in v.keys()]))
+  columns = dict([(k, i) for (i, k) in enumerate(features)])
+  (data, indices, indptr) = ([], [], [0])
+  for v in vectors:
+    for (k, value) in v.items():
+      j = columns.get(k)
+      if j is not None:
+        data.append(value)
+        indices.append(j)
+    indptr.append(len(indices))
+  matrix = scipy.sparse.csr_matrix((data, indices, indptr), shape=(len(vectors), len(features)), dtype=np.float64)
+  return (matrix, features)
+
+def _l2norm(matrix):
+  """
+  Returns L2 norms of rows of the sparse matrix.
+  """
+  import numpy as np
+  return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
 
 class Config(GenericConfig):
   """
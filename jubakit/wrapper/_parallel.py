@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import multiprocessing
+
+import numpy as np
+
+def get_n_jobs(n_jobs, embedded):
+  """
+  Returns the number of workers following the scikit-learn convention
+  (None means 1, negative values count back from the number of CPUs).
+  """
+  if n_jobs is None:
+    n_jobs = 1
+  elif n_jobs < 0:
+    n_jobs = max(1, multiprocessing.cpu_count() + 1 + n_jobs)
+  elif n_jobs == 0:
+    raise RuntimeError('n_jobs must not be 0')
+  if 1 < n_jobs and not embedded:
+    raise RuntimeError('n_jobs is only supported in embedded mode')
+  return n_jobs
+
+def map_rows(func, service, config, X, n_jobs):
+  """
+  Splits rows of `X` into `n_jobs` parts and returns the list of
+  ``func(service, X_part)`` computed in worker processes, each holding a
+  copy of the embedded `service` model.
+  """
+  model = service.snapshot()
+  tasks = []
+  for idx in np.array_split(np.arange(X.shape[0]), n_jobs):
+    if len(idx) != 0:
+      tasks.append((func, service.__class__, config, model, X[idx]))
+  pool = multiprocessing.Pool(min(n_jobs, len(tasks)))
+  try:
+    return pool.map(_apply, tasks)
+  finally:
+    pool.terminate()
+    pool.join()
+
+def _apply(args):
+  (func, service_class, config, model, X) = args
+  service = service_class.run(config, embedded=True)
+  service.restore(model)
+  return func(service, X)
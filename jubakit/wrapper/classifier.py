@@ -2,9 +2,12 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import warnings
+
 import numpy as np
 from sklearn.base import BaseEstimator, ClassifierMixin
 from ..classifier import Classifier, Config, Dataset
+from ._parallel import get_n_jobs, map_rows
 
 
 class BaseJubatusClassifier(BaseEstimator, ClassifierMixin):
@@ -12,7 +15,13 @@ class BaseJubatusClassifier(BaseEstimator, ClassifierMixin):
   scikit-learn Wrapper for Jubatus Classifiers.
   """
 
-  def __init__(self, n_iter=1, shuffle=False, softmax=False, embedded=True, seed=None):
+  # Number of samples classified per RPC call.
+  _BATCH_SIZE = 1000
+
+  # True if models trained in parallel can be averaged.
+  _MERGEABLE = False
+
+  def __init__(self, n_iter=1, shuffle=False, softmax=False, embedded=True, seed=None, n_jobs=1):
     """
     Creates a base class for Jubatus Classifiers.
     """
@@ -21,14 +30,43 @@ class BaseJubatusClassifier(BaseEstimator, ClassifierMixin):
     self.shuffle = shuffle
     self.embedded = embedded
     self.seed = seed
+    self.n_jobs = n_jobs
 
-  @classmethod
-  def _launch_classifier(self):
+  def _get_config(self):
     """
-    Launch Jubatus Classifier
+    Subclasses must override this method and return the Config built from
+    the current parameters.
     """
     raise NotImplementedError()
 
+  def _launch_classifier(self):
+    """
+    Launch Jubatus Classifier.  The running classifier (if any) is stopped.
+    """
+    config = self._get_config()
+    self._release_classifier()
+    self.config_ = config
+    self.classifier_ = Classifier.run(config=self.config_, embedded=self.embedded)
+
+  def _reset_classifier(self):
+    """
+    Clear the running classifier if it can be reused with the current
+    parameters.  Otherwise, launch a new classifier.
+    """
+    classifier = getattr(self, 'classifier_', None)
+    if classifier is None or classifier._embedded != self.embedded or self._get_config() != self.config_:
+      self._launch_classifier()
+    self.classifier_.clear()
+
+  def _release_classifier(self):
+    """
+    Stop the running classifier (if any) and release it.
+    """
+    classifier = getattr(self, 'classifier_', None)
+    self.classifier_ = None
+    if classifier is not None:
+      classifier.stop()
+
   def partial_fit(self, X, y):
     """
     Partially fit underlying model.
@@ -40,44 +78,90 @@ class BaseJubatusClassifier(BaseEstimator, ClassifierMixin):
       self._launch_classifier()
       self.classifier_.clear()
     dataset = Dataset.from_data(X, y)
+    n_jobs = get_n_jobs(self.n_jobs, self.embedded)
+    if 1 < n_jobs and not self._MERGEABLE:
+      warnings.warn('{0} models cannot be merged; all samples are trained in a single '
+                    'model and n_jobs only applies to prediction'.format(type(self).__name__))
     for i in range(self.n_iter):
       if self.shuffle:
         dataset = dataset.shuffle(self.seed)
-      for _ in self.classifier_.train(dataset): pass
+      if 1 < n_jobs and self._MERGEABLE:
+        # Train models on shards of the dataset and average them.
+        self.classifier_ = Classifier.train_parallel(self.config_, dataset, n_jobs, model=self.classifier_.snapshot())
+      else:
+        for _ in self.classifier_.train(dataset): pass
     return self
 
   def fit(self, X, y):
     """
     Fit model.
     """
-    self._launch_classifier()
-    self.classifier_.clear()
+    self._reset_classifier()
+    self.classes_ = np.unique(y)
     return self.partial_fit(X, y)
 
   def predict(self, X):
     """
     Predict class labels for samples in X.
     """
-    if getattr(self, 'classifier_', None) is None:
-      raise RuntimeError('This estimator instance is not fitted yet.')
-    y_pred = np.empty(X.shape[0], dtype=self.classes_.dtype)
-    dataset = Dataset.from_data(X)
-    for idx, _, result in self.classifier_.classify(dataset, softmax=self.softmax):
-      y_pred[idx] = result[0][0]
+    (y_pred, _) = self._classify(X)
     return y_pred
 
   def decision_function(self, X):
     """
     Predict confidence scores for samples.
     """
+    (_, scores) = self._classify(X)
+    if self.softmax:
+      return self._softmax(scores)
+    scores[np.isneginf(scores)] = 0.0
+    return scores
+
+  def predict_proba(self, X):
+    """
+    Predict probabilities for samples, by applying softmax to scores.
+    """
+    (_, scores) = self._classify(X)
+    return self._softmax(scores)
+
+  def _classify(self, X):
+    """
+    Classify samples in X in batches.  Returns the array of predicted labels
+    and the score matrix, whose entries missing in the result are -inf.
+    """
     if getattr(self, 'classifier_', None) is None:
       raise RuntimeError('This estimator instance is not fitted yet.')
-    scores = np.empty((X.shape[0], len(self.classes_)))
-    dataset = Dataset.from_data(X)
-    for idx, _, result in self.classifier_.classify(dataset, softmax=self.softmax):
-      for (label, score) in result:
-        scores[idx][np.searchsorted(self.classes_, label)] = score
-    return scores
+    n = X.shape[0]
+    n_jobs = get_n_jobs(self.n_jobs, self.embedded)
+    if 1 < n_jobs and self._BATCH_SIZE < n:
+      # Split samples across workers.
+      (top, rows, labels, values) = ([], [], [], [])
+      for (t, r, l, v) in map_rows(_classify_rows, self.classifier_, self.config_, X, n_jobs):
+        rows.extend([x + len(top) for x in r])
+        top.extend(t)
+        labels.extend(l)
+        values.extend(v)
+    else:
+      (top, rows, labels, values) = _classify_rows(self.classifier_, X)
+
+    # Map labels (returned as strings) to class indices at once.
+    y_pred = np.asarray(top).astype(self.classes_.dtype)
+    scores = np.full((n, len(self.classes_)), -np.inf)
+    if 0 < len(rows):
+      cols = np.searchsorted(self.classes_, np.asarray(labels).astype(self.classes_.dtype))
+      scores[np.asarray(rows), cols] = values
+    return (y_pred, scores)
+
+  @staticmethod
+  def _softmax(scores):
+    """
+    Apply softmax to each row of the score matrix.  Rows without any score
+    (i.e., all entries are -inf) get the uniform probability.
+    """
+    empty = np.isneginf(scores).all(axis=1)
+    scores = np.where(empty[:, np.newaxis], 0.0, scores)
+    e = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
 
   @classmethod
   def get_params(self, deep=True):
@@ -105,28 +189,28 @@ class BaseJubatusClassifier(BaseEstimator, ClassifierMixin):
     """
     Stop the backend process if exists.
     """
-    if not self.embedded and self.classifier_ is not None:
-      self.classifier_.stop()
-      self.classifier_ = None
+    if not self.embedded:
+      self._release_classifier()
 
 
 class LinearClassifier(BaseJubatusClassifier):
 
+  _MERGEABLE = True
+
   def __init__(self, method='AROW', regularization_weight=1.0,
-               softmax=False, n_iter=1, shuffle=False, embedded=True, seed=None):
-    super(LinearClassifier, self).__init__(n_iter, shuffle, softmax, embedded, seed)
+               softmax=False, n_iter=1, shuffle=False, embedded=True, seed=None, n_jobs=1):
+    super(LinearClassifier, self).__init__(n_iter, shuffle, softmax, embedded, seed, n_jobs)
     self.method = method
     self.regularization_weight = regularization_weight
 
-  def _launch_classifier(self):
+  def _get_config(self):
     if self.method in ('perceptron', 'PA'):
-      self.config_ = Config(method=self.method)
+      return Config(method=self.method)
     elif self.method in ('PA1', 'PA2', 'CW', 'AROW', 'NHERD'):
-      self.config_ = Config(method=self.method,
-                            parameter={'regularization_weight': self.regularization_weight})
+      return Config(method=self.method,
+                    parameter={'regularization_weight': self.regularization_weight})
     else:
       raise NotImplementedError('method {} is not implemented yet.'.format(self.method))
-    self.classifier_ = Classifier.run(config=self.config_, embedded=self.embedded)
 
   def get_params(self, deep=True):
     return {
@@ -136,33 +220,38 @@ class LinearClassifier(BaseJubatusClassifier):
       'shuffle': self.shuffle,
       'softmax': self.softmax,
       'embedded': self.embedded,
-      'seed': self.seed
+      'seed': self.seed,
+      'n_jobs': self.n_jobs
     }
 
 
 class NearestNeighborsClassifier(BaseJubatusClassifier):
+  """
+  Models cannot be merged, so all samples are trained in a single model
+  (i.e., the union of rows in every shard) and ``n_jobs`` only applies to
+  ``predict``.  ``fit`` warns when ``n_jobs`` is greater than 1.
+  """
 
   def __init__(self, method='euclid_lsh', nearest_neighbor_num=5, local_sensitivity=1.0,
-               hash_num=128, n_iter=1, shuffle=False, softmax=False, embedded=True, seed=None):
-    super(NearestNeighborsClassifier, self).__init__(n_iter, shuffle, softmax, embedded, seed)
+               hash_num=128, n_iter=1, shuffle=False, softmax=False, embedded=True, seed=None, n_jobs=1):
+    super(NearestNeighborsClassifier, self).__init__(n_iter, shuffle, softmax, embedded, seed, n_jobs)
     self.method = method
     self.nearest_neighbor_num = nearest_neighbor_num
     self.local_sensitivity = local_sensitivity
     self.hash_num = hash_num
 
-  def _launch_classifier(self):
+  def _get_config(self):
     if self.method in ('euclid_lsh', 'lsh', 'minhash'):
-      self.config_ = Config(method='NN', parameter={'method': self.method,
-                                                    'nearest_neighbor_num': self.nearest_neighbor_num,
-                                                    'local_sensitivity': self.local_sensitivity,
-                                                    'parameter': {'hash_num': self.hash_num}})
+      return Config(method='NN', parameter={'method': self.method,
+                                            'nearest_neighbor_num': self.nearest_neighbor_num,
+                                            'local_sensitivity': self.local_sensitivity,
+                                            'parameter': {'hash_num': self.hash_num}})
     elif self.method in ('euclidean', 'cosine'):
-      self.config_ = Config(method=self.method,
-                            parameter={'nearest_neighbor_num': self.nearest_neighbor_num,
-                                       'local_sensitivity': self.local_sensitivity})
+      return Config(method=self.method,
+                    parameter={'nearest_neighbor_num': self.nearest_neighbor_num,
+                               'local_sensitivity': self.local_sensitivity})
     else:
       raise NotImplementedError('method {} is not implemented yet.'.format(self.method))
-    self.classifier_ = Classifier.run(config=self.config_, embedded=self.embedded)
 
   def get_params(self, deep=True):
     return {
@@ -174,5 +263,20 @@ class NearestNeighborsClassifier(BaseJubatusClassifier):
       'shuffle': self.shuffle,
       'softmax': self.softmax,
       'embedded': self.embedded,
-      'seed': self.seed
+      'seed': self.seed,
+      'n_jobs': self.n_jobs
     }
+
+def _classify_rows(classifier, X):
+  """
+  Classify samples in X.  Returns (top_labels, rows, labels, scores) where
+  the last three are flattened (row, label, score) entries of the result.
+  """
+  (top, rows, labels, values) = ([None] * X.shape[0], [], [], [])
+  dataset = Dataset.from_data(X)
+  for idx, _, result in classifier.classify(dataset, batch_size=BaseJubatusClassifier._BATCH_SIZE):
+    top[idx] = result[0][0]
+    rows.extend([idx] * len(result))
+    labels.extend([label for (label, _) in result])
+    values.extend([score for (_, score) in result])
+  return (top, rows, labels, values)
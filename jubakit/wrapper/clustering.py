@@ -34,12 +34,42 @@ class BaseJubatusClustering(BaseEstimator, ClusterMixin):
             self._make_compressor_parameter(self.compressor_method)
     self.fitted = False
 
-  def _launch_clustering(self):
+  def _get_config(self):
     """
-    Launch Jubatus Clustering
+    Subclasses must override this method and return the Config built from
+    the current parameters.
     """
     raise NotImplementedError()
 
+  def _launch_clustering(self):
+    """
+    Launch Jubatus Clustering.  The running clustering (if any) is stopped.
+    """
+    config = self._get_config()
+    self._release_clustering()
+    self.config_ = config
+    self.clustering_ = Clustering.run(config=self.config_,
+                                      embedded=self.embedded)
+
+  def _reset_clustering(self):
+    """
+    Clear the running clustering if it can be reused with the current
+    parameters.  Otherwise, launch a new clustering.
+    """
+    clustering = getattr(self, 'clustering_', None)
+    if clustering is None or clustering._embedded != self.embedded or self._get_config() != self.config_:
+      self._launch_clustering()
+    self.clustering_.clear()
+
+  def _release_clustering(self):
+    """
+    Stop the running clustering (if any) and release it.
+    """
+    clustering = getattr(self, 'clustering_', None)
+    self.clustering_ = None
+    if clustering is not None:
+      clustering.stop()
+
   def _make_compressor_parameter(self, compressor_method):
     if compressor_method == 'simple':
       return {
@@ -65,8 +95,7 @@ class BaseJubatusClustering(BaseEstimator, ClusterMixin):
     """
     ids = list(range(len(X)))
     dataset = Dataset.from_data(X, ids=ids)
-    self._launch_clustering()
-    self.clustering_.clear()
+    self._reset_clustering()
     for _ in self.clustering_.push(dataset):
       pass
     self.fitted = True
@@ -100,18 +129,16 @@ class BaseKFixedClustering(BaseJubatusClustering):
   def _method(self):
     raise NotImplementedError()
 
-  def _launch_clustering(self):
+  def _get_config(self):
     self.method = self._method()
     self.parameter = {
       'k': self.k,
       'seed': self.seed
     }
-    self.config_ = Config(method=self.method, parameter=self.parameter,
-                          compressor_method=self.compressor_method,
-                          compressor_parameter=self.compressor_parameter,
-                          distance=self.distance)
-    self.clustering_ = Clustering.run(config=self.config_,
-                                      embedded=self.embedded)
+    return Config(method=self.method, parameter=self.parameter,
+                  compressor_method=self.compressor_method,
+                  compressor_parameter=self.compressor_parameter,
+                  distance=self.distance)
 
   def fit(self, X, y=None):
     """
@@ -121,30 +148,33 @@ class BaseKFixedClustering(BaseJubatusClustering):
       raise RuntimeWarning("At least k={0} points are needed \
                             but {1} points given".format(self.k, len(X)))
     dataset = Dataset.from_data(X)
-    self._launch_clustering()
-    self.clustering_.clear()
+    self._reset_clustering()
     for _ in self.clustering_.push(dataset): pass
     self.fitted = True
     return self
 
+  def fit_predict(self, X, y=None):
+    """
+    Construct clustering model and
+    Predict the closest cluster each sample in X belongs to.
+    """
+    return self.fit(X).predict(X)
+
   def predict(self, X):
     """
     Predict the closest cluster each sample in X belongs to.
+    Cluster centers are fetched once and distances are computed locally.
     """
     if not self.fitted:
       raise RuntimeError("clustering model not fitted yet.")
-    dataset = Dataset.from_data(X)
-    y_pred = []
-    mappings = {}
-    count = 0
-    for idx, row_id, result in self.clustering_.get_nearest_center(dataset):
-      if result not in mappings:
-        mappings[result] = count
-        y_pred.append(count)
-        count += 1
-      else:
-        y_pred.append(mappings[result])
-    return y_pred
+    centers = _center_matrix(self.clustering_.get_k_center(), X.shape[1])
+    nearest = _nearest_center(X, centers, self.distance)
+
+    # Number clusters in order of first appearance.
+    (_, first, inverse) = np.unique(nearest, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=int)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse].tolist()
 
 
 class KMeans(BaseKFixedClustering):
@@ -174,16 +204,50 @@ class DBSCAN(BaseJubatusClustering):
     self.eps = eps
     self.min_core_point = min_core_point
 
-  def _launch_clustering(self):
+  def _get_config(self):
     self.method = 'dbscan'
     self.parameter = {
       'eps': self.eps,
       'min_core_point': self.min_core_point
     }
-    self.config_ = Config(method=self.method, parameter=self.parameter,
-                          compressor_method=self.compressor_method,
-                          compressor_parameter=self.compressor_parameter,
-                          distance=self.distance)
-    self.clustering_ = Clustering.run(config=self.config_,
-                                      embedded=self.embedded)
+    return Config(method=self.method, parameter=self.parameter,
+                  compressor_method=self.compressor_method,
+                  compressor_parameter=self.compressor_parameter,
+                  distance=self.distance)
 
+
+def _center_matrix(centers, n_features):
+  """
+  Convert cluster centers (list of Datum) into a matrix.  Features are
+  named ``v0``, ``v1``, ... by ``Dataset.from_data``.
+  """
+  matrix = np.zeros((len(centers), n_features))
+  for (i, center) in enumerate(centers):
+    for (key, value) in center.num_values:
+      key = key[:-len('@num')] if key.endswith('@num') else key
+      if key.startswith('v') and key[1:].isdigit() and int(key[1:]) < n_features:
+        matrix[i, int(key[1:])] = value
+  return matrix
+
+def _nearest_center(X, centers, distance, chunk_size=10000):
+  """
+  Return the index of the nearest center for each sample in X, using the
+  same distance as the server (ties are broken by the first center).
+  """
+  nearest = np.empty(X.shape[0], dtype=int)
+  norms = np.sqrt((centers ** 2).sum(axis=1))
+  for start in range(0, X.shape[0], chunk_size):
+    x = X[start:start + chunk_size]
+    x = np.asarray(x.todense() if hasattr(x, 'todense') else x, dtype=float)
+    if distance == 'cosine':
+      x_norms = np.sqrt((x ** 2).sum(axis=1))
+      denom = np.outer(x_norms, norms)
+      dots = x.dot(centers.T)
+      sim = np.divide(dots, denom, out=np.zeros_like(dots), where=(denom != 0))
+      dist = 1.0 - sim
+    else:
+      dist = np.empty((x.shape[0], centers.shape[0]))
+      for (i, c) in enumerate(centers):
+        dist[:, i] = np.sqrt(((x - c) ** 2).sum(axis=1))
+    nearest[start:start + chunk_size] = dist.argmin(axis=1)
+  return nearest
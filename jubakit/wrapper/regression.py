@@ -2,9 +2,12 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import warnings
+
 import numpy as np
 from sklearn.base import BaseEstimator, RegressorMixin
 from ..regression import Regression, Config, Dataset
+from ._parallel import get_n_jobs, map_rows
 
 
 class BaseJubatusRegression(BaseEstimator, RegressorMixin):
@@ -12,7 +15,13 @@ class BaseJubatusRegression(BaseEstimator, RegressorMixin):
   scikit-learn Wrapper for Jubatus Regressions.
   """
 
-  def __init__(self, n_iter=1, shuffle=False, embedded=True, seed=None):
+  # Number of samples estimated per RPC call.
+  _BATCH_SIZE = 1000
+
+  # True if models trained in parallel can be averaged.
+  _MERGEABLE = False
+
+  def __init__(self, n_iter=1, shuffle=False, embedded=True, seed=None, n_jobs=1):
     """
     Creates a base class for Jubatus Regressoions.
     """
@@ -20,14 +29,43 @@ class BaseJubatusRegression(BaseEstimator, RegressorMixin):
     self.shuffle = shuffle
     self.embedded = embedded
     self.seed = seed
+    self.n_jobs = n_jobs
 
-  @classmethod
-  def _launch_regression(self):
+  def _get_config(self):
     """
-    Launch Jubatus Regression
+    Subclasses must override this method and return the Config built from
+    the current parameters.
     """
     raise NotImplementedError()
 
+  def _launch_regression(self):
+    """
+    Launch Jubatus Regression.  The running regression (if any) is stopped.
+    """
+    config = self._get_config()
+    self._release_regression()
+    self.config_ = config
+    self.regression_ = Regression.run(config=self.config_, embedded=self.embedded)
+
+  def _reset_regression(self):
+    """
+    Clear the running regression if it can be reused with the current
+    parameters.  Otherwise, launch a new regression.
+    """
+    regression = getattr(self, 'regression_', None)
+    if regression is None or regression._embedded != self.embedded or self._get_config() != self.config_:
+      self._launch_regression()
+    self.regression_.clear()
+
+  def _release_regression(self):
+    """
+    Stop the running regression (if any) and release it.
+    """
+    regression = getattr(self, 'regression_', None)
+    self.regression_ = None
+    if regression is not None:
+      regression.stop()
+
   def partial_fit(self, X, y):
     """
     Partially fit underlying model.
@@ -37,18 +75,25 @@ class BaseJubatusRegression(BaseEstimator, RegressorMixin):
       self._launch_regression()
       self.regression_.clear()
     dataset = Dataset.from_data(X, y)
+    n_jobs = get_n_jobs(self.n_jobs, self.embedded)
+    if 1 < n_jobs and not self._MERGEABLE:
+      warnings.warn('{0} models cannot be merged; all samples are trained in a single '
+                    'model and n_jobs only applies to prediction'.format(type(self).__name__))
     for i in range(self.n_iter):
       if self.shuffle:
         dataset = dataset.shuffle(self.seed)
-      for _ in self.regression_.train(dataset): pass
+      if 1 < n_jobs and self._MERGEABLE:
+        # Train models on shards of the dataset and average them.
+        self.regression_ = Regression.train_parallel(self.config_, dataset, n_jobs, model=self.regression_.snapshot())
+      else:
+        for _ in self.regression_.train(dataset): pass
     return self
 
   def fit(self, X, y):
     """
     Fit model.
     """
-    self._launch_regression()
-    self.regression_.clear()
+    self._reset_regression()
     return self.partial_fit(X, y)
 
   def predict(self, X):
@@ -57,11 +102,11 @@ class BaseJubatusRegression(BaseEstimator, RegressorMixin):
     """
     if getattr(self, 'regression_', None) is None:
       raise RuntimeError('This estimator instance is not fitted yet.')
-    y_pred = np.empty(X.shape[0], dtype=float)
-    dataset = Dataset.from_data(X)
-    for idx, _, result in self.regression_.estimate(dataset):
-      y_pred[idx] = result
-    return y_pred
+    n_jobs = get_n_jobs(self.n_jobs, self.embedded)
+    if 1 < n_jobs and self._BATCH_SIZE < X.shape[0]:
+      # Split samples across workers.
+      return np.concatenate(map_rows(_estimate_rows, self.regression_, self.config_, X, n_jobs))
+    return _estimate_rows(self.regression_, X)
 
   @classmethod
   def get_params(self, deep=True):
@@ -97,35 +142,35 @@ class BaseJubatusRegression(BaseEstimator, RegressorMixin):
     """
     Stop the backend process if exists.
     """
-    if not self.embedded and self.regression_ is not None:
-      self.regression_.stop()
-      self.regression_ = None
+    if not self.embedded:
+      self._release_regression()
 
 
 class LinearRegression(BaseJubatusRegression):
 
+  _MERGEABLE = True
+
   def __init__(self, method='AROW', regularization_weight=1.0, sensitivity=1.0, learning_rate=1.0,
-               n_iter=1, shuffle=False, embedded=True, seed=None):
-    super(LinearRegression, self).__init__(n_iter, shuffle, embedded, seed)
+               n_iter=1, shuffle=False, embedded=True, seed=None, n_jobs=1):
+    super(LinearRegression, self).__init__(n_iter, shuffle, embedded, seed, n_jobs)
     self.method = method
     self.regularization_weight = regularization_weight
     self.sensitivity = sensitivity
     self.learning_rate = learning_rate
 
-  def _launch_regression(self):
+  def _get_config(self):
     if self.method in ('perceptron'):
-      self.config_ = Config(method=self.method,
-                            parameter={'learning_rate': self.learning_rate})
+      return Config(method=self.method,
+                    parameter={'learning_rate': self.learning_rate})
     elif self.method in ('PA'):
-      self.config_ = Config(method=self.method,
-                            parameter={'sensitivity': self.sensitivity})
+      return Config(method=self.method,
+                    parameter={'sensitivity': self.sensitivity})
     elif self.method in ('PA1', 'PA2', 'CW', 'AROW', 'NHERD'):
-      self.config_ = Config(method=self.method,
-                            parameter={'regularization_weight': self.regularization_weight,
-                                       'sensitivity': self.sensitivity})
+      return Config(method=self.method,
+                    parameter={'regularization_weight': self.regularization_weight,
+                               'sensitivity': self.sensitivity})
     else:
       raise NotImplementedError('method {} is not implemented yet.'.format(self.method))
-    self.regression_ = Regression.run(config=self.config_, embedded=self.embedded)
 
   def get_params(self, deep=True):
     return {
@@ -136,30 +181,35 @@ class LinearRegression(BaseJubatusRegression):
       'n_iter': self.n_iter,
       'shuffle': self.shuffle,
       'embedded': self.embedded,
-      'seed': self.seed
+      'seed': self.seed,
+      'n_jobs': self.n_jobs
     }
 
 
 class NearestNeighborsRegression(BaseJubatusRegression):
+  """
+  Models cannot be merged, so all samples are trained in a single model
+  (i.e., the union of rows in every shard) and ``n_jobs`` only applies to
+  ``predict``.  ``fit`` warns when ``n_jobs`` is greater than 1.
+  """
 
   def __init__(self, method='euclid_lsh', nearest_neighbor_num=5,
-               hash_num=128, n_iter=1, shuffle=False, embedded=True, seed=None):
-    super(NearestNeighborsRegression, self).__init__(n_iter, shuffle, embedded, seed)
+               hash_num=128, n_iter=1, shuffle=False, embedded=True, seed=None, n_jobs=1):
+    super(NearestNeighborsRegression, self).__init__(n_iter, shuffle, embedded, seed, n_jobs)
     self.method = method
     self.nearest_neighbor_num = nearest_neighbor_num
     self.hash_num = hash_num
 
-  def _launch_regression(self):
+  def _get_config(self):
     if self.method in ('euclid_lsh', 'lsh', 'minhash'):
-      self.config_ = Config(method='NN', parameter={'method': self.method,
-                                                    'nearest_neighbor_num': self.nearest_neighbor_num,
-                                                    'parameter': {'hash_num': self.hash_num}})
+      return Config(method='NN', parameter={'method': self.method,
+                                            'nearest_neighbor_num': self.nearest_neighbor_num,
+                                            'parameter': {'hash_num': self.hash_num}})
     elif self.method in ('euclidean', 'cosine'):
-      self.config_ = Config(method=self.method,
-                            parameter={'nearest_neighbor_num': self.nearest_neighbor_num})
+      return Config(method=self.method,
+                    parameter={'nearest_neighbor_num': self.nearest_neighbor_num})
     else:
       raise NotImplementedError('method {} is not implemented yet.'.format(self.method))
-    self.regression_ = Regression.run(config=self.config_, embedded=self.embedded)
 
   def get_params(self, deep=True):
     return {
@@ -168,7 +218,20 @@ class NearestNeighborsRegression(BaseJubatusRegression):
       'hash_num': self.hash_num,
       'n_iter': self.n_iter,
       'shuffle': self.shuffle,
-      'softmax': self.softmax,
       'embedded': self.embedded,
-      'seed': self.seed
+      'seed': self.seed,
+      'n_jobs': self.n_jobs
     }
+
+def _estimate_rows(regression, X):
+  """
+  Estimate target values of samples in X.
+  """
+  (indices, values) = ([], [])
+  dataset = Dataset.from_data(X)
+  for idx, _, result in regression.estimate(dataset, batch_size=BaseJubatusRegression._BATCH_SIZE):
+    indices.append(idx)
+    values.append(result)
+  y_pred = np.empty(X.shape[0], dtype=float)
+  y_pred[indices] = values
+  return y_pred